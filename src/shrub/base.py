@@ -1,8 +1,7 @@
 import abc
 import collections
-import json
 
-import yaml
+from shrub.json_format import dumpb, dumps
 
 
 RECURSE_KEY = "recurse"
@@ -44,11 +43,24 @@ class EvergreenBuilder(abc.ABC):
         Convert this object into a yaml configuration.
         :return: yaml string describing this configuration.
         """
+        import yaml
+
         return yaml.dump(self.to_map(), default_flow_style=False)
 
-    def to_json(self):
+    def to_json(self, compact=False, sort_keys=False):
         """
         Convert this object into a json configuration.
+        :param compact: Leave out all whitespace instead of indenting the json.
+        :param sort_keys: Sort the keys of objects, so equal configurations give identical json.
         :return: json string describing this configuration.
         """
-        return json.dumps(self.to_map(), indent=4)
+        return dumps(self.to_map(), compact=compact, sort_keys=sort_keys)
+
+    def to_json_bytes(self, compact=False, sort_keys=False):
+        """
+        Convert this object into a utf-8 encoded json configuration.
+        :param compact: Leave out all whitespace instead of indenting the json.
+        :param sort_keys: Sort the keys of objects, so equal configurations give identical json.
+        :return: json bytes describing this configuration.
+        """
+        return dumpb(self.to_map(), compact=compact, sort_keys=sort_keys)
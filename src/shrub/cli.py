@@ -0,0 +1,258 @@
+"""Command line interface for working with evergreen configuration files."""
+import argparse
+import sys
+import time
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+import yaml
+from pydantic import ValidationError
+
+from shrub.compressed_io import uncompressed_name
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.shrub_service import (
+    DEFAULT_CHUNK_SIZE,
+    DUMP_KWARGS,
+    ShrubService,
+)
+
+YAML = "yaml"
+JSON = "json"
+# Format of files with each extension, after removing any compressed extension.
+FORMAT_EXTENSIONS = {".yml": YAML, ".yaml": YAML, ".json": JSON}
+# Sections of a project holding named entities.
+NAMED_SECTIONS = ("buildvariants", "tasks", "task_groups", "functions")
+DEFAULT_TOP_COUNT = 10
+DEFAULT_REPEAT = 3
+
+# Exit codes.
+OK = 0
+FAILED = 1
+ERROR = 2
+
+
+def format_for(file_location: str, file_format: Optional[str] = None) -> str:
+    """
+    Get the format of the given file, based on its extension.
+
+    :param file_location: Path of file, compressed extensions are ignored.
+    :param file_format: Explicit format, used as is if given.
+    :return: Format of file.
+    """
+    if file_format:
+        return file_format
+    name = uncompressed_name(file_location).lower()
+    for extension, extension_format in FORMAT_EXTENSIONS.items():
+        if name.endswith(extension):
+            return extension_format
+    raise ValueError(f"Cannot detect the format of '{file_location}', use --format")
+
+
+def _positive_int(value: str) -> int:
+    """
+    Parse a command line argument that must be a positive integer.
+
+    :param value: Value of argument.
+    :return: Parsed integer.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def _iter(value: Any) -> List[Tuple[str, Any]]:
+    """Get the items of a named section, with the name of each."""
+    if isinstance(value, dict):
+        return list(value.items())
+    return [(item["name"], item) for item in value]
+
+
+def _timed(function: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    """Call the given function a number of times, getting the fastest time and its result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def validate(args: argparse.Namespace) -> int:
+    """Check that every reference in a configuration is defined."""
+    errors = EvgProject.from_file(args.file).validate_references(
+        known_tasks=args.known_task, known_functions=args.known_function
+    )
+    for error in errors:
+        print(error)
+    if errors:
+        print(f"{len(errors)} undefined references", file=sys.stderr)
+        return FAILED
+    return OK
+
+
+def convert(args: argparse.Namespace) -> int:
+    """Convert a configuration to another format, streaming it to the output file."""
+    file_format = format_for(args.destination, args.format)
+    project = EvgProject.from_file(args.source)
+    if file_format == JSON:
+        ShrubService.write_json(project, args.destination, args.level)
+    else:
+        ShrubService.write_yaml(project, args.destination, args.level, args.chunk_size)
+    return OK
+
+
+def stats(args: argparse.Namespace) -> int:
+    """Report the entities of a configuration and what its yaml size is made of."""
+    project_stats = EvgProject.from_file(args.file).stats(args.top)
+    print("entities:")
+    for key, count in project_stats.counts.items():
+        print(f"  {key}: {count}")
+    commands_per_task = project_stats.commands_per_task
+    print(
+        f"commands per task: mean {commands_per_task.mean:.1f},"
+        f" median {commands_per_task.median}, max {commands_per_task.max}"
+    )
+    print(f"total size (bytes): {project_stats.total_size}")
+    _print_sizes("size by section (bytes):", project_stats.section_sizes.items())
+    _print_sizes("size by command type (bytes):", project_stats.command_type_sizes.items())
+    for title, largest in [
+        ("largest tasks (bytes):", project_stats.largest_tasks),
+        ("largest build variants (bytes):", project_stats.largest_variants),
+        ("largest functions (bytes):", project_stats.largest_functions),
+    ]:
+        _print_sizes(title, ((entity.name, entity.size) for entity in largest))
+    print("most duplicated commands (bytes):")
+    for command in project_stats.duplicated_commands:
+        print(f"  {command.command}: {command.total_size} ({command.count} x {command.size})")
+    print("largest expansions (bytes):")
+    for expansion in project_stats.largest_expansions:
+        print(f"  {expansion.name}: {expansion.total_size} ({expansion.count} settings)")
+    return OK
+
+
+def _print_sizes(title: str, sizes: Iterable[Tuple[str, int]]) -> None:
+    """Print a titled list of sizes."""
+    print(title)
+    for name, size in sizes:
+        print(f"  {name}: {size}")
+
+
+def diff(args: argparse.Namespace) -> int:
+    """Report the entities added, removed or changed between two configurations."""
+    old = EvgProject.from_file(args.old).model_dump(**DUMP_KWARGS)
+    new = EvgProject.from_file(args.new).model_dump(**DUMP_KWARGS)
+    changes = []
+    for key in EvgProject.model_fields:
+        if key in NAMED_SECTIONS:
+            old_entities = dict(_iter(old.get(key) or []))
+            new_entities = dict(_iter(new.get(key) or []))
+            for name in old_entities:
+                if name not in new_entities:
+                    changes.append(f"- {key}[{name}]")
+                elif old_entities[name] != new_entities[name]:
+                    changes.append(f"~ {key}[{name}]")
+            changes.extend(f"+ {key}[{name}]" for name in new_entities if name not in old_entities)
+        elif key not in old and key in new:
+            changes.append(f"+ {key}")
+        elif key in old and key not in new:
+            changes.append(f"- {key}")
+        elif old.get(key) != new.get(key):
+            changes.append(f"~ {key}")
+    for change in changes:
+        print(change)
+    return FAILED if changes else OK
+
+
+def bench(args: argparse.Namespace) -> int:
+    """Time loading a configuration and generating its yaml and json."""
+    load_time, project = _timed(lambda: EvgProject.from_file(args.file), args.repeat)
+    yaml_time, yaml_text = _timed(lambda: ShrubService.generate_yaml(project), args.repeat)
+    json_time, json_text = _timed(lambda: ShrubService.generate_json(project), args.repeat)
+    print(f"load: {load_time:.3f}s")
+    print(f"dump yaml: {yaml_time:.3f}s ({len(yaml_text.encode())} bytes)")
+    print(f"dump json: {json_time:.3f}s ({len(json_text.encode())} bytes)")
+    return OK
+
+
+def _parser() -> argparse.ArgumentParser:
+    """Create the parser of command line arguments."""
+    parser = argparse.ArgumentParser(prog="shrub", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    validate_parser = commands.add_parser("validate", help=validate.__doc__)
+    validate_parser.add_argument("file", help="Configuration file to validate.")
+    validate_parser.add_argument(
+        "--known-task", action="append", default=[], help="Task defined outside the file."
+    )
+    validate_parser.add_argument(
+        "--known-function", action="append", default=[], help="Function defined outside the file."
+    )
+    validate_parser.set_defaults(run=validate)
+
+    convert_parser = commands.add_parser("convert", help=convert.__doc__)
+    convert_parser.add_argument("source", help="Configuration file to convert.")
+    convert_parser.add_argument(
+        "destination", help="File to write, compressed if ending in .gz or .zst."
+    )
+    convert_parser.add_argument(
+        "--format", choices=[YAML, JSON], help="Format to write, detected from the extension."
+    )
+    convert_parser.add_argument("--level", type=int, help="Compression level.")
+    convert_parser.add_argument(
+        "--chunk-size",
+        type=_positive_int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Number of items of a section to generate at a time.",
+    )
+    convert_parser.set_defaults(run=convert)
+
+    stats_parser = commands.add_parser("stats", help=stats.__doc__)
+    stats_parser.add_argument("file", help="Configuration file to report on.")
+    stats_parser.add_argument(
+        "--top",
+        type=_positive_int,
+        default=DEFAULT_TOP_COUNT,
+        help="Number of largest entities to report.",
+    )
+    stats_parser.set_defaults(run=stats)
+
+    diff_parser = commands.add_parser("diff", help=diff.__doc__)
+    diff_parser.add_argument("old", help="Original configuration file.")
+    diff_parser.add_argument("new", help="Changed configuration file.")
+    diff_parser.set_defaults(run=diff)
+
+    bench_parser = commands.add_parser("bench", help=bench.__doc__)
+    bench_parser.add_argument("file", help="Configuration file to benchmark.")
+    bench_parser.add_argument(
+        "--repeat",
+        type=_positive_int,
+        default=DEFAULT_REPEAT,
+        help="Number of times to time each step.",
+    )
+    bench_parser.set_defaults(run=bench)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Run the shrub command line interface.
+
+    :param argv: Command line arguments, those of the process if not given.
+    :return: Exit code, 1 if validation failed or files differ, 2 on errors.
+    """
+    args = _parser().parse_args(argv)
+    try:
+        return args.run(args)
+    except (OSError, ValueError, ImportError, yaml.YAMLError) as e:
+        # ValidationError is a ValueError, report it without a traceback.
+        kind = "invalid configuration" if isinstance(e, ValidationError) else "error"
+        print(f"shrub: {kind}: {e}", file=sys.stderr)
+        return ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""Reading and writing of optionally compressed configuration files."""
+import gzip
+import io
+import json
+import os
+import queue
+import threading
+from types import TracebackType
+from typing import IO, Any, List, Optional, Type
+
+GZIP = "gzip"
+ZSTD = "zstd"
+# Compression used for files with each extension.
+COMPRESSION_EXTENSIONS = {".gz": GZIP, ".zst": ZSTD}
+# Compression levels trading a little size for speed.
+DEFAULT_LEVELS = {GZIP: 6, ZSTD: 3}
+# Max number of chunks waiting to be compressed.
+MAX_PENDING_CHUNKS = 16
+# Number of characters of text collected into a chunk before it is queued.
+CHUNK_SIZE = 1 << 16
+
+
+def compression_for(file_location: str) -> Optional[str]:
+    """
+    Get the compression used for the given file, based on its extension.
+
+    :param file_location: Path of file.
+    :return: Compression of file, None if not compressed.
+    """
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(file_location)[1].lower())
+
+
+def uncompressed_name(file_location: str) -> str:
+    """
+    Get the name of the given file without any compressed extension, e.g. `a.yml` for `a.yml.gz`.
+
+    :param file_location: Path of file.
+    :return: Path of file without compressed extension.
+    """
+    if compression_for(file_location) is None:
+        return file_location
+    return os.path.splitext(file_location)[0]
+
+
+def _require_zstandard() -> Any:
+    """Import the zstandard module, an optional dependency only imported once it is used."""
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "zstd compression requires the zstandard package: pip install zstandard"
+        ) from None
+    return zstandard
+
+
+def open_text(file_location: str) -> IO[str]:
+    """
+    Open the given file for reading text, decompressing it on the fly if compressed.
+
+    :param file_location: Path of file, compression is detected from `.gz` and `.zst` extensions.
+    :return: Text file object.
+    """
+    compression = compression_for(file_location)
+    if compression == GZIP:
+        return gzip.open(file_location, "rt", encoding="utf-8")
+    if compression == ZSTD:
+        reader = _require_zstandard().ZstdDecompressor().stream_reader(open(file_location, "rb"))
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(file_location, encoding="utf-8")
+
+
+def load_file(file_location: str) -> Any:
+    """
+    Read and parse the configuration of the given file.
+
+    Files ending in `.gz` or `.zst` are decompressed while they are read. JSON files are parsed
+    with the json module, other files with the libyaml bindings when available.
+
+    :param file_location: Path of file.
+    :return: Parsed contents of file.
+    """
+    file_location = str(file_location)
+    with open_text(file_location) as contents:
+        if uncompressed_name(file_location).lower().endswith(".json"):
+            return json.load(contents)
+
+        import yaml
+
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        return yaml.load(contents, Loader=loader)
+
+
+class CompressedWriter:
+    """
+    Write text to a file, compressing it in a background thread.
+
+    Text passed to `write` is queued and encoded, compressed and written by a background thread,
+    so serializing the next part of a configuration overlaps with compressing the previous one.
+    Files without a compressed extension are written as is. If writing fails, or the block using
+    the writer raises, the partially written file is deleted.
+    """
+
+    def __init__(
+        self,
+        file_location: str,
+        compression: Optional[str] = None,
+        level: Optional[int] = None,
+    ) -> None:
+        """
+        Create a new writer.
+
+        :param file_location: Path of file to write.
+        :param compression: Compression to use, detected from the file extension if not given.
+        :param level: Compression level, a fast default for the compression if not given.
+        """
+        self.file_location = file_location
+        self.compression = compression or compression_for(file_location)
+        if self.compression is not None and self.compression not in DEFAULT_LEVELS:
+            raise ValueError(f"Unsupported compression '{self.compression}'")
+        if self.compression == ZSTD:
+            _require_zstandard()
+        self.level = level if level is not None else DEFAULT_LEVELS.get(self.compression or "")
+        self._chunks: "queue.Queue[Optional[str]]" = queue.Queue(MAX_PENDING_CHUNKS)
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._error: Optional[BaseException] = None
+        self._aborted = False
+        self._thread: Optional[threading.Thread] = None
+
+    def _open(self) -> Any:
+        """Open the file, wrapped in a compressor if needed."""
+        raw = open(self.file_location, "wb")
+        if self.compression == GZIP:
+            return gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=self.level)
+        if self.compression == ZSTD:
+            compressor = _require_zstandard().ZstdCompressor(level=self.level)
+            return compressor.stream_writer(raw, closefd=True)
+        return raw
+
+    def _run(self, output: Any) -> None:
+        """Compress and write queued chunks until the end of input."""
+        raw = getattr(output, "fileobj", None)
+        try:
+            while True:
+                chunk = self._chunks.get()
+                if chunk is None:
+                    break
+                if not self._aborted:
+                    output.write(chunk.encode("utf-8"))
+        except BaseException as e:
+            self._error = e
+            # Keep consuming so writers are never blocked on a full queue.
+            while self._chunks.get() is not None:
+                pass
+        finally:
+            output.close()
+            if raw is not None:
+                raw.close()
+
+    def __enter__(self) -> "CompressedWriter":
+        self._thread = threading.Thread(target=self._run, args=(self._open(),), daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def write(self, text: str) -> None:
+        """
+        Queue the given text to be written.
+
+        :param text: Text to write.
+        """
+        if self._error is not None:
+            raise self._error
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= CHUNK_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Queue the buffered text as a single chunk."""
+        if self._buffer:
+            self._chunks.put("".join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+    def close(self) -> None:
+        """Wait for all queued text to be written and close the file."""
+        if self._thread is not None:
+            self._flush()
+            self._stop()
+        if self._error is not None:
+            raise self._error
+
+    def abort(self) -> None:
+        """Stop writing, discarding any queued text, and delete the partially written file."""
+        self._aborted = True
+        self._buffer = []
+        self._buffered = 0
+        if self._thread is not None:
+            self._stop()
+
+    def _stop(self) -> None:
+        """Wait for the background thread to finish, deleting the file if it is incomplete."""
+        if self._thread is not None:
+            self._chunks.put(None)
+            self._thread.join()
+            self._thread = None
+            if self._aborted or self._error is not None:
+                # A truncated file could be mistaken for a complete configuration.
+                try:
+                    os.remove(self.file_location)
+                except FileNotFoundError:
+                    pass
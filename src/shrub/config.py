@@ -5,7 +5,6 @@ from shrub.command import CommandSequence
 from shrub.task import Task
 from shrub.task import TaskGroup
 from shrub.variant import Variant
-from croniter import croniter
 
 
 def _find_name_in_list(name_list, name):
@@ -195,6 +194,9 @@ class Configuration(EvergreenBuilder):
         if not isinstance(cron_schedule, str):
             raise TypeError("cron only accepts strings")
 
+        # croniter is slow to import and only needed to validate cron schedules.
+        from croniter import croniter
+
         if not croniter.is_valid(cron_schedule):
             raise ValueError("Invalid cron syntax")
 
@@ -252,6 +254,28 @@ class Configuration(EvergreenBuilder):
 
         return self
 
+    @classmethod
+    def from_evg_project(cls, project):
+        """
+        Convert a v3 evergreen project to a configuration, sharing the parameters of commands.
+
+        :param project: evergreen project to convert.
+        :return: configuration describing the project.
+        """
+        from shrub.conversion import evg_project_to_configuration
+
+        return evg_project_to_configuration(project)
+
+    def to_evg_project(self):
+        """
+        Convert this configuration to a v3 evergreen project, sharing the parameters of commands.
+
+        :return: evergreen project describing this configuration.
+        """
+        from shrub.conversion import configuration_to_evg_project
+
+        return configuration_to_evg_project(self)
+
     def to_map(self):
         """Convert this object to a python dict."""
         obj = {}
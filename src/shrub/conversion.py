@@ -0,0 +1,497 @@
+"""
+Conversion of configurations between the legacy, v2 and v3 shrub APIs.
+
+Objects are mapped directly to the objects of the other API, without converting the configuration
+to a dictionary or yaml first. Commands are created without copying their parameters: the params
+and vars dictionaries are shared between the original and converted commands, so they should not
+be modified afterwards. A command object used by several tasks is converted once and shared too.
+
+Configuration that the target API cannot represent raises a ValueError instead of being dropped.
+"""
+from operator import attrgetter
+from typing import (
+    TYPE_CHECKING,
+    AbstractSet,
+    Any,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+)
+
+from pydantic import BaseModel
+
+from shrub.base import NAME_KEY
+from shrub.command import CommandDefinition, CommandSequence
+from shrub.task import Task as LegacyTask
+from shrub.task import TaskDependency as LegacyTaskDependency
+from shrub.task import TaskGroup as LegacyTaskGroup
+from shrub.v2.command import BuiltInCommand as V2BuiltInCommand
+from shrub.v2.command import CommandType
+from shrub.v2.command import FunctionCall as V2FunctionCall
+from shrub.v2.command import ShrubCommand
+from shrub.v2.dict_creation_util import check_keys, existing_items
+from shrub.v2.project import ShrubProject
+from shrub.v2.task import TASK_GROUP_KEYS
+from shrub.v2.task import Task as V2Task
+from shrub.v2.task import TaskDependency as V2TaskDependency
+from shrub.v2.task import TaskGroup as V2TaskGroup
+from shrub.v2.variant import BuildVariant as V2BuildVariant
+from shrub.v3.evg_build_variant import BuildVariant, DisplayTask
+from shrub.v3.evg_command import (
+    AvailableCommands,
+    BuiltInCommand,
+    EvgCommand,
+    EvgCommandType,
+    FunctionCall,
+)
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_task import EvgTask, EvgTaskDependency, EvgTaskRef
+from shrub.v3.evg_task_group import EvgTaskGroup
+from shrub.variant import DisplayTaskDefinition, TaskSpec, Variant
+
+if TYPE_CHECKING:
+    from shrub.config import Configuration
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+# Commands already converted, by id of the original command.
+_CommandCache = Dict[int, Any]
+
+AVAILABLE_COMMANDS = frozenset(get_args(AvailableCommands))
+# Fields of v3 models that can be represented by the v2 API.
+V2_PROJECT_FIELDS = frozenset({"buildvariants", "tasks", "task_groups"})
+V2_TASK_FIELDS = frozenset({"name", "commands", "depends_on"})
+V2_DEPENDENCY_FIELDS = frozenset({"name", "variant"})
+V2_FUNCTION_CALL_FIELDS = frozenset({"func", "vars"})
+BUILT_IN_COMMAND_FIELDS = frozenset({"command", "params", "type"})
+# Names of v2 build variant keys that differ in the v3 API.
+V2_VARIANT_RENAMES = {"batch_time": "batchtime"}
+V3_VARIANT_RENAMES = {value: key for key, value in V2_VARIANT_RENAMES.items()}
+# Fields of legacy commands that can be represented by v3 function calls.
+FUNCTION_CALL_FIELDS = frozenset({"func", "vars", "timeout_secs"})
+# Task group timeouts are a number of seconds in the legacy API and commands in the v3 API, and
+# legacy configurations cannot set timeout commands.
+TIMEOUT = "timeout"
+
+
+def _build(
+    model: Type[ModelT],
+    fields: Dict[str, Any],
+    kind: str,
+    unsupported: AbstractSet[str] = frozenset(),
+) -> ModelT:
+    """Create a v3 model from the given fields, rejecting fields the model does not have."""
+    check_keys(fields, model.model_fields.keys() - unsupported, kind)
+    return model(**fields)
+
+
+def _model_fields(model: BaseModel) -> Dict[str, Any]:
+    """Get the fields of the given v3 model that were set to a value."""
+    fields = {name: getattr(model, name) for name in model.model_fields_set}
+    return {name: value for name, value in fields.items() if value is not None}
+
+
+def _v3_built_in(command: str, params: Optional[Dict[str, Any]], command_type: Any) -> Any:
+    """Create a v3 built-in command sharing the given params."""
+    if command not in AVAILABLE_COMMANDS:
+        raise ValueError(f"Unsupported command '{command}'")
+    fields: Dict[str, Any] = {"command": command}
+    if params:
+        if any(value is None for value in params.values()):
+            # Like the v3 constructor, parameters without a value are left out.
+            params = {key: value for key, value in params.items() if value is not None}
+        fields["params"] = params
+    if command_type is not None:
+        fields["type"] = EvgCommandType(command_type).value
+    # Constructing without validation keeps the params instead of copying them.
+    return BuiltInCommand.model_construct(**fields)
+
+
+def _v3_command_from_v2(command: ShrubCommand, cache: _CommandCache) -> EvgCommand:
+    """Convert a v2 command to a v3 command."""
+    converted = cache.get(id(command))
+    if converted is None:
+        if isinstance(command, V2FunctionCall):
+            fields: Dict[str, Any] = {"func": command.name}
+            if command.parameters:
+                fields["vars"] = command.parameters
+            converted = FunctionCall.model_construct(**fields)
+        elif isinstance(command, V2BuiltInCommand):
+            command_type = command.command_type.value if command.command_type else None
+            converted = _v3_built_in(command.command, command.params, command_type)
+        else:
+            raise ValueError(f"Unsupported command: {command!r}")
+        cache[id(command)] = converted
+    return converted
+
+
+def _v3_commands_from_v2(
+    commands: Optional[Sequence[ShrubCommand]], cache: _CommandCache
+) -> Optional[List[EvgCommand]]:
+    """Convert a list of v2 commands to v3 commands, None if there are no commands."""
+    if not commands:
+        return None
+    return [_v3_command_from_v2(command, cache) for command in commands]
+
+
+def _v3_task_from_v2(task: V2Task, cache: _CommandCache) -> EvgTask:
+    """Convert a v2 task to a v3 task."""
+    fields: Dict[str, Any] = {
+        "name": task.name,
+        "commands": [_v3_command_from_v2(command, cache) for command in task.commands],
+    }
+    if task.dependencies:
+        fields["depends_on"] = [
+            EvgTaskDependency(**dependency.as_dict()) for dependency in task.dependencies
+        ]
+    return EvgTask(**fields)
+
+
+def _v3_task_group_from_v2(group: V2TaskGroup, cache: _CommandCache) -> EvgTaskGroup:
+    """Convert a v2 task group to a v3 task group."""
+    fields: Dict[str, Any] = {
+        "name": group.name,
+        "tasks": sorted(task.name for task in group.tasks),
+    }
+    fields.update(
+        existing_items(
+            ("max_hosts", group.max_hosts),
+            ("setup_group", _v3_commands_from_v2(group.setup_group, cache)),
+            ("setup_task", _v3_commands_from_v2(group.setup_task, cache)),
+            ("teardown_group", _v3_commands_from_v2(group.teardown_group, cache)),
+            ("teardown_task", _v3_commands_from_v2(group.teardown_task, cache)),
+            ("setup_group_can_fail_task", group.setup_group_can_fail_task),
+            ("setup_group_timeout_secs", group.setup_group_timeout_secs),
+        )
+    )
+    return EvgTaskGroup(**fields)
+
+
+def _v3_variant_from_v2(variant: V2BuildVariant) -> BuildVariant:
+    """Convert a v2 build variant to a v3 build variant."""
+    fields: Dict[str, Any] = {}
+    for key, value in variant.iter_items():
+        if key == "tasks":
+            value = [_build(EvgTaskRef, spec, "task spec") for spec in value]
+        elif key == "display_tasks":
+            value = [DisplayTask(**display_task) for display_task in value]
+        fields[V2_VARIANT_RENAMES.get(key, key)] = value
+    return _build(BuildVariant, fields, "build variant")
+
+
+def shrub_project_to_evg_project(project: ShrubProject) -> EvgProject:
+    """
+    Convert a v2 shrub project to a v3 evergreen project.
+
+    :param project: Shrub project to convert.
+    :return: Evergreen project describing the same configuration.
+    """
+    cache: _CommandCache = {}
+    by_name = attrgetter("name")
+    fields: Dict[str, Any] = {
+        "buildvariants": [
+            _v3_variant_from_v2(variant) for variant in sorted(project.build_variants, key=by_name)
+        ],
+        "tasks": [
+            _v3_task_from_v2(task, cache) for task in sorted(project.all_tasks(), key=by_name)
+        ],
+    }
+    task_groups = project.all_task_groups()
+    if task_groups:
+        fields["task_groups"] = [
+            _v3_task_group_from_v2(group, cache) for group in sorted(task_groups, key=by_name)
+        ]
+    return EvgProject(**fields)
+
+
+def _v2_command_from_v3(command: EvgCommand, cache: _CommandCache) -> ShrubCommand:
+    """Convert a v3 command to a v2 command."""
+    converted = cache.get(id(command))
+    if converted is None:
+        fields = _model_fields(command)
+        if isinstance(command, FunctionCall):
+            check_keys(fields, V2_FUNCTION_CALL_FIELDS, "function call")
+            converted = V2FunctionCall(command.func, command.vars)
+        else:
+            check_keys(fields, BUILT_IN_COMMAND_FIELDS, "command")
+            converted = V2BuiltInCommand(command.command, command.params or {})
+            if command.type is not None:
+                converted.set_type(CommandType(command.type))
+        cache[id(command)] = converted
+    return converted
+
+
+def _v2_commands_from_v3(
+    commands: Optional[Sequence[EvgCommand]], cache: _CommandCache
+) -> Optional[List[ShrubCommand]]:
+    """Convert a list of v3 commands to v2 commands, None if there are no commands."""
+    if not commands:
+        return None
+    return [_v2_command_from_v3(command, cache) for command in commands]
+
+
+def _v2_task_from_v3(task: EvgTask, cache: _CommandCache) -> V2Task:
+    """Convert a v3 task to a v2 task."""
+    check_keys(_model_fields(task), V2_TASK_FIELDS, "task")
+    dependencies = set()
+    for dependency in task.depends_on or []:
+        check_keys(_model_fields(dependency), V2_DEPENDENCY_FIELDS, "dependency")
+        dependencies.add(V2TaskDependency(dependency.name, dependency.variant))
+    return V2Task(task.name, _v2_commands_from_v3(task.commands, cache) or [], dependencies)
+
+
+def _v2_task_group_from_v3(
+    group: EvgTaskGroup, tasks: Mapping[str, V2Task], cache: _CommandCache
+) -> V2TaskGroup:
+    """Convert a v3 task group to a v2 task group."""
+    check_keys(_model_fields(group), TASK_GROUP_KEYS, "task group")
+    missing = [name for name in group.tasks if name not in tasks]
+    if missing:
+        raise ValueError(f"Task group '{group.name}' contains undefined tasks: {missing}")
+    return V2TaskGroup(
+        group.name,
+        [tasks[name] for name in group.tasks],
+        max_hosts=group.max_hosts,
+        setup_group=_v2_commands_from_v3(group.setup_group, cache),
+        setup_task=_v2_commands_from_v3(group.setup_task, cache),
+        teardown_group=_v2_commands_from_v3(group.teardown_group, cache),
+        teardown_task=_v2_commands_from_v3(group.teardown_task, cache),
+        setup_group_can_fail_task=group.setup_group_can_fail_task,
+        setup_group_timeout_secs=group.setup_group_timeout_secs,
+    )
+
+
+def _v2_variant_from_v3(
+    variant: BuildVariant, tasks: Mapping[str, V2Task], task_groups: Mapping[str, V2TaskGroup]
+) -> V2BuildVariant:
+    """Convert a v3 build variant to a v2 build variant."""
+    # Only the small variant header is described by a dictionary, values are shared.
+    obj = {V3_VARIANT_RENAMES.get(key, key): value for key, value in _model_fields(variant).items()}
+    obj["tasks"] = [_model_fields(ref) for ref in variant.tasks]
+    if variant.display_tasks:
+        obj["display_tasks"] = [_model_fields(display) for display in variant.display_tasks]
+    return V2BuildVariant.from_dict(obj, tasks, task_groups)
+
+
+def evg_project_to_shrub_project(project: EvgProject) -> ShrubProject:
+    """
+    Convert a v3 evergreen project to a v2 shrub project.
+
+    :param project: Evergreen project to convert.
+    :return: Shrub project describing the same configuration.
+    """
+    check_keys(_model_fields(project), V2_PROJECT_FIELDS, "project")
+    cache: _CommandCache = {}
+    tasks = {task.name: _v2_task_from_v3(task, cache) for task in project.tasks or []}
+    task_groups = {
+        group.name: _v2_task_group_from_v3(group, tasks, cache)
+        for group in project.task_groups or []
+    }
+    variants = [
+        _v2_variant_from_v3(variant, tasks, task_groups) for variant in project.buildvariants or []
+    ]
+    return ShrubProject._from_parts(variants, tasks, task_groups)
+
+
+def _legacy_fields(builder: Any) -> Dict[str, Any]:
+    """Get the defined fields of a legacy builder by their yaml names, without converting them."""
+    fields = {}
+    for attribute, spec in builder._yaml_map().items():
+        value = getattr(builder, attribute)
+        if value is not None and value != [] and value != {}:
+            fields[spec[NAME_KEY]] = value
+    return fields
+
+
+def _set_legacy_fields(builder: Any, fields: Dict[str, Any], kind: str) -> Any:
+    """Set the fields of a legacy builder by their yaml names."""
+    attributes = {spec[NAME_KEY]: attribute for attribute, spec in builder._yaml_map().items()}
+    check_keys(fields, attributes.keys(), kind)
+    for name, value in fields.items():
+        setattr(builder, attributes[name], value)
+    return builder
+
+
+def _v3_command_from_legacy(command: CommandDefinition, cache: _CommandCache) -> EvgCommand:
+    """Convert a legacy command to a v3 command."""
+    converted = cache.get(id(command))
+    if converted is None:
+        fields = _legacy_fields(command)
+        if "func" in fields:
+            check_keys(fields, FUNCTION_CALL_FIELDS, "function call")
+            converted = FunctionCall.model_construct(**fields)
+        else:
+            check_keys(fields, BUILT_IN_COMMAND_FIELDS, "command")
+            converted = _v3_built_in(fields["command"], fields.get("params"), fields.get("type"))
+        cache[id(command)] = converted
+    return converted
+
+
+def _v3_commands_from_legacy(sequence: CommandSequence, cache: _CommandCache) -> List[EvgCommand]:
+    """Convert a legacy command sequence to a list of v3 commands."""
+    return [_v3_command_from_legacy(command, cache) for command in sequence._cmd_seq]
+
+
+def _v3_task_from_legacy(task: LegacyTask, cache: _CommandCache) -> EvgTask:
+    """Convert a legacy task to a v3 task."""
+    fields = _legacy_fields(task)
+    if "commands" in fields:
+        fields["commands"] = _v3_commands_from_legacy(fields["commands"], cache)
+    if "depends_on" in fields:
+        fields["depends_on"] = [
+            _build(EvgTaskDependency, _legacy_fields(dependency), "dependency")
+            for dependency in fields["depends_on"]
+        ]
+    return _build(EvgTask, fields, "task")
+
+
+def _v3_task_group_from_legacy(group: LegacyTaskGroup, cache: _CommandCache) -> EvgTaskGroup:
+    """Convert a legacy task group to a v3 task group."""
+    fields = _legacy_fields(group)
+    for key in ["setup_group", "setup_task", "teardown_group", "teardown_task"]:
+        if key in fields:
+            fields[key] = _v3_commands_from_legacy(fields[key], cache)
+    return _build(EvgTaskGroup, fields, "task group", unsupported={TIMEOUT})
+
+
+def _v3_variant_from_legacy(variant: Variant) -> BuildVariant:
+    """Convert a legacy build variant to a v3 build variant."""
+    fields = _legacy_fields(variant)
+    fields["tasks"] = [
+        _build(EvgTaskRef, _legacy_fields(spec), "task spec") for spec in fields.get("tasks", [])
+    ]
+    if "display_tasks" in fields:
+        fields["display_tasks"] = [
+            _build(DisplayTask, _legacy_fields(display_task), "display task")
+            for display_task in fields["display_tasks"]
+        ]
+    return _build(BuildVariant, fields, "build variant")
+
+
+def configuration_to_evg_project(config: "Configuration") -> EvgProject:
+    """
+    Convert a legacy configuration to a v3 evergreen project.
+
+    :param config: Legacy configuration to convert.
+    :return: Evergreen project describing the same configuration.
+    """
+    cache: _CommandCache = {}
+    fields = _legacy_fields(config)
+    converters = {
+        "tasks": lambda tasks: [_v3_task_from_legacy(task, cache) for task in tasks],
+        "task_groups": lambda groups: [_v3_task_group_from_legacy(g, cache) for g in groups],
+        "buildvariants": lambda variants: [_v3_variant_from_legacy(v) for v in variants],
+        "pre": lambda sequence: _v3_commands_from_legacy(sequence, cache),
+        "post": lambda sequence: _v3_commands_from_legacy(sequence, cache),
+    }
+    for key, convert in converters.items():
+        if key in fields:
+            fields[key] = convert(fields[key])
+    if config._functions:
+        fields["functions"] = {
+            name: _v3_commands_from_legacy(sequence, cache)
+            for name, sequence in config._functions.items()
+        }
+    return _build(EvgProject, fields, "configuration", unsupported={TIMEOUT})
+
+
+def _legacy_command_from_v3(command: EvgCommand, cache: _CommandCache) -> CommandDefinition:
+    """Convert a v3 command to a legacy command."""
+    converted = cache.get(id(command))
+    if converted is None:
+        fields = _model_fields(command)
+        if not isinstance(command, FunctionCall):
+            check_keys(fields, BUILT_IN_COMMAND_FIELDS, "command")
+        converted = _set_legacy_fields(CommandDefinition(), fields, "command")
+        cache[id(command)] = converted
+    return converted
+
+
+def _legacy_sequence_from_v3(
+    commands: Union[EvgCommand, Sequence[EvgCommand]], cache: _CommandCache
+) -> CommandSequence:
+    """Convert v3 commands to a legacy command sequence."""
+    if isinstance(commands, BaseModel):
+        commands = [commands]
+    return CommandSequence().extend(
+        [_legacy_command_from_v3(command, cache) for command in commands]
+    )
+
+
+def _legacy_task_from_v3(task: EvgTask, cache: _CommandCache) -> LegacyTask:
+    """Convert a v3 task to a legacy task."""
+    fields = _model_fields(task)
+    if "commands" in fields:
+        fields["commands"] = _legacy_sequence_from_v3(fields["commands"], cache)
+    if "depends_on" in fields:
+        fields["depends_on"] = [
+            _set_legacy_fields(
+                LegacyTaskDependency(dependency.name), _model_fields(dependency), "dependency"
+            )
+            for dependency in fields["depends_on"]
+        ]
+    return _set_legacy_fields(LegacyTask(task.name), fields, "task")
+
+
+def _legacy_task_group_from_v3(group: EvgTaskGroup, cache: _CommandCache) -> LegacyTaskGroup:
+    """Convert a v3 task group to a legacy task group."""
+    fields = _model_fields(group)
+    if TIMEOUT in fields:
+        raise ValueError(f"Unsupported task group keys: ['{TIMEOUT}']")
+    for key in ["setup_group", "setup_task", "teardown_group", "teardown_task"]:
+        if key in fields:
+            fields[key] = _legacy_sequence_from_v3(fields[key], cache)
+    return _set_legacy_fields(LegacyTaskGroup(group.name), fields, "task group")
+
+
+def _legacy_variant_from_v3(variant: BuildVariant) -> Variant:
+    """Convert a v3 build variant to a legacy build variant."""
+    fields = _model_fields(variant)
+    fields["tasks"] = [
+        _set_legacy_fields(TaskSpec(ref.name), _model_fields(ref), "task spec")
+        for ref in variant.tasks
+    ]
+    if "display_tasks" in fields:
+        fields["display_tasks"] = [
+            _set_legacy_fields(
+                DisplayTaskDefinition(display.name), _model_fields(display), "display task"
+            )
+            for display in fields["display_tasks"]
+        ]
+    return _set_legacy_fields(Variant(variant.name), fields, "build variant")
+
+
+def evg_project_to_configuration(project: EvgProject) -> "Configuration":
+    """
+    Convert a v3 evergreen project to a legacy configuration.
+
+    :param project: Evergreen project to convert.
+    :return: Legacy configuration describing the same configuration.
+    """
+    from shrub.config import Configuration
+
+    cache: _CommandCache = {}
+    fields = _model_fields(project)
+    if TIMEOUT in fields:
+        raise ValueError(f"Unsupported project keys: ['{TIMEOUT}']")
+    functions = fields.pop("functions", {})
+    converters = {
+        "tasks": lambda tasks: [_legacy_task_from_v3(task, cache) for task in tasks],
+        "task_groups": lambda groups: [_legacy_task_group_from_v3(g, cache) for g in groups],
+        "buildvariants": lambda variants: [_legacy_variant_from_v3(v) for v in variants],
+        "pre": lambda commands: _legacy_sequence_from_v3(commands, cache),
+        "post": lambda commands: _legacy_sequence_from_v3(commands, cache),
+    }
+    for key, convert in converters.items():
+        if key in fields:
+            fields[key] = convert(fields[key])
+
+    config = _set_legacy_fields(Configuration(), fields, "project")
+    for name, commands in functions.items():
+        config._functions[name] = _legacy_sequence_from_v3(commands, cache)
+    return config
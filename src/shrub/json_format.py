@@ -0,0 +1,124 @@
+"""Formatting of configurations as json, shared by every generation of the shrub API."""
+import importlib
+import importlib.util
+import json
+from typing import Any, Callable, Dict, List
+
+# Indentation of readable json.
+INDENT = 4
+# Separators of compact json, without any whitespace.
+COMPACT_SEPARATORS = (",", ":")
+
+STDLIB = "json"
+ORJSON = "orjson"
+
+# orjson is slow to import, so it is only imported once it is selected as the backend.
+orjson: Any = None
+
+# Encodes a python object to compact json, with sorted keys if requested.
+JsonEncoder = Callable[[Any, bool], bytes]
+
+
+def _stdlib_encode(obj: Any, sort_keys: bool) -> bytes:
+    """Encode the given object with the json module."""
+    return json.dumps(
+        obj, separators=COMPACT_SEPARATORS, sort_keys=sort_keys, ensure_ascii=False
+    ).encode()
+
+
+def _orjson_encode(obj: Any, sort_keys: bool) -> bytes:
+    """
+    Encode the given object with orjson.
+
+    Objects orjson rejects, such as dictionaries with keys that are not strings or integers that
+    do not fit in 64 bits, are encoded with the json module instead.
+    """
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    except TypeError:
+        return _stdlib_encode(obj, sort_keys)
+
+
+_BACKENDS: Dict[str, JsonEncoder] = {STDLIB: _stdlib_encode}
+if importlib.util.find_spec(ORJSON) is not None:
+    _BACKENDS[ORJSON] = _orjson_encode
+# Other backends are opt-in, since their output can differ from the json module, e.g. orjson
+# writes floats like 1e+16 as 1e16 and NaN as null.
+_backend = STDLIB
+
+
+def available_backends() -> List[str]:
+    """
+    Get the names of the json backends that can be used.
+
+    :return: Names of available backends.
+    """
+    return list(_BACKENDS)
+
+
+def register_backend(name: str, encoder: JsonEncoder) -> None:
+    """
+    Register a json backend.
+
+    :param name: Name of backend.
+    :param encoder: Function encoding a python object to compact json bytes.
+    """
+    _BACKENDS[name] = encoder
+
+
+def get_backend() -> str:
+    """
+    Get the name of the json backend used for compact json.
+
+    :return: Name of backend.
+    """
+    return _backend
+
+
+def set_backend(name: str = STDLIB) -> None:
+    """
+    Set the json backend used for compact json.
+
+    :param name: Name of backend, the json module if not given.
+    """
+    global _backend, orjson
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown json backend '{name}', available: {available_backends()}")
+    if name == ORJSON and orjson is None:
+        orjson = importlib.import_module(ORJSON)
+    _backend = name
+
+
+def dumpb(obj: Any, compact: bool = False, sort_keys: bool = False) -> bytes:
+    """
+    Convert the given python object to utf-8 encoded json.
+
+    Compact json is encoded by the current backend directly to bytes, without an intermediate
+    string when the backend supports it.
+
+    :param obj: Python object to convert.
+    :param compact: Leave out all whitespace instead of indenting the json.
+    :param sort_keys: Sort the keys of objects, so equal configurations give identical json.
+    :return: JSON version of object.
+    """
+    if compact:
+        return _BACKENDS[_backend](obj, sort_keys)
+    return dumps(obj, sort_keys=sort_keys).encode()
+
+
+def dumps(obj: Any, compact: bool = False, sort_keys: bool = False) -> str:
+    """
+    Convert the given python object to json.
+
+    Compact json has no whitespace and leaves non-ascii characters as is, which is also how
+    pydantic models are converted to json. It is encoded by the current backend, the json module
+    unless another backend was set. Indented json is always encoded by the json module.
+
+    :param obj: Python object to convert.
+    :param compact: Leave out all whitespace instead of indenting the json.
+    :param sort_keys: Sort the keys of objects, so equal configurations give identical json.
+    :return: JSON version of object.
+    """
+    if compact:
+        return _BACKENDS[_backend](obj, sort_keys).decode()
+    return json.dumps(obj, indent=INDENT, sort_keys=sort_keys)
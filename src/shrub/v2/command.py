@@ -3,10 +3,13 @@ from abc import ABC, abstractmethod
 from enum import Enum
 from typing import Any, Dict, Optional, Sequence, Union
 
-from shrub.v2.dict_creation_util import add_if_exists, add_existing_from_dict
+from shrub.v2.dict_creation_util import add_if_exists, add_existing_from_dict, check_keys
 
 TimeoutType = Union[int, str]  # A timeout can an int or expansion.
 
+FUNCTION_CALL_KEYS = frozenset({"func", "vars"})
+BUILT_IN_COMMAND_KEYS = frozenset({"command", "params", "type"})
+
 
 class ScriptingHarness(Enum):
     """Scripting harness to use for subprocess.scripting."""
@@ -63,6 +66,17 @@ class FunctionCall(ShrubCommand):
 
         return add_if_exists(obj, "vars", self.parameters)
 
+    @classmethod
+    def from_dict(cls, obj: Dict[str, Any]) -> "FunctionCall":
+        """
+        Create a function call from its dictionary representation.
+
+        :param obj: Dictionary representing function call.
+        :return: Function call.
+        """
+        check_keys(obj, FUNCTION_CALL_KEYS, "function call")
+        return cls(obj["func"], obj.get("vars"))
+
 
 class BuiltInCommand(ShrubCommand):
     """Base object for Evergreen's built in commands."""
@@ -103,6 +117,32 @@ class BuiltInCommand(ShrubCommand):
 
         return obj
 
+    @classmethod
+    def from_dict(cls, obj: Dict[str, Any]) -> "BuiltInCommand":
+        """
+        Create a command from its dictionary representation.
+
+        :param obj: Dictionary representing command.
+        :return: Command.
+        """
+        check_keys(obj, BUILT_IN_COMMAND_KEYS, "command")
+        command = cls(obj["command"], obj.get("params") or {})
+        if "type" in obj:
+            command.set_type(CommandType(obj["type"]))
+        return command
+
+
+def command_from_dict(obj: Dict[str, Any]) -> ShrubCommand:
+    """
+    Create a function call or built-in command from its dictionary representation.
+
+    :param obj: Dictionary representing command.
+    :return: Command.
+    """
+    if "func" in obj:
+        return FunctionCall.from_dict(obj)
+    return BuiltInCommand.from_dict(obj)
+
 
 def archive_tarfz_extract(
     path: str, destination: str, exclude_files: Optional[str]
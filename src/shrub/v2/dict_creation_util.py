@@ -1,5 +1,5 @@
 """Utilities for working with dictionaries."""
-from typing import Any, Dict, Optional, Sized
+from typing import AbstractSet, Any, Dict, Iterator, Optional, Sized, Tuple
 
 
 def add_if_exists(obj: Dict[str, Any], key_name: str, key_value: Optional[Any]) -> Dict[str, Any]:
@@ -11,13 +11,27 @@ def add_if_exists(obj: Dict[str, Any], key_name: str, key_value: Optional[Any])
     :param key_value: Value to add.
     :return: Updated dictionary.
     """
-    is_empty_list = isinstance(key_value, Sized) and len(key_value) == 0
-    if key_value is not None and not is_empty_list:
+    if _exists(key_value):
         obj[key_name] = key_value
 
     return obj
 
 
+def _exists(value: Optional[Any]) -> bool:
+    """Determine if the given value is neither None nor empty."""
+    return value is not None and not (isinstance(value, Sized) and len(value) == 0)
+
+
+def existing_items(*items: Tuple[str, Optional[Any]]) -> Iterator[Tuple[str, Any]]:
+    """
+    Filter the given key/value pairs to the ones with a value that is neither None nor empty.
+
+    :param items: Key/value pairs to filter.
+    :return: Iterator over existing key/value pairs.
+    """
+    return ((key, value) for key, value in items if _exists(value))
+
+
 def add_existing_from_dict(obj: Dict[str, Any], values: Dict[str, Optional[Any]]) -> Dict[str, Any]:
     """
     For each value, add the value to the given dictionary if it is not None.
@@ -26,7 +40,19 @@ def add_existing_from_dict(obj: Dict[str, Any], values: Dict[str, Optional[Any]]
     :param values: Dictionary of values to add.
     :return: Updated dictionary.
     """
-    for k, v in values.items():
-        add_if_exists(obj, k, v)
+    obj.update(existing_items(*values.items()))
 
     return obj
+
+
+def check_keys(obj: Dict[str, Any], known_keys: AbstractSet[str], kind: str) -> None:
+    """
+    Check the given dictionary only has keys that can be represented.
+
+    :param obj: Dictionary to check.
+    :param known_keys: Keys that can be represented.
+    :param kind: Kind of object the dictionary describes, for error messages.
+    """
+    unknown = obj.keys() - known_keys
+    if unknown:
+        raise ValueError(f"Unsupported {kind} keys: {sorted(unknown)}")
@@ -1,12 +1,23 @@
 """Top-level container for shrub configuration."""
-import json
-from typing import Any, Dict, Optional, Set
-
-import yaml
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Mapping, Optional, Set
 
+from shrub.v2.dict_creation_util import check_keys
 from shrub.v2.variant import BuildVariant
 from shrub.v2.task import Task, TaskGroup
-from shrub.v2.dict_creation_util import add_if_exists
+from shrub.v2.serialization import (
+    DEFAULT_CHUNK_SIZE,
+    Items,
+    iter_json,
+    iter_json_bytes,
+    iter_yaml,
+    materialize,
+)
+
+if TYPE_CHECKING:
+    from shrub.v3.evg_project import EvgProject
+
+PROJECT_KEYS = frozenset({"buildvariants", "tasks", "task_groups"})
 
 
 class ShrubProject(object):
@@ -25,6 +36,88 @@ class ShrubProject(object):
         """Create an empty shrub project."""
         return cls()
 
+    @classmethod
+    def from_dict(cls, obj: Dict[str, Any]) -> "ShrubProject":
+        """
+        Create a project from its dictionary representation, such as a previously generated one.
+
+        Only configuration that can be represented by a project is supported: every task and task
+        group must be run by a build variant.
+
+        :param obj: Dictionary representing project.
+        :return: Shrub project.
+        """
+        check_keys(obj, PROJECT_KEYS, "project")
+        tasks = {task["name"]: Task.from_dict(task) for task in obj.get("tasks") or []}
+        task_groups = {
+            group["name"]: TaskGroup.from_dict(group, tasks)
+            for group in obj.get("task_groups") or []
+        }
+        variants = [
+            BuildVariant.from_dict(bv, tasks, task_groups) for bv in obj.get("buildvariants") or []
+        ]
+        return cls._from_parts(variants, tasks, task_groups)
+
+    @classmethod
+    def _from_parts(
+        cls,
+        build_variants: Iterable[BuildVariant],
+        tasks: Mapping[str, Task],
+        task_groups: Mapping[str, TaskGroup],
+    ) -> "ShrubProject":
+        """
+        Create a project from loaded build variants, checking every task and task group is run.
+
+        :param build_variants: Build variants of project.
+        :param tasks: Tasks loaded, by name.
+        :param task_groups: Task groups loaded, by name.
+        :return: Shrub project.
+        """
+        project = cls(set(build_variants))
+        unused = (tasks.keys() - {task.name for task in project.all_tasks()}) | (
+            task_groups.keys() - {group.name for group in project.all_task_groups()}
+        )
+        if unused:
+            raise ValueError(f"Tasks not run by any build variant: {sorted(unused)}")
+        return project
+
+    @classmethod
+    def from_file(cls, file_location: str) -> "ShrubProject":
+        """
+        Read a project from the given yaml or json file.
+
+        Files ending in `.gz` or `.zst` are decompressed while they are read. Yaml is parsed with
+        the libyaml bindings when available.
+
+        :param file_location: Path of file.
+        :return: Shrub project.
+        """
+        from shrub.compressed_io import load_file
+
+        return cls.from_dict(load_file(file_location))
+
+    @classmethod
+    def from_evg_project(cls, project: "EvgProject") -> "ShrubProject":
+        """
+        Convert a v3 evergreen project to a shrub project, sharing the parameters of commands.
+
+        :param project: Evergreen project to convert.
+        :return: Shrub project.
+        """
+        from shrub.conversion import evg_project_to_shrub_project
+
+        return evg_project_to_shrub_project(project)
+
+    def to_evg_project(self) -> "EvgProject":
+        """
+        Convert this project to a v3 evergreen project, sharing the parameters of commands.
+
+        :return: Evergreen project describing this project.
+        """
+        from shrub.conversion import shrub_project_to_evg_project
+
+        return shrub_project_to_evg_project(self)
+
     def add_build_variant(self, variant: BuildVariant) -> "ShrubProject":
         """
         Add the given build variant configuration to this project.
@@ -51,29 +144,119 @@ class ShrubProject(object):
         """
         return {tg for bv in self.build_variants for tg in bv.task_groups}
 
+    def iter_items(self) -> Items:
+        """Generate the key/value pairs of the dictionary representation of this project."""
+        by_name = attrgetter("name")
+        yield "buildvariants", iter(sorted(self.build_variants, key=by_name))
+        yield "tasks", iter(sorted(self.all_tasks(), key=by_name))
+        task_groups = self.all_task_groups()
+        if task_groups:
+            yield "task_groups", iter(sorted(task_groups, key=by_name))
+
     def as_dict(self) -> Dict[str, Any]:
         """
         Convert this project configuration to a dictionary.
 
         :return: Dictionary of project configuration.
         """
-        obj = {
-            "buildvariants": [bv.as_dict() for bv in self.build_variants],
-            "tasks": sorted([task.as_dict() for task in self.all_tasks()], key=lambda t: t["name"]),
-        }
+        return materialize(self)
 
-        add_if_exists(
-            obj,
-            "task_groups",
-            sorted([tg.as_dict() for tg in self.all_task_groups()], key=lambda tg: tg["name"]),
-        )
+    def iter_json(self, compact: bool = False, sort_keys: bool = False) -> Iterator[str]:
+        """
+        Generate the json version of this project one piece at a time.
 
-        return obj
+        Each task and build variant is converted as it is written, without building the
+        dictionary of the whole project.
+
+        :param compact: Leave out all whitespace instead of indenting the json.
+        :param sort_keys: Sort the keys of objects, so equal projects give identical json.
+        :return: Iterator over pieces of the json version of this project.
+        """
+        return iter_json(self, compact=compact, sort_keys=sort_keys)
+
+    def json(self, compact: bool = False, sort_keys: bool = False) -> str:
+        """
+        Get the json version of this project.
 
-    def json(self) -> str:
-        """Get the json version of this project."""
-        return json.dumps(self.as_dict(), indent=4)
+        :param compact: Leave out all whitespace instead of indenting the json.
+        :param sort_keys: Sort the keys of objects, so equal projects give identical json.
+        :return: JSON version of this project.
+        """
+        return "".join(self.iter_json(compact=compact, sort_keys=sort_keys))
+
+    def json_bytes(self, compact: bool = False, sort_keys: bool = False) -> bytes:
+        """
+        Get the utf-8 encoded json version of this project, ready to be written to a file.
+
+        Compact json of each task and build variant is encoded directly to bytes by the json
+        backend, see `shrub.json_format.set_backend`.
+
+        :param compact: Leave out all whitespace instead of indenting the json.
+        :param sort_keys: Sort the keys of objects, so equal projects give identical json.
+        :return: JSON version of this project.
+        """
+        return b"".join(iter_json_bytes(self, compact=compact, sort_keys=sort_keys))
+
+    def iter_yaml(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+        """
+        Generate the yaml version of this project one chunk of tasks or variants at a time.
+
+        :param chunk_size: Number of tasks or variants to convert at a time.
+        :return: Iterator over pieces of the yaml version of this project.
+        """
+        return iter_yaml(self, chunk_size=chunk_size)
 
     def yaml(self) -> str:
         """Get the yaml version of this project."""
+        import yaml
+
         return yaml.dump(self.as_dict())
+
+    def write_json(
+        self,
+        file_location: str,
+        compact: bool = False,
+        sort_keys: bool = False,
+        compression_level: Optional[int] = None,
+    ) -> None:
+        """
+        Write the json version of this project to a file, one piece at a time.
+
+        Files ending in `.gz` or `.zst` are compressed in a background thread.
+
+        :param file_location: Path of file to write.
+        :param compact: Leave out all whitespace instead of indenting the json.
+        :param sort_keys: Sort the keys of objects, so equal projects give identical json.
+        :param compression_level: Level of compression, a fast default if not given.
+        """
+        self.__write(
+            self.iter_json(compact=compact, sort_keys=sort_keys), file_location, compression_level
+        )
+
+    def write_yaml(
+        self,
+        file_location: str,
+        compression_level: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        """
+        Write the yaml version of this project to a file, one chunk of tasks or variants at a time.
+
+        Files ending in `.gz` or `.zst` are compressed in a background thread.
+
+        :param file_location: Path of file to write.
+        :param compression_level: Level of compression, a fast default if not given.
+        :param chunk_size: Number of tasks or variants to convert at a time.
+        """
+        self.__write(self.iter_yaml(chunk_size=chunk_size), file_location, compression_level)
+
+    @staticmethod
+    def __write(
+        pieces: Iterator[str], file_location: str, compression_level: Optional[int]
+    ) -> None:
+        """Write the given pieces of text to a file."""
+        from shrub.compressed_io import CompressedWriter
+
+        with CompressedWriter(file_location, level=compression_level) as writer:
+            for piece in pieces:
+                writer.write(piece)
@@ -0,0 +1,161 @@
+"""
+Streaming serialization of shrub configurations.
+
+Configuration objects provide an `iter_items` method yielding the key/value pairs of their
+dictionary representation. Values are plain python values, other configuration objects, or
+iterators of values for lists, so nothing is built before it is written. Plain dictionaries and
+lists never contain configuration objects or iterators.
+"""
+from collections.abc import Iterator as IteratorABC
+from itertools import count, islice
+from typing import Any, Callable, Iterable, Iterator, Tuple, Union, cast
+
+from shrub.json_format import INDENT, dumpb, dumps
+
+# Items of a section of a project dumped to yaml at a time.
+DEFAULT_CHUNK_SIZE = 100
+# Levels of nesting streamed to json, deeper values are materialized and converted at once.
+STREAMED_LEVELS = 2
+
+# Key/value pairs of a configuration object.
+Items = Iterator[Tuple[str, Any]]
+
+
+def _is_mapping(value: Any) -> bool:
+    """Determine if the given value is a configuration object streaming its items."""
+    return hasattr(value, "iter_items")
+
+
+def materialize(value: Any) -> Any:
+    """
+    Build the plain python version of the given value.
+
+    :param value: Configuration object, iterator of values or plain value.
+    :return: Dictionary, list or plain value.
+    """
+    if _is_mapping(value):
+        return {key: materialize(item) for key, item in value.iter_items()}
+    if isinstance(value, IteratorABC):
+        return [materialize(item) for item in value]
+    return value
+
+
+def iter_json(value: Any, compact: bool = False, sort_keys: bool = False) -> Iterator[str]:
+    """
+    Generate the json of the given value one piece at a time.
+
+    The top-level object and its lists are streamed, every item of the lists, such as a task or
+    build variant, is materialized and converted on its own. The pieces join to the same json as
+    converting the materialized value with `shrub.json_format.dumps`.
+
+    :param value: Configuration object, iterator of values or plain value.
+    :param compact: Leave out all whitespace instead of indenting the json.
+    :param sort_keys: Sort the keys of objects, so equal configurations give identical json.
+    :return: Iterator over pieces of json.
+    """
+    # Every piece is a string when values are dumped to strings.
+    return cast(Iterator[str], _iter_json(value, compact, sort_keys, 0, dumps))
+
+
+def iter_json_bytes(value: Any, compact: bool = False, sort_keys: bool = False) -> Iterator[bytes]:
+    """
+    Generate the utf-8 encoded json of the given value one piece at a time.
+
+    Works like `iter_json`, but compact json of items is encoded directly to bytes by the json
+    backend, see `shrub.json_format.dumpb`.
+
+    :param value: Configuration object, iterator of values or plain value.
+    :param compact: Leave out all whitespace instead of indenting the json.
+    :param sort_keys: Sort the keys of objects, so equal configurations give identical json.
+    :return: Iterator over pieces of json.
+    """
+    for piece in _iter_json(value, compact, sort_keys, 0, dumpb):
+        yield piece if isinstance(piece, bytes) else piece.encode()
+
+
+def _iter_json(
+    value: Any,
+    compact: bool,
+    sort_keys: bool,
+    level: int,
+    dump_compact: Callable[..., Union[str, bytes]],
+) -> Iterator[Union[str, bytes]]:
+    """
+    Generate the json of the given value, nested at the given level.
+
+    Compact json of values that are not streamed is created with the given dump function, every
+    other piece is a string.
+    """
+    is_mapping = _is_mapping(value)
+    if level >= STREAMED_LEVELS and (is_mapping or isinstance(value, IteratorABC)):
+        value = materialize(value)
+        is_mapping = False
+    if is_mapping:
+        items: Iterable[Any] = value.iter_items()
+        if sort_keys:
+            items = sorted(items, key=lambda item: item[0])
+        opening, closing = "{", "}"
+    elif isinstance(value, IteratorABC):
+        items = value
+        opening, closing = "[", "]"
+    elif compact:
+        yield dump_compact(value, compact=True, sort_keys=sort_keys)
+        return
+    else:
+        text = dumps(value, sort_keys=sort_keys)
+        if level:
+            # Strings in json never contain a newline, only indentation follows one.
+            text = text.replace("\n", "\n" + " " * (INDENT * level))
+        yield text
+        return
+
+    inner = "" if compact else "\n" + " " * (INDENT * (level + 1))
+    key_separator = ":" if compact else ": "
+    separator = opening
+    for item in items:
+        if is_mapping:
+            key, item = item
+            yield f"{separator}{inner}{dumps(key, compact=True)}{key_separator}"
+        else:
+            yield separator + inner
+        yield from _iter_json(item, compact, sort_keys, level + 1, dump_compact)
+        separator = ","
+    if separator == opening:
+        yield opening + closing
+    else:
+        yield ("" if compact else "\n" + " " * (INDENT * level)) + closing
+
+
+def iter_yaml(value: Any, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Generate the yaml of the given configuration object one chunk of items at a time.
+
+    Items of the top-level lists are materialized and dumped `chunk_size` at a time, so only one
+    chunk is ever built. The pieces join to the same yaml as dumping the materialized object,
+    except that values are only shared through anchors within a chunk.
+
+    :param value: Configuration object to convert.
+    :param chunk_size: Number of items of a list to dump at a time.
+    :return: Iterator over pieces of yaml.
+    """
+    import yaml
+
+    # Number anchors across chunks as when dumping the whole object at once.
+    anchor_ids = count(1)
+
+    class ChunkDumper(yaml.Dumper):
+        def generate_anchor(self, node: Any) -> str:
+            return self.ANCHOR_TEMPLATE % next(anchor_ids)
+
+    for key, section in sorted(value.iter_items(), key=lambda item: item[0]):
+        if not isinstance(section, IteratorABC):
+            yield yaml.dump({key: materialize(section)})
+            continue
+        chunk = [materialize(item) for item in islice(section, chunk_size)]
+        if not chunk:
+            yield yaml.dump({key: []})
+            continue
+        yield f"{key}:\n"
+        while chunk:
+            yield yaml.dump(chunk, Dumper=ChunkDumper)
+            chunk = [materialize(item) for item in islice(section, chunk_size)]
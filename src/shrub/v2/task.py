@@ -1,9 +1,36 @@
 """Configuration for tasks in evergreen."""
 from dataclasses import dataclass
-from typing import Any, Dict, Optional, Sequence, Set
-
-from shrub.v2.command import ShrubCommand
-from shrub.v2.dict_creation_util import add_if_exists, add_existing_from_dict
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Set
+
+from shrub.v2.command import ShrubCommand, command_from_dict
+from shrub.v2.dict_creation_util import add_if_exists, check_keys, existing_items
+from shrub.v2.serialization import Items, materialize
+
+DEPENDENCY_KEYS = frozenset({"name", "variant"})
+TASK_KEYS = frozenset({"name", "commands", "depends_on"})
+TASK_GROUP_KEYS = frozenset(
+    {
+        "name",
+        "tasks",
+        "max_hosts",
+        "setup_group",
+        "setup_task",
+        "teardown_group",
+        "teardown_task",
+        "setup_group_can_fail_task",
+        "setup_group_timeout_secs",
+    }
+)
+
+
+def _commands_from_list(cmd_list: Optional[Sequence[Dict[str, Any]]]) -> List[ShrubCommand]:
+    """
+    Create commands from their dictionary representations.
+
+    :param cmd_list: Dictionaries representing commands.
+    :return: List of commands.
+    """
+    return [command_from_dict(cmd) for cmd in cmd_list or []]
 
 
 @dataclass(frozen=True)
@@ -22,6 +49,17 @@ class TaskDependency(object):
 
         return obj
 
+    @classmethod
+    def from_dict(cls, obj: Dict[str, Any]) -> "TaskDependency":
+        """
+        Create a dependency from its dictionary representation.
+
+        :param obj: Dictionary representing dependency.
+        :return: Dependency.
+        """
+        check_keys(obj, DEPENDENCY_KEYS, "dependency")
+        return cls(obj["name"], obj.get("variant"))
+
 
 class RunnableTask(object):
     """A task that can be run by an Evergreen Build Variant."""
@@ -81,17 +119,31 @@ class Task(RunnableTask):
         self.dependencies.add(TaskDependency(task_name, build_variant))
         return self
 
+    def iter_items(self) -> Items:
+        """Generate the key/value pairs of the dictionary representation of this task."""
+        yield "name", self.name
+        yield "commands", (cmd.as_dict() for cmd in self.commands)
+        if self.dependencies:
+            yield "depends_on", (dep.as_dict() for dep in self.dependencies)
+
     def as_dict(self) -> Dict[str, Any]:
         """Get a dictionary representation of this task."""
-        obj = {
-            "name": self.name,
-            "commands": [cmd.as_dict() for cmd in self.commands],
-        }
+        return materialize(self)
 
-        if self.dependencies:
-            obj["depends_on"] = [dep.as_dict() for dep in self.dependencies]
+    @classmethod
+    def from_dict(cls, obj: Dict[str, Any]) -> "Task":
+        """
+        Create a task from its dictionary representation.
 
-        return obj
+        :param obj: Dictionary representing task.
+        :return: Task.
+        """
+        check_keys(obj, TASK_KEYS, "task")
+        return cls(
+            obj["name"],
+            _commands_from_list(obj.get("commands")),
+            {TaskDependency.from_dict(dep) for dep in obj.get("depends_on") or []},
+        )
 
 
 class TaskGroup(RunnableTask):
@@ -127,34 +179,61 @@ class TaskGroup(RunnableTask):
         self.setup_group_timeout_secs = setup_group_timeout_secs
 
     @staticmethod
-    def __cmd_list_as_dict(cmd_list: Optional[Sequence[ShrubCommand]]) -> Optional[Sequence[Dict]]:
+    def __cmd_list_items(
+        cmd_list: Optional[Sequence[ShrubCommand]],
+    ) -> Optional[Iterator[Dict[str, Any]]]:
         """
-        Convert a list of commands into a dictionary representation.
+        Generate the dictionary representations of a list of commands.
 
         :param cmd_list: List of commands to convert.
-        :return: Dictionary version of command list.
+        :return: Iterator over dictionary versions of commands, None if there are no commands.
         """
         if cmd_list:
-            return [c.as_dict() for c in cmd_list]
+            return (c.as_dict() for c in cmd_list)
         return None
 
+    def iter_items(self) -> Items:
+        """Generate the key/value pairs of the dictionary representation of this task group."""
+        yield "name", self.name
+        yield "tasks", sorted([task.name for task in self.tasks])
+        yield from existing_items(
+            ("max_hosts", self.max_hosts),
+            ("setup_group", self.__cmd_list_items(self.setup_group)),
+            ("setup_task", self.__cmd_list_items(self.setup_task)),
+            ("teardown_group", self.__cmd_list_items(self.teardown_group)),
+            ("teardown_task", self.__cmd_list_items(self.teardown_task)),
+            ("setup_group_can_fail_task", self.setup_group_can_fail_task),
+            ("setup_group_timeout_secs", self.setup_group_timeout_secs),
+        )
+
     def as_dict(self) -> Dict[str, Any]:
         """Get a dictionary representation of this task group."""
-        obj = {"name": self.name, "tasks": sorted([task.name for task in self.tasks])}
-        add_existing_from_dict(
-            obj,
-            {
-                "max_hosts": self.max_hosts,
-                "setup_group": self.__cmd_list_as_dict(self.setup_group),
-                "setup_task": self.__cmd_list_as_dict(self.setup_task),
-                "teardown_group": self.__cmd_list_as_dict(self.teardown_group),
-                "teardown_task": self.__cmd_list_as_dict(self.teardown_task),
-                "setup_group_can_fail_task": self.setup_group_can_fail_task,
-                "setup_group_timeout_secs": self.setup_group_timeout_secs,
-            },
-        )
+        return materialize(self)
 
-        return obj
+    @classmethod
+    def from_dict(cls, obj: Dict[str, Any], tasks: Mapping[str, Task]) -> "TaskGroup":
+        """
+        Create a task group from its dictionary representation.
+
+        :param obj: Dictionary representing task group.
+        :param tasks: Tasks the task group can contain, by name.
+        :return: Task group.
+        """
+        check_keys(obj, TASK_GROUP_KEYS, "task group")
+        missing = [name for name in obj.get("tasks") or [] if name not in tasks]
+        if missing:
+            raise ValueError(f"Task group '{obj['name']}' contains undefined tasks: {missing}")
+        return cls(
+            obj["name"],
+            [tasks[name] for name in obj.get("tasks") or []],
+            max_hosts=obj.get("max_hosts"),
+            setup_group=_commands_from_list(obj.get("setup_group")) or None,
+            setup_task=_commands_from_list(obj.get("setup_task")) or None,
+            teardown_group=_commands_from_list(obj.get("teardown_group")) or None,
+            teardown_task=_commands_from_list(obj.get("teardown_task")) or None,
+            setup_group_can_fail_task=obj.get("setup_group_can_fail_task"),
+            setup_group_timeout_secs=obj.get("setup_group_timeout_secs"),
+        )
 
 
 class ExistingTask(RunnableTask):
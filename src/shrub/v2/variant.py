@@ -1,10 +1,29 @@
 """Shrub configuration for an evergreen build variant."""
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from itertools import chain
-from typing import Any, Dict, Optional, Set, FrozenSet, Sequence, List
+from operator import attrgetter
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Set, FrozenSet, Sequence, List
 
 from shrub.v2.task import Task, TaskGroup, RunnableTask, ExistingTask
-from shrub.v2.dict_creation_util import add_existing_from_dict
+from shrub.v2.dict_creation_util import check_keys, existing_items
+from shrub.v2.serialization import Items, materialize
+
+BUILD_VARIANT_KEYS = frozenset(
+    {
+        "name",
+        "tasks",
+        "display_tasks",
+        "expansions",
+        "run_on",
+        "modules",
+        "display_name",
+        "batch_time",
+        "cron",
+        "activate",
+    }
+)
+TASK_SPEC_KEYS = frozenset({"name", "distros", "activate"})
+DISPLAY_TASK_KEYS = frozenset({"name", "execution_tasks"})
 
 
 @dataclass(frozen=True)
@@ -13,12 +32,19 @@ class _DisplayTask(object):
 
     display_name: str
     execution_tasks: FrozenSet[RunnableTask]
+    execution_task_names: List[str] = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # Execution tasks cannot change, so they only need to be sorted once.
+        object.__setattr__(
+            self, "execution_task_names", sorted(task.name for task in self.execution_tasks)
+        )
 
     def as_dict(self) -> Dict[str, Any]:
         """Get a dictionary of this display task."""
         return {
             "name": self.display_name,
-            "execution_tasks": sorted([task.name for task in self.execution_tasks]),
+            "execution_tasks": list(self.execution_task_names),
         }
 
 
@@ -57,6 +83,7 @@ class BuildVariant(object):
         self.task_groups: Set[TaskGroup] = set()
         self.existing_tasks: Set[ExistingTask] = set()
         self.display_tasks: Set[_DisplayTask] = set()
+        self.task_to_display_task_map: Dict[str, str] = {}
         self.expansions: Dict[str, Any] = expansions if expansions else {}
         self.run_on = run_on
         self.modules = modules
@@ -198,8 +225,19 @@ class BuildVariant(object):
         if execution_existing_tasks:
             all_runnable_tasks.update(execution_existing_tasks)
         self.display_tasks.add(_DisplayTask(display_name, frozenset(all_runnable_tasks)))
+        for task in all_runnable_tasks:
+            self.task_to_display_task_map[task.name] = display_name
         return self
 
+    def display_task_of(self, task_name: str) -> Optional[str]:
+        """
+        Get the name of the display task containing the given task.
+
+        :param task_name: Name of task or task group.
+        :return: Name of display task, None if the task is not part of a display task.
+        """
+        return self.task_to_display_task_map.get(task_name)
+
     def all_tasks(self) -> Set[Task]:
         """Get a set of all tasks that are part of this build variant."""
         tasks = self.tasks
@@ -217,40 +255,103 @@ class BuildVariant(object):
             self.task_to_distro_map.get(task.name), self.task_to_activate_map.get(task.name)
         )
 
-    def __get_task_specs(self, task_list: FrozenSet[RunnableTask]) -> List[Dict[str, Any]]:
+    def __get_task_specs(self, task_list: Iterable[RunnableTask]) -> Iterator[Dict[str, Any]]:
         """
-        Get a dictionary representation of task specs for the tasks given.
+        Generate the dictionary representation of task specs for the tasks given.
 
         :param task_list: List of tasks or task groups.
-        :return: Dictionary representation of task specs for given list.
+        :return: Iterator over task specs for given list, ordered by name.
         """
-        return sorted([self.__task_spec_for_task(t) for t in task_list], key=lambda t: t["name"])
+        return (self.__task_spec_for_task(t) for t in sorted(task_list, key=attrgetter("name")))
+
+    def iter_items(self) -> Items:
+        """Generate the key/value pairs of the dictionary representation of this build variant."""
+        yield "name", self.name
+        yield "tasks", chain(
+            self.__get_task_specs(self.tasks),
+            self.__get_task_specs(self.task_groups),
+            self.__get_task_specs(self.existing_tasks),
+        )
+
+        if self.display_tasks:
+            yield "display_tasks", (
+                dt.as_dict() for dt in sorted(self.display_tasks, key=attrgetter("display_name"))
+            )
+
+        yield from existing_items(
+            ("expansions", self.expansions),
+            ("run_on", self.run_on),
+            ("modules", self.modules),
+            ("display_name", self.display_name),
+            ("batch_time", self.batch_time),
+            ("cron", self.cron),
+            ("activate", self.activate),
+        )
 
     def as_dict(self) -> Dict[str, Any]:
         """Get the dictionary representation of this build variant."""
-        obj: Dict[str, Any] = {
-            "name": self.name,
-            "tasks": self.__get_task_specs(frozenset(self.tasks))
-            + self.__get_task_specs(frozenset(self.task_groups))
-            + self.__get_task_specs(frozenset(self.existing_tasks)),
-        }
+        return materialize(self)
+
+    @classmethod
+    def from_dict(
+        cls,
+        obj: Dict[str, Any],
+        tasks: Mapping[str, Task],
+        task_groups: Mapping[str, TaskGroup],
+    ) -> "BuildVariant":
+        """
+        Create a build variant from its dictionary representation.
 
-        if self.display_tasks:
-            obj["display_tasks"] = sorted(
-                [dt.as_dict() for dt in self.display_tasks], key=lambda d: d["name"]
-            )
+        Tasks and task groups that are not given are added as existing tasks.
 
-        add_existing_from_dict(
-            obj,
-            {
-                "expansions": self.expansions,
-                "run_on": self.run_on,
-                "modules": self.modules,
-                "display_name": self.display_name,
-                "batch_time": self.batch_time,
-                "cron": self.cron,
-                "activate": self.activate,
-            },
+        :param obj: Dictionary representing build variant.
+        :param tasks: Tasks the build variant can run, by name.
+        :param task_groups: Task groups the build variant can run, by name.
+        :return: Build variant.
+        """
+        check_keys(obj, BUILD_VARIANT_KEYS, "build variant")
+        variant = cls(
+            obj["name"],
+            display_name=obj.get("display_name"),
+            batch_time=obj.get("batch_time"),
+            cron=obj.get("cron"),
+            expansions=obj.get("expansions"),
+            run_on=obj.get("run_on"),
+            modules=obj.get("modules"),
+            activate=obj.get("activate"),
         )
+        existing_tasks: Dict[str, ExistingTask] = {}
+
+        def runnable_task(name: str) -> RunnableTask:
+            if name in task_groups:
+                return task_groups[name]
+            if name in tasks:
+                return tasks[name]
+            if name not in existing_tasks:
+                existing_tasks[name] = ExistingTask(name)
+            return existing_tasks[name]
+
+        for spec in obj.get("tasks") or []:
+            check_keys(spec, TASK_SPEC_KEYS, "task spec")
+            task = runnable_task(spec["name"])
+            distros = spec.get("distros")
+            if isinstance(task, TaskGroup):
+                variant.add_task_group(task, distros)
+            elif isinstance(task, Task):
+                variant.add_task(task, distros)
+            elif isinstance(task, ExistingTask):
+                variant.add_existing_task(task, distros)
+            if spec.get("activate") is not None:
+                variant.task_to_activate_map[task.name] = spec["activate"]
+
+        for display_task in obj.get("display_tasks") or []:
+            check_keys(display_task, DISPLAY_TASK_KEYS, "display task")
+            execution_tasks = [runnable_task(name) for name in display_task["execution_tasks"]]
+            variant.display_task(
+                display_task["name"],
+                {task for task in execution_tasks if isinstance(task, Task)},
+                {task for task in execution_tasks if isinstance(task, TaskGroup)},
+                {task for task in execution_tasks if isinstance(task, ExistingTask)},
+            )
 
-        return obj
+        return variant
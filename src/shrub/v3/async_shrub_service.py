@@ -0,0 +1,269 @@
+"""Asyncio-friendly service for building and writing shrub configurations."""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from types import TracebackType
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+)
+
+from pydantic import BaseModel
+from typing_extensions import Protocol
+
+from shrub.v3.evg_build_variant import BuildVariant
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_task import EvgTask
+from shrub.v3.evg_task_group import EvgTaskGroup
+from shrub.v3.shrub_service import DEFAULT_CHUNK_SIZE, ShrubService, _json_chunks, _yaml_chunks
+
+T = TypeVar("T")
+
+# Default number of factories awaited at the same time.
+DEFAULT_CONCURRENCY = 64
+
+
+def _render_chunks(chunks: Callable[[], Iterator[str]]) -> List[str]:
+    """Render all chunks of a document, so they can be sent back from another process."""
+    return list(chunks())
+
+
+class AsyncWriter(Protocol):
+    """A file-like object with an async write method, e.g. a file opened with aiofiles."""
+
+    async def write(self, data: str) -> Any:
+        """Write the given data."""
+
+
+class AsyncFileWriter:
+    """Write a file without blocking the event loop by running file operations in an executor."""
+
+    def __init__(self, file_location: str, executor: Optional[Executor] = None) -> None:
+        """
+        Create a new writer.
+
+        :param file_location: Path of file to write.
+        :param executor: Executor to run file operations in, the loop's default if not given.
+        """
+        self.file_location = file_location
+        self._executor = executor
+        self._file: Any = None
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run the given function in the executor."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def __aenter__(self) -> AsyncFileWriter:
+        self._file = await self._run(partial(open, self.file_location, "w"))
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        await self._run(self._file.close)
+
+    async def write(self, data: str) -> int:
+        """
+        Write the given data to the file.
+
+        :param data: Data to write.
+        :return: Number of characters written.
+        """
+        return await self._run(self._file.write, data)
+
+
+class AsyncShrubService:
+    """
+    A service for generating shrub configurations from asyncio code.
+
+    Serialization runs in an executor so it does not block the event loop. With a
+    `ProcessPoolExecutor` serialization also runs in parallel with building models.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None) -> None:
+        """
+        Create a new service.
+
+        :param executor: Executor to serialize in, the loop's default thread pool if not given.
+        """
+        self.executor = executor
+
+    async def _run(self, fn: Callable[[BaseModel], str], shrub_config: BaseModel) -> str:
+        """Run the given serialization function in the executor."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, shrub_config)
+
+    async def generate_yaml(self, shrub_config: BaseModel) -> str:
+        """
+        Generate a yaml version of the given configuration.
+
+        :param shrub_config: Shrub configuration to generate.
+        :return: YAML version of given shrub configuration.
+        """
+        return await self._run(ShrubService.generate_yaml, shrub_config)
+
+    async def generate_json(self, shrub_config: BaseModel) -> str:
+        """
+        Generate a json version of the given configuration.
+
+        :param shrub_config: Shrub configuration to generate.
+        :return: JSON version of given shrub configuration.
+        """
+        return await self._run(ShrubService.generate_json, shrub_config)
+
+    async def _write_chunks(self, chunks: Callable[[], Iterator[str]], writer: AsyncWriter) -> None:
+        """Render the given chunks in the executor, writing each one as it is rendered."""
+        loop = asyncio.get_running_loop()
+        if isinstance(self.executor, ProcessPoolExecutor):
+            # Generators cannot be sent to other processes, so the chunks are rendered together.
+            for chunk in await loop.run_in_executor(self.executor, _render_chunks, chunks):
+                await writer.write(chunk)
+            return
+
+        iterator = chunks()
+        while True:
+            chunk = await loop.run_in_executor(self.executor, next, iterator, None)
+            if chunk is None:
+                return
+            await writer.write(chunk)
+
+    async def write_yaml(
+        self, shrub_config: BaseModel, writer: AsyncWriter, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> None:
+        """
+        Write a yaml version of the given configuration.
+
+        The yaml is written one section, or chunk of items, at a time.
+
+        :param shrub_config: Shrub configuration to write.
+        :param writer: Writer to write yaml to.
+        :param chunk_size: Number of items of large sections to render at a time.
+        """
+        await self._write_chunks(partial(_yaml_chunks, shrub_config, chunk_size), writer)
+
+    async def write_json(self, shrub_config: BaseModel, writer: AsyncWriter) -> None:
+        """
+        Write a json version of the given configuration.
+
+        The json is written one section, or item of a list, at a time.
+
+        :param shrub_config: Shrub configuration to write.
+        :param writer: Writer to write json to.
+        """
+        await self._write_chunks(partial(_json_chunks, shrub_config), writer)
+
+
+TaskResult = Union[EvgTask, Iterable[EvgTask]]
+
+
+class AsyncProjectBuilder:
+    """
+    Build a project from async factories.
+
+    Factories are awaited concurrently as soon as they are added, so gathering inputs for one
+    factory overlaps with building models in others. The resulting project keeps the order in
+    which factories were added.
+    """
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY) -> None:
+        """
+        Create a new builder.
+
+        Builders must be created and used from a running event loop.
+
+        :param concurrency: Max number of factories to await at the same time.
+        """
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: List[asyncio.Future] = []
+        self._build_variants: List[asyncio.Future] = []
+        self._task_groups: List[asyncio.Future] = []
+
+    async def _limited(self, factory: Awaitable[T]) -> T:
+        """Await the given factory once there is capacity."""
+        async with self._semaphore:
+            return await factory
+
+    def _schedule(self, factory: Awaitable[T]) -> asyncio.Future:
+        """Start awaiting the given factory."""
+        return asyncio.ensure_future(self._limited(factory))
+
+    def add_tasks(self, factory: Awaitable[TaskResult]) -> AsyncProjectBuilder:
+        """
+        Add the task, or tasks, produced by the given factory.
+
+        :param factory: Awaitable producing a task or an iterable of tasks.
+        :return: This builder.
+        """
+        self._tasks.append(self._schedule(factory))
+        return self
+
+    def add_build_variant(self, factory: Awaitable[BuildVariant]) -> AsyncProjectBuilder:
+        """
+        Add the build variant produced by the given factory.
+
+        :param factory: Awaitable producing a build variant.
+        :return: This builder.
+        """
+        self._build_variants.append(self._schedule(factory))
+        return self
+
+    def add_task_group(self, factory: Awaitable[EvgTaskGroup]) -> AsyncProjectBuilder:
+        """
+        Add the task group produced by the given factory.
+
+        :param factory: Awaitable producing a task group.
+        :return: This builder.
+        """
+        self._task_groups.append(self._schedule(factory))
+        return self
+
+    async def build(self, **kwargs: Any) -> EvgProject:
+        """
+        Wait for all factories and build the project.
+
+        :param kwargs: Additional fields of the project.
+        :return: Project containing everything produced by the factories.
+        """
+        futures = [*self._tasks, *self._build_variants, *self._task_groups]
+        try:
+            results = await asyncio.gather(*futures)
+        except BaseException:
+            # Stop the remaining factories rather than leaving them running after the failure.
+            pending = [future for future in futures if not future.done()]
+            for future in pending:
+                future.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            raise
+        n_tasks = len(self._tasks)
+        n_build_variants = len(self._build_variants)
+        task_results = results[:n_tasks]
+        build_variants = results[n_tasks : n_tasks + n_build_variants]
+        task_groups = results[n_tasks + n_build_variants :]
+
+        tasks: List[EvgTask] = []
+        for result in task_results:
+            if isinstance(result, EvgTask):
+                tasks.append(result)
+            else:
+                tasks.extend(result)
+
+        fields = dict(kwargs)
+        if tasks:
+            fields["tasks"] = tasks
+        if build_variants:
+            fields["buildvariants"] = list(build_variants)
+        if task_groups:
+            fields["task_groups"] = list(task_groups)
+        return EvgProject(**fields)
@@ -1,9 +1,9 @@
 """Evergreen configuration models for build variants."""
-from typing import List, Optional, Dict
+from typing import Any, Iterable, List, Optional, Dict, Union
 
 from pydantic import BaseModel
 
-from shrub.v3.evg_task import EvgTaskRef
+from shrub.v3.evg_task import EvgTask, EvgTaskRef
 
 
 class DisplayTask(BaseModel):
@@ -45,3 +45,38 @@ class BuildVariant(BaseModel):
     stepback: Optional[bool] = None
     modules: Optional[List[str]] = None
     tags: Optional[List[str]] = None
+
+    @classmethod
+    def from_tasks(
+        cls,
+        name: str,
+        tasks: Iterable[Union[EvgTask, str]],
+        distros: Optional[List[str]] = None,
+        display_tasks: Optional[List[DisplayTask]] = None,
+        **kwargs: Any,
+    ) -> "BuildVariant":
+        """
+        Create a build variant running the given tasks.
+
+        This is equivalent to passing `task.get_task_ref(distros)` for every task, but validates
+        the build variant and all the created task refs in a single pass.
+
+        :param name: ID of build variant.
+        :param tasks: Tasks, or names of tasks, to run on this build variant.
+        :param distros: Distros the tasks should be run on.
+        :param display_tasks: Display tasks that are part of the build variant.
+        :param kwargs: Additional fields of the build variant.
+        :return: Build variant referencing the given tasks.
+        """
+        ref_fields = {} if distros is None else {"distros": distros}
+        refs = [dict(ref_fields, name=_task_name(task)) for task in tasks]
+        fields = dict(kwargs, name=name, tasks=refs)
+        if display_tasks is not None:
+            fields["display_tasks"] = display_tasks
+        # The variant and all its task refs are validated in a single pass.
+        return cls.model_validate(fields)
+
+
+def _task_name(task: Union[EvgTask, str]) -> str:
+    """Get the name of the given task or task name."""
+    return task if isinstance(task, str) else task.name
@@ -0,0 +1,144 @@
+"""Estimation of the critical path and makespan of an evergreen project."""
+from typing import Dict, List, Mapping, Optional, Union
+
+from pydantic import BaseModel
+
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_runtime_history import RuntimeHistory
+from shrub.v3.evg_task_graph import TaskGraph
+
+# Number of tasks reported as most worth speeding up.
+DEFAULT_BOTTLENECK_COUNT = 10
+
+
+class ScheduledTask(BaseModel):
+    """
+    A task run on a build variant, as scheduled with unlimited hosts.
+
+    * build_variant: Name of build variant running the task.
+    * task: Name of task.
+    * runtime: Estimated runtime of task.
+    * start: Earliest time the task can start.
+    * slack: Time the task can be delayed without delaying the project.
+    """
+
+    build_variant: str
+    task: str
+    runtime: float
+    start: float
+    slack: float
+
+
+class CriticalPathReport(BaseModel):
+    """
+    Estimate of the time to run a project.
+
+    * critical_path: Longest chain of dependent tasks, in the order they run.
+    * critical_path_time: Time to run the critical path.
+    * variant_bounds: Time to run all tasks of each build variant on its limited hosts.
+    * makespan: Estimated time to run the project.
+    * bottlenecks: Tasks on the critical path that would most reduce the makespan if sped up.
+    """
+
+    critical_path: List[ScheduledTask]
+    critical_path_time: float
+    variant_bounds: Dict[str, float]
+    makespan: float
+    bottlenecks: List[ScheduledTask]
+
+
+class CriticalPathAnalyzer:
+    """
+    Estimate the time to run a project from the runtimes of its tasks.
+
+    Tasks of a task group wait for the task `max_hosts` places before them in the group. With
+    unlimited hosts a project takes as long as its critical path. Limiting the hosts of a build
+    variant bounds the project by the total runtime of the variant divided by its hosts. The
+    estimated makespan is the largest of these bounds. The analysis takes time linear in the number
+    of tasks and dependencies.
+    """
+
+    def __init__(
+        self,
+        project: EvgProject,
+        runtimes: Union[RuntimeHistory, Mapping[str, float]],
+        variant_hosts: Optional[Mapping[str, int]] = None,
+    ) -> None:
+        """
+        Create a new analyzer.
+
+        :param project: Project to analyze.
+        :param runtimes: Estimated runtime of each task.
+        :param variant_hosts: Max number of hosts running the tasks of each build variant.
+        """
+        self.project = project
+        if not isinstance(runtimes, RuntimeHistory):
+            runtimes = RuntimeHistory(runtimes)
+        self.history = runtimes
+        for variant, hosts in (variant_hosts or {}).items():
+            if hosts < 1:
+                raise ValueError(f"Build variant {variant} must have at least 1 host, got {hosts}")
+        self.variant_hosts = variant_hosts or {}
+
+    def analyze(self, bottleneck_count: int = DEFAULT_BOTTLENECK_COUNT) -> CriticalPathReport:
+        """
+        Analyze the project.
+
+        :param bottleneck_count: Max number of bottlenecks to report.
+        :return: Estimate of the time to run the project.
+        """
+        graph = TaskGraph.from_project(self.project, serialize_task_groups=True)
+        order = graph.topological_order()
+        runtimes = [self.history.estimate(node.task) for node in graph.nodes]
+
+        # Forward pass: earliest start of each task and the predecessor that delays it most.
+        starts = [0.0] * len(graph.nodes)
+        critical_predecessors: List[Optional[int]] = [None] * len(graph.nodes)
+        for index in order:
+            finish = starts[index] + runtimes[index]
+            for successor in graph.successors[index]:
+                if critical_predecessors[successor] is None or finish > starts[successor]:
+                    starts[successor] = finish
+                    critical_predecessors[successor] = index
+
+        finishes = [start + runtime for start, runtime in zip(starts, runtimes)]
+        critical_path_time = max(finishes, default=0.0)
+
+        # Backward pass: latest finish of each task that does not delay the project.
+        latest_finishes = [critical_path_time] * len(graph.nodes)
+        for index in reversed(order):
+            for successor in graph.successors[index]:
+                latest_start = latest_finishes[successor] - runtimes[successor]
+                if latest_start < latest_finishes[index]:
+                    latest_finishes[index] = latest_start
+
+        def scheduled(index: int) -> ScheduledTask:
+            node = graph.nodes[index]
+            return ScheduledTask(
+                build_variant=node.build_variant,
+                task=node.task,
+                runtime=runtimes[index],
+                start=starts[index],
+                slack=latest_finishes[index] - finishes[index],
+            )
+
+        path: List[int] = []
+        if graph.nodes:
+            current: Optional[int] = max(range(len(graph.nodes)), key=finishes.__getitem__)
+            while current is not None:
+                path.append(current)
+                current = critical_predecessors[current]
+            path.reverse()
+
+        variant_bounds = {
+            variant: sum(runtimes[index] for index in graph.variant_nodes.get(variant, [])) / hosts
+            for variant, hosts in self.variant_hosts.items()
+        }
+        critical_path = [scheduled(index) for index in path]
+        return CriticalPathReport(
+            critical_path=critical_path,
+            critical_path_time=critical_path_time,
+            variant_bounds=variant_bounds,
+            makespan=max([critical_path_time, *variant_bounds.values()]),
+            bottlenecks=sorted(critical_path, key=lambda task: -task.runtime)[:bottleneck_count],
+        )
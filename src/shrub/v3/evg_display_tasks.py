@@ -0,0 +1,165 @@
+"""Automatic grouping of tasks into display tasks."""
+import copy
+import re
+from typing import Dict, Iterable, List, Optional, Pattern
+
+from pydantic import BaseModel
+
+from shrub.v3.evg_build_variant import BuildVariant, DisplayTask
+from shrub.v3.evg_task import EvgTask
+
+
+class DisplayTaskRule(BaseModel):
+    """
+    Rule describing which tasks to group under a display task.
+
+    A task matches the rule if its name matches the pattern or it has the tag. A rule without a
+    pattern or tag matches every task.
+
+    * name: Name of display task.
+    * pattern: Regular expression searched for in the names of tasks.
+    * tag: Tag of tasks.
+    """
+
+    name: str
+    pattern: Optional[str] = None
+    tag: Optional[str] = None
+
+
+class DisplayTaskGrouper:
+    """
+    Group tasks into display tasks by name pattern or tag.
+
+    Tasks are grouped under the display task of the first rule they match, tasks not matching any
+    rule are left ungrouped. When a max size is given, display tasks are split into chunks named
+    `<name>_<index>` of at most that many tasks.
+
+    The display task of each task is kept in an index, and execution tasks are kept in the order
+    the tasks were added, so display tasks are never searched or sorted.
+    """
+
+    def __init__(self, rules: List[DisplayTaskRule], max_size: Optional[int] = None) -> None:
+        """
+        Create a new grouper.
+
+        :param rules: Rules to group tasks by, in order of precedence.
+        :param max_size: Max number of tasks in a single display task.
+        """
+        if max_size is not None and max_size < 1:
+            raise ValueError(f"max_size must be positive, got {max_size}")
+        self.rules = rules
+        self.max_size = max_size
+        self._patterns: List[Optional[Pattern]] = [
+            re.compile(rule.pattern) if rule.pattern is not None else None for rule in rules
+        ]
+        self._reset()
+
+    def _reset(self) -> None:
+        """Forget all the tasks added so far."""
+        self._display_tasks: Dict[str, DisplayTask] = {}
+        self._chunks: Dict[str, DisplayTask] = {}
+        self._chunk_counts: Dict[str, int] = {}
+        self._membership: Dict[str, DisplayTask] = {}
+
+    def _match(self, task: EvgTask) -> Optional[DisplayTaskRule]:
+        """Find the first rule matching the given task."""
+        for rule, pattern in zip(self.rules, self._patterns):
+            if pattern is None and rule.tag is None:
+                return rule
+            if pattern is not None and pattern.search(task.name):
+                return rule
+            if rule.tag is not None and task.tags and rule.tag in task.tags:
+                return rule
+        return None
+
+    def _display_task_for_rule(self, rule: DisplayTaskRule) -> DisplayTask:
+        """Get the display task the next task matching the given rule should be added to."""
+        display_task = self._chunks.get(rule.name)
+        if display_task is not None and (
+            self.max_size is None or len(display_task.execution_tasks) < self.max_size
+        ):
+            return display_task
+
+        if self.max_size is None:
+            name = rule.name
+        else:
+            count = self._chunk_counts.get(rule.name, 0)
+            self._chunk_counts[rule.name] = count + 1
+            name = f"{rule.name}_{count}"
+        display_task = DisplayTask(name=name, execution_tasks=[])
+        self._chunks[rule.name] = display_task
+        self._display_tasks[name] = display_task
+        return display_task
+
+    def add_task(self, task: EvgTask) -> Optional[str]:
+        """
+        Add the given task to the display task of the first rule it matches.
+
+        Adding a task that was already added has no effect.
+
+        :param task: Task to add.
+        :return: Name of display task the task was added to, None if no rule matched.
+        """
+        display_task = self._membership.get(task.name)
+        if display_task is None:
+            rule = self._match(task)
+            if rule is None:
+                return None
+            display_task = self._display_task_for_rule(rule)
+            display_task.execution_tasks.append(task.name)
+            self._membership[task.name] = display_task
+        return display_task.name
+
+    def add_tasks(self, tasks: Iterable[EvgTask]) -> "DisplayTaskGrouper":
+        """
+        Add all the given tasks.
+
+        :param tasks: Tasks to add.
+        :return: This grouper.
+        """
+        for task in tasks:
+            self.add_task(task)
+        return self
+
+    def display_task_of(self, task_name: str) -> Optional[str]:
+        """
+        Get the name of the display task containing the given task.
+
+        :param task_name: Name of task.
+        :return: Name of display task, None if the task is not part of a display task.
+        """
+        display_task = self._membership.get(task_name)
+        return display_task.name if display_task is not None else None
+
+    def __contains__(self, task_name: str) -> bool:
+        return task_name in self._membership
+
+    @property
+    def display_tasks(self) -> List[DisplayTask]:
+        """Display tasks in the order they were created."""
+        return list(self._display_tasks.values())
+
+    def apply(self, build_variant: BuildVariant, tasks: Iterable[EvgTask]) -> BuildVariant:
+        """
+        Group the tasks of the given build variant into display tasks.
+
+        Only tasks referenced by the build variant and not already part of one of its display
+        tasks are grouped. The display tasks are added after any display tasks the build variant
+        already has.
+
+        Each build variant is grouped from scratch, the tasks added to this grouper are neither
+        used nor changed, so one grouper can be applied to several build variants.
+
+        :param build_variant: Build variant to add display tasks to.
+        :param tasks: Definitions of tasks, used to find the tags of referenced tasks.
+        :return: The given build variant.
+        """
+        existing = build_variant.display_tasks or []
+        grouped = {name for display_task in existing for name in display_task.execution_tasks}
+        task_names = {ref.name for ref in build_variant.tasks} - grouped
+
+        grouper = copy.copy(self)
+        grouper._reset()
+        grouper.add_tasks(task for task in tasks if task.name in task_names)
+        build_variant.display_tasks = existing + grouper.display_tasks
+        return build_variant
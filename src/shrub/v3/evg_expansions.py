@@ -0,0 +1,266 @@
+"""Analysis of the expansions used and defined by an evergreen project."""
+import re
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set
+
+from pydantic import BaseModel
+
+from shrub.v3.evg_command import BuiltInCommand, EvgCommand, FunctionCall
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_task_graph import select_tasks
+
+# Tokens delimiting expansions like "${name}", "${name|default}" and "${name|${other}}".
+EXPANSION_TOKENS = re.compile(r"\$\{|\||\}")
+
+# Expansions evergreen defines for every task.
+DEFAULT_EXPANSIONS = frozenset(
+    [
+        "author",
+        "author_email",
+        "branch_name",
+        "build_id",
+        "build_variant",
+        "created_at",
+        "distro_id",
+        "execution",
+        "github_author",
+        "github_commit",
+        "github_org",
+        "github_pr_number",
+        "github_repo",
+        "is_commit_queue",
+        "is_patch",
+        "project",
+        "project_id",
+        "project_identifier",
+        "requester",
+        "revision",
+        "revision_order_id",
+        "task_id",
+        "task_name",
+        "trigger_event_identifier",
+        "triggered_by_git_tag",
+        "version_id",
+        "workdir",
+    ]
+)
+
+# Locations of the commands run for every task.
+PROJECT_COMMANDS = ("pre", "post", "timeout")
+# Task group commands that run along with the tasks of the group.
+TASK_GROUP_COMMANDS = ("setup_group", "setup_task", "teardown_task", "teardown_group", "timeout")
+
+
+def _scan(value: str, used: Set[str]) -> None:
+    """
+    Add the names of the expansions required by the given string.
+
+    An expansion is required if it has no default and is not itself part of the default of
+    another expansion.
+
+    :param value: String to scan.
+    :param used: Set to add required expansion names to.
+    """
+    # Each open expansion is [start of name, end of name, optional].
+    stack: List[List[Any]] = []
+    for token in EXPANSION_TOKENS.finditer(value):
+        text = token.group()
+        if text == "${":
+            optional = bool(stack) and (stack[-1][1] is not None or stack[-1][2])
+            stack.append([token.end(), None, optional])
+        elif not stack:
+            continue
+        elif text == "|":
+            if stack[-1][1] is None:
+                stack[-1][1] = token.start()
+        else:
+            start, end, optional = stack.pop()
+            if end is None and not optional:
+                used.add(value[start : token.start()].strip())
+
+
+def find_expansions(value: Any, used: Set[str]) -> None:
+    """
+    Add the names of the expansions required by all strings in the given value.
+
+    :param value: String, or collection or model containing strings, to scan.
+    :param used: Set to add required expansion names to.
+    """
+    if isinstance(value, str):
+        if "${" in value:
+            _scan(value, used)
+    elif isinstance(value, dict):
+        for item in value.values():
+            find_expansions(item, used)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            find_expansions(item, used)
+    elif isinstance(value, BaseModel):
+        for item in value.__dict__.values():
+            find_expansions(item, used)
+
+
+class UndefinedExpansion(BaseModel):
+    """
+    An expansion that is used but likely not defined.
+
+    * name: Name of expansion.
+    * build_variant: Build variant the expansion is not defined on.
+    * location: Task, or project section, using the expansion.
+    """
+
+    name: str
+    build_variant: str
+    location: str
+
+    def __str__(self) -> str:
+        return f"{self.build_variant}: '{self.name}' used by {self.location} is not defined"
+
+
+class ExpansionReport(BaseModel):
+    """
+    Report of the expansions used and defined in a project.
+
+    * task_usage: Expansions required by each task, including the functions it calls.
+    * project_usage: Expansions required by pre, post and timeout commands.
+    * variant_definitions: Expansions defined by each build variant.
+    * updated: Expansions defined at runtime by expansions.update commands.
+    * variant_updates: Expansions defined at runtime by the commands run on each build variant.
+    * undefined: Expansions that are used but likely not defined.
+    """
+
+    task_usage: Dict[str, Set[str]]
+    project_usage: Dict[str, Set[str]]
+    variant_definitions: Dict[str, Set[str]]
+    updated: Set[str]
+    variant_updates: Dict[str, Set[str]]
+    undefined: List[UndefinedExpansion]
+
+
+class ExpansionAnalyzer:
+    """Find the expansions used by the tasks of a project and the variants that define them."""
+
+    def __init__(self, project: EvgProject, known: Optional[Iterable[str]] = None) -> None:
+        """
+        Create a new analyzer.
+
+        :param project: Project to analyze.
+        :param known: Names of expansions defined elsewhere, e.g. project variables.
+        """
+        self.project = project
+        self.known: FrozenSet[str] = DEFAULT_EXPANSIONS.union(known or [])
+        self._function_usage: Dict[str, Set[str]] = {}
+        self._function_updates: Dict[str, Set[str]] = {}
+
+    def _command_usage(
+        self, commands: Optional[Iterable[EvgCommand]], updated: Set[str]
+    ) -> Set[str]:
+        """
+        Get the expansions required by the given commands.
+
+        :param commands: Commands to analyze.
+        :param updated: Set to add the expansions defined by expansions.update commands to.
+        :return: Expansions required by the commands.
+        """
+        used: Set[str] = set()
+        for command in commands or []:
+            if isinstance(command, FunctionCall):
+                function_used = self._function(command.func)
+                updated.update(self._function_updates[command.func])
+                if command.vars:
+                    find_expansions(command.vars, used)
+                    function_used = function_used.difference(command.vars)
+                used.update(function_used)
+            elif isinstance(command, BuiltInCommand):
+                if command.command == "expansions.update":
+                    self._record_updates(command, updated)
+                find_expansions(command.params, used)
+                find_expansions(command.params_yaml, used)
+        return used
+
+    @staticmethod
+    def _record_updates(command: BuiltInCommand, updated: Set[str]) -> None:
+        """Record the expansions defined by an expansions.update command."""
+        for update in (command.params or {}).get("updates") or []:
+            key = update.get("key") if isinstance(update, dict) else getattr(update, "key", None)
+            if key:
+                updated.add(key)
+
+    def _function(self, name: str) -> Set[str]:
+        """Get the expansions required by the given function, analyzing it only once."""
+        used = self._function_usage.get(name)
+        if used is None:
+            # Guard against functions that (invalidly) call themselves.
+            self._function_usage[name] = set()
+            self._function_updates[name] = set()
+            definition = (self.project.functions or {}).get(name)
+            if definition is not None and not isinstance(definition, list):
+                definition = [definition]
+            used = self._command_usage(definition, self._function_updates[name])
+            self._function_usage[name] = used
+        return used
+
+    def analyze(self) -> ExpansionReport:
+        """
+        Analyze the expansions of the project.
+
+        :return: Report of expansion usage and likely undefined expansions.
+        """
+        project = self.project
+        task_updates: Dict[str, Set[str]] = {task.name: set() for task in project.tasks or []}
+        task_usage = {
+            task.name: self._command_usage(task.commands, task_updates[task.name])
+            for task in project.tasks or []
+        }
+        project_updates: Set[str] = set()
+        project_usage = {
+            key: self._command_usage(getattr(project, key), project_updates)
+            for key in PROJECT_COMMANDS
+        }
+        group_tasks: Dict[str, List[str]] = {}
+        for group in project.task_groups or []:
+            group_used: Set[str] = set()
+            group_updated: Set[str] = set()
+            for key in TASK_GROUP_COMMANDS:
+                group_used.update(self._command_usage(getattr(group, key), group_updated))
+            for name in group.tasks:
+                task_usage.setdefault(name, set()).update(group_used)
+                task_updates.setdefault(name, set()).update(group_updated)
+            group_tasks[group.name] = group.tasks
+
+        variant_definitions: Dict[str, Set[str]] = {}
+        variant_updates: Dict[str, Set[str]] = {}
+        undefined: List[UndefinedExpansion] = []
+        for variant in project.buildvariants or []:
+            defined = set(variant.expansions or {})
+            variant_definitions[variant.name] = defined
+
+            variant_used: Set[str] = set()
+            find_expansions(variant.expansions, variant_used)
+            locations = {"expansions": variant_used, **project_usage}
+            updated = set(project_updates)
+            for ref in variant.tasks:
+                if ref.name.startswith((".", "!")):
+                    names = select_tasks(ref.name, project.tasks or [])
+                else:
+                    names = group_tasks.get(ref.name, [ref.name])
+                for name in names:
+                    if name in task_usage:
+                        locations[name] = task_usage[name]
+                        updated.update(task_updates[name])
+            variant_updates[variant.name] = updated
+            available = self.known.union(defined, updated)
+
+            for location, used in locations.items():
+                for name in sorted(used - available):
+                    undefined.append(
+                        UndefinedExpansion(name=name, build_variant=variant.name, location=location)
+                    )
+
+        return ExpansionReport(
+            task_usage=task_usage,
+            project_usage=project_usage,
+            variant_definitions=variant_definitions,
+            updated=set().union(project_updates, *task_updates.values()),
+            variant_updates=variant_updates,
+            undefined=undefined,
+        )
@@ -0,0 +1,278 @@
+"""Extraction of command sequences repeated across tasks into functions."""
+import hashlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+from shrub.v3.evg_command import BuiltInCommand, FunctionCall
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.shrub_service import DUMP_KWARGS, render_commands, render_section_items
+
+DEFAULT_PREFIX = "extracted_"
+DEFAULT_MIN_LENGTH = 2
+DEFAULT_MAX_LENGTH = 16
+DEFAULT_MIN_USES = 2
+
+# Modulus and base of the rolling hash of command sequences.
+_MODULUS = (1 << 61) - 1
+_BASE = 1_000_003
+# Header added to the yaml when a project without functions gains some.
+_FUNCTIONS_HEADER = "functions:\n"
+
+# A command sequence: its hash and length.
+_Key = Tuple[int, int]
+
+
+class ExtractedFunction(BaseModel):
+    """
+    A function extracted from the commands of tasks.
+
+    * name: Name of function.
+    * length: Number of commands in the function.
+    * uses: Number of places the commands were replaced with a call to the function.
+    * bytes_saved: Bytes of yaml saved by extracting the function.
+    """
+
+    name: str
+    length: int
+    uses: int
+    bytes_saved: int
+
+
+class ExtractionResult(BaseModel):
+    """
+    Result of extracting repeated command sequences into functions.
+
+    * project: Project calling the extracted functions.
+    * functions: Functions extracted, most bytes saved first.
+    * bytes_saved: Bytes of yaml saved in total.
+    """
+
+    project: EvgProject
+    functions: List[ExtractedFunction]
+    bytes_saved: int
+
+
+class _Candidate:
+    """A command sequence that could be extracted."""
+
+    __slots__ = ("tokens", "name", "sequence_size", "call_size", "definition_size", "uses")
+
+    def __init__(self, tokens: Tuple[int, ...], name: str, sequence_size: int) -> None:
+        self.tokens = tokens
+        self.name = name
+        self.sequence_size = sequence_size
+        self.call_size = 0
+        self.definition_size = 0
+        self.uses = 0
+
+    def savings(self, uses: int) -> int:
+        """Get the bytes saved by replacing the given number of uses of the sequence."""
+        return uses * (self.sequence_size - self.call_size) - self.definition_size
+
+
+class FunctionExtractor:
+    """
+    Replace command sequences repeated across tasks with calls to functions.
+
+    Every distinct command of the tasks of a project is rendered once and replaced by a token.
+    Sequences of tokens of every length between `min_length` and `max_length` are counted with a
+    rolling hash, taking time linear in the number of commands for each length. Sequences saving
+    the most bytes are then extracted first, at most once per position.
+
+    Only built-in commands are extracted, as evergreen functions cannot call other functions.
+    Commands are moved unchanged into the functions, so tasks run the same commands as before.
+    """
+
+    def __init__(
+        self,
+        min_length: int = DEFAULT_MIN_LENGTH,
+        max_length: int = DEFAULT_MAX_LENGTH,
+        min_uses: int = DEFAULT_MIN_USES,
+        prefix: str = DEFAULT_PREFIX,
+    ) -> None:
+        """
+        Create a new extractor.
+
+        :param min_length: Min number of commands of an extracted sequence.
+        :param max_length: Max number of commands of an extracted sequence.
+        :param min_uses: Min number of times a sequence must be used to be extracted.
+        :param prefix: Prefix of the names of extracted functions.
+        """
+        if min_length < 1 or max_length < min_length:
+            raise ValueError("Lengths must satisfy 1 <= min_length <= max_length")
+        self.min_length = min_length
+        self.max_length = max_length
+        self.min_uses = max(min_uses, 2)
+        self.prefix = prefix
+
+    def extract(self, project: EvgProject) -> ExtractionResult:
+        """
+        Extract the repeated command sequences of the given project into functions.
+
+        :param project: Project to extract functions from, it is not modified.
+        :return: Project calling the extracted functions, and the functions extracted.
+        """
+        tasks = project.tasks or []
+        token_ids: Dict[str, int] = {}
+        token_commands: List[Any] = []
+        token_texts: List[str] = []
+        task_tokens: List[List[int]] = []
+        for task in tasks:
+            tokens = []
+            for command in task.commands or []:
+                if not isinstance(command, BuiltInCommand):
+                    # Never part of a sequence.
+                    tokens.append(-1)
+                    continue
+                # Commands dumping to the same json render to the same yaml.
+                key = command.model_dump_json(**DUMP_KWARGS)
+                token = token_ids.get(key)
+                if token is None:
+                    token = len(token_commands)
+                    token_ids[key] = token
+                    token_commands.append(command)
+                    token_texts.append(render_commands([command]))
+                tokens.append(token)
+            task_tokens.append(tokens)
+
+        existing = set(project.functions or {})
+        candidates = self._find_candidates(task_tokens, token_texts, existing)
+        for candidate in candidates.values():
+            call = FunctionCall(func=candidate.name)
+            candidate.call_size = len(render_commands([call]).encode())
+            definition = [
+                token_commands[token].model_dump(**DUMP_KWARGS) for token in candidate.tokens
+            ]
+            candidate.definition_size = len(
+                render_section_items({candidate.name: definition}).encode()
+            )
+
+        # Drop sequences that would not be used often enough once overlapping uses are resolved.
+        selected = [c for c in candidates.values() if c.savings(c.uses) > 0]
+        while True:
+            selected.sort(key=lambda c: (-c.savings(c.uses), c.name))
+            plans = self._plan(task_tokens, selected)
+            uses = Counter(id(c) for plan in plans for c in plan.values())
+            kept = [
+                c for c in selected if uses[id(c)] >= self.min_uses and c.savings(uses[id(c)]) > 0
+            ]
+            for candidate in selected:
+                candidate.uses = uses[id(candidate)]
+            if len(kept) == len(selected):
+                break
+            selected = kept
+
+        if not selected:
+            return ExtractionResult(project=project, functions=[], bytes_saved=0)
+
+        calls = {id(c): FunctionCall(func=c.name) for c in selected}
+        new_tasks = []
+        for task, plan in zip(tasks, plans):
+            if not plan:
+                new_tasks.append(task)
+                continue
+            commands: List[Any] = []
+            position = 0
+            task_commands = task.commands or []
+            while position < len(task_commands):
+                candidate = plan.get(position)
+                if candidate is None:
+                    commands.append(task_commands[position])
+                    position += 1
+                else:
+                    commands.append(calls[id(candidate)])
+                    position += len(candidate.tokens)
+            new_tasks.append(task.model_copy(update={"commands": commands}))
+
+        functions = dict(project.functions or {})
+        for candidate in selected:
+            functions[candidate.name] = [token_commands[token] for token in candidate.tokens]
+        extracted = [
+            ExtractedFunction(
+                name=c.name, length=len(c.tokens), uses=c.uses, bytes_saved=c.savings(c.uses)
+            )
+            for c in selected
+        ]
+        bytes_saved = sum(function.bytes_saved for function in extracted)
+        if not project.functions:
+            bytes_saved -= len(_FUNCTIONS_HEADER)
+        return ExtractionResult(
+            project=project.model_copy(update={"tasks": new_tasks, "functions": functions}),
+            functions=extracted,
+            bytes_saved=bytes_saved,
+        )
+
+    def _find_candidates(
+        self,
+        task_tokens: List[List[int]],
+        token_texts: List[str],
+        existing: Set[str],
+    ) -> Dict[_Key, _Candidate]:
+        """Find the command sequences used at least `min_uses` times."""
+        counts: Counter = Counter()
+        first: Dict[_Key, Tuple[int, int]] = {}
+        for length in range(self.min_length, self.max_length + 1):
+            # Removing the first token of a window takes multiplying it by base ** (length - 1).
+            high = pow(_BASE, length - 1, _MODULUS)
+            for task_index, tokens in enumerate(task_tokens):
+                value = 0
+                run = 0
+                for position, token in enumerate(tokens):
+                    if token < 0:
+                        value = run = 0
+                        continue
+                    if run == length:
+                        value = (value - (tokens[position - length] + 1) * high) % _MODULUS
+                    else:
+                        run += 1
+                    value = (value * _BASE + token + 1) % _MODULUS
+                    if run == length:
+                        key = (value, length)
+                        counts[key] += 1
+                        if key not in first:
+                            first[key] = (task_index, position + 1 - length)
+
+        candidates: Dict[_Key, _Candidate] = {}
+        for key, count in counts.items():
+            if count < self.min_uses:
+                continue
+            task_index, start = first[key]
+            sequence = tuple(task_tokens[task_index][start : start + key[1]])
+            text = "".join(token_texts[token] for token in sequence)
+            name = f"{self.prefix}{hashlib.sha256(text.encode()).hexdigest()[:12]}"
+            if name in existing:
+                continue
+            candidate = _Candidate(sequence, name, len(text.encode()))
+            candidate.uses = count
+            candidates[key] = candidate
+        return candidates
+
+    @staticmethod
+    def _plan(
+        task_tokens: List[List[int]], candidates: List[_Candidate]
+    ) -> List[Dict[int, _Candidate]]:
+        """Choose the sequence replaced at each position of each task, best candidates first."""
+        by_first_token: Dict[int, List[_Candidate]] = {}
+        for candidate in candidates:
+            by_first_token.setdefault(candidate.tokens[0], []).append(candidate)
+
+        plans = []
+        for tokens in task_tokens:
+            plan: Dict[int, _Candidate] = {}
+            position = 0
+            while position < len(tokens):
+                match: Optional[_Candidate] = None
+                for candidate in by_first_token.get(tokens[position], []):
+                    end = position + len(candidate.tokens)
+                    if tuple(tokens[position:end]) == candidate.tokens:
+                        match = candidate
+                        break
+                if match is None:
+                    position += 1
+                else:
+                    plan[position] = match
+                    position += len(match.tokens)
+            plans.append(plan)
+        return plans
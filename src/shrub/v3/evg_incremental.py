@@ -0,0 +1,274 @@
+"""Incremental generation of evergreen projects, regenerating only entities whose inputs changed."""
+import hashlib
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, TypeAdapter
+
+from shrub.v3.evg_build_variant import BuildVariant
+from shrub.v3.evg_project import EvgProject, FunctionDefinition
+from shrub.v3.evg_task import EvgTask
+from shrub.v3.evg_task_group import EvgTaskGroup
+from shrub.v3.shrub_service import (
+    DUMP_KWARGS,
+    dump_yaml,
+    dump_yaml_fragment,
+    end_document,
+    render_section_items,
+)
+
+# Sections of a project made up of entities that are generated independently.
+BUILD_VARIANTS = "buildvariants"
+TASKS = "tasks"
+FUNCTIONS = "functions"
+TASK_GROUPS = "task_groups"
+ENTITY_SECTIONS = (BUILD_VARIANTS, TASKS, FUNCTIONS, TASK_GROUPS)
+
+_FUNCTION_ADAPTER = TypeAdapter(FunctionDefinition)
+
+
+def _json_default(value: Any) -> Any:
+    """Convert values json does not support for hashing."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", **DUMP_KWARGS)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    return repr(value)
+
+
+def hash_inputs(inputs: Any) -> str:
+    """
+    Get a hash of the given inputs of a generator step.
+
+    :param inputs: JSON-like inputs, may contain models and sets.
+    :return: Hex digest of inputs.
+    """
+    data = json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=_json_default)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class EntityRecord(BaseModel):
+    """
+    Record of a generated entity.
+
+    * input_hash: Hash of the inputs the entity was generated from.
+    * content_hash: Hash of the generated yaml.
+    * text: Generated yaml of the entity, as part of its section.
+    """
+
+    input_hash: str
+    content_hash: str
+    text: str
+
+
+class IncrementalState(BaseModel):
+    """
+    State of a previous generation, used to skip regenerating entities whose inputs did not change.
+
+    * generator_version: Version of the generator, state of other versions is not reused.
+    * entities: Record of each entity by section and name.
+    """
+
+    generator_version: Optional[str] = None
+    entities: Dict[str, Dict[str, EntityRecord]] = {}
+
+    @classmethod
+    def load(cls, file_location: str) -> "IncrementalState":
+        """
+        Load state saved to the given file.
+
+        :param file_location: Path of file to load.
+        :return: Loaded state.
+        """
+        with open(file_location) as state_file:
+            return cls.model_validate_json(state_file.read())
+
+    def save(self, file_location: str) -> None:
+        """
+        Save this state to the given file.
+
+        :param file_location: Path of file to save to.
+        """
+        with open(file_location, "w") as state_file:
+            state_file.write(self.model_dump_json())
+
+
+class IncrementalResult(BaseModel):
+    """
+    Result of an incremental generation.
+
+    * text: Generated yaml of the project.
+    * state: State to pass to the next generation.
+    * regenerated: Entities that were regenerated because their inputs changed.
+    * changed: Entities whose yaml changed, including new entities.
+    * removed: Entities of the previous generation that were not generated again.
+    """
+
+    text: str
+    state: IncrementalState
+    regenerated: List[str]
+    changed: List[str]
+    removed: List[str]
+
+
+class IncrementalBuilder:
+    """
+    Build the yaml of a project from generator steps, reusing the output of unchanged steps.
+
+    Every step declares the inputs it generates an entity (build variant, task, function or task
+    group) from. When an entity with the same inputs was generated previously, its yaml is reused
+    without calling the step. Otherwise the step is called and only its entity is rendered. The
+    yaml of all entities is then spliced together, giving the same output as generating the whole
+    project with `ShrubService.generate_yaml`.
+
+    Other sections of the project, like pre and post, are cheap and always rendered.
+    """
+
+    def __init__(
+        self,
+        previous: Optional[IncrementalState] = None,
+        generator_version: Optional[str] = None,
+    ) -> None:
+        """
+        Create a new builder.
+
+        :param previous: State of the previous generation.
+        :param generator_version: Version of the generator, bump it when steps change their output.
+        """
+        if previous is not None and previous.generator_version != generator_version:
+            previous = None
+        self.previous = previous
+        self.generator_version = generator_version
+        self._entities: Dict[str, Dict[str, Tuple[str, Callable[[], Any]]]] = {
+            section: {} for section in ENTITY_SECTIONS
+        }
+        self._sections: Dict[str, Any] = {}
+
+    def _add(self, section: str, name: str, inputs: Any, step: Callable[[], Any]) -> None:
+        """Add a step generating an entity of the given section."""
+        self._entities[section][name] = (hash_inputs(inputs), step)
+
+    def add_build_variant(
+        self, name: str, inputs: Any, step: Callable[[], BuildVariant]
+    ) -> "IncrementalBuilder":
+        """
+        Add a step generating a build variant.
+
+        :param name: Name of build variant.
+        :param inputs: Everything the build variant is generated from.
+        :param step: Function generating the build variant.
+        :return: This builder.
+        """
+        self._add(BUILD_VARIANTS, name, inputs, step)
+        return self
+
+    def add_task(self, name: str, inputs: Any, step: Callable[[], EvgTask]) -> "IncrementalBuilder":
+        """
+        Add a step generating a task.
+
+        :param name: Name of task.
+        :param inputs: Everything the task is generated from.
+        :param step: Function generating the task.
+        :return: This builder.
+        """
+        self._add(TASKS, name, inputs, step)
+        return self
+
+    def add_function(
+        self, name: str, inputs: Any, step: Callable[[], FunctionDefinition]
+    ) -> "IncrementalBuilder":
+        """
+        Add a step generating a function.
+
+        :param name: Name of function.
+        :param inputs: Everything the function is generated from.
+        :param step: Function generating the commands of the function.
+        :return: This builder.
+        """
+        self._add(FUNCTIONS, name, inputs, step)
+        return self
+
+    def add_task_group(
+        self, name: str, inputs: Any, step: Callable[[], EvgTaskGroup]
+    ) -> "IncrementalBuilder":
+        """
+        Add a step generating a task group.
+
+        :param name: Name of task group.
+        :param inputs: Everything the task group is generated from.
+        :param step: Function generating the task group.
+        :return: This builder.
+        """
+        self._add(TASK_GROUPS, name, inputs, step)
+        return self
+
+    def set_section(self, key: str, value: Any) -> "IncrementalBuilder":
+        """
+        Set another section of the project, e.g. pre or stepback.
+
+        :param key: Name of section.
+        :param value: Value of section.
+        :return: This builder.
+        """
+        if key in ENTITY_SECTIONS:
+            raise ValueError(f"Section '{key}' is built from steps")
+        self._sections[key] = value
+        return self
+
+    @staticmethod
+    def _render(section: str, name: str, entity: Any) -> str:
+        """Render the given entity as part of its section."""
+        if section == FUNCTIONS:
+            obj: Any = {name: _FUNCTION_ADAPTER.dump_python(entity, **DUMP_KWARGS)}
+        else:
+            obj = [entity.model_dump(**DUMP_KWARGS)]
+        return render_section_items(obj)
+
+    def build(self) -> IncrementalResult:
+        """
+        Generate the project, calling only the steps whose inputs changed.
+
+        :return: Generated project and state for the next generation.
+        """
+        previous_entities = self.previous.entities if self.previous is not None else {}
+        state = IncrementalState(generator_version=self.generator_version)
+        regenerated: List[str] = []
+        changed: List[str] = []
+        removed: List[str] = []
+        texts: Dict[str, str] = {}
+
+        for section, steps in self._entities.items():
+            previous_records = previous_entities.get(section, {})
+            records: Dict[str, EntityRecord] = {}
+            for name, (input_hash, step) in steps.items():
+                entity_id = f"{section}[{name}]"
+                record = previous_records.get(name)
+                if record is None or record.input_hash != input_hash:
+                    regenerated.append(entity_id)
+                    text = self._render(section, name, step())
+                    content_hash = hashlib.sha256(text.encode()).hexdigest()
+                    if record is None or record.content_hash != content_hash:
+                        changed.append(entity_id)
+                    record = EntityRecord(
+                        input_hash=input_hash, content_hash=content_hash, text=text
+                    )
+                records[name] = record
+            removed.extend(f"{section}[{name}]" for name in previous_records if name not in steps)
+            state.entities[section] = records
+            if records:
+                texts[section] = "".join(record.text for record in records.values())
+
+        others = EvgProject.model_validate(self._sections).model_dump(**DUMP_KWARGS)
+        parts = []
+        for key in EvgProject.model_fields:
+            if key in texts:
+                parts.append(f"{key}:\n{texts[key]}")
+            elif key in others:
+                parts.append(dump_yaml_fragment({key: others[key]}))
+        return IncrementalResult(
+            text=end_document("".join(parts)) if parts else dump_yaml({}),
+            state=state,
+            regenerated=regenerated,
+            changed=changed,
+            removed=removed,
+        )
@@ -0,0 +1,295 @@
+"""Expansion of variant and task matrices into evergreen configuration."""
+from __future__ import annotations
+
+from itertools import product
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from pydantic import BaseModel
+
+from shrub.v3.evg_build_variant import BuildVariant, DisplayTask
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_task import EvgTask, EvgTaskRef
+
+
+class AxisValue(BaseModel):
+    """
+    A value that an axis of a matrix can take.
+
+    * id: Identifier of value, used when formatting names.
+    * display_name: Human readable name of value.
+    * run_on: Distros to run on when this value is selected.
+    * expansions: Expansions to define when this value is selected.
+    * tags: Tags to attach when this value is selected.
+    * variables: Additional values made available to task factories.
+    """
+
+    id: str
+    display_name: Optional[str] = None
+    run_on: Optional[List[str]] = None
+    expansions: Optional[Dict[str, str]] = None
+    tags: Optional[List[str]] = None
+    variables: Optional[Dict[str, Any]] = None
+
+
+class MatrixAxis(BaseModel):
+    """
+    A dimension of a matrix.
+
+    * id: Identifier of axis, used as the placeholder in name templates.
+    * values: Values the axis can take.
+    """
+
+    id: str
+    values: List[AxisValue]
+
+
+# A rule matches cells by axis id and the value id (or ids) the axis must have.
+MatrixRule = Dict[str, Union[str, List[str]]]
+
+
+class MatrixCell:
+    """
+    A single combination of axis values.
+
+    Cells refer to the `AxisValue` objects of their axes, values are never copied.
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: Dict[str, AxisValue]) -> None:
+        """
+        Create a new cell.
+
+        :param values: Selected value for each axis, by axis id.
+        """
+        self.values = values
+
+    def __getitem__(self, axis_id: str) -> AxisValue:
+        return self.values[axis_id]
+
+    def __repr__(self) -> str:
+        return f"MatrixCell({', '.join(f'{k}={v.id}' for k, v in self.values.items())})"
+
+    def format(self, template: str) -> str:
+        """
+        Format the given template with the value ids of this cell.
+
+        :param template: Template with a placeholder per axis id, e.g. "{suite}_{os}".
+        :return: Formatted template.
+        """
+        return template.format(**{axis_id: value.id for axis_id, value in self.values.items()})
+
+    def format_display(self, template: str) -> str:
+        """
+        Format the given template with the display names of this cell.
+
+        :param template: Template with a placeholder per axis id.
+        :return: Formatted template.
+        """
+        return template.format(
+            **{axis_id: value.display_name or value.id for axis_id, value in self.values.items()}
+        )
+
+    @property
+    def expansions(self) -> Dict[str, str]:
+        """Merged expansions of the values in this cell, later axes take precedence."""
+        expansions: Dict[str, str] = {}
+        for value in self.values.values():
+            if value.expansions:
+                expansions.update(value.expansions)
+        return expansions
+
+    @property
+    def run_on(self) -> Optional[List[str]]:
+        """Distros of the last value in this cell that specifies any."""
+        return _last_run_on(self.values.values())
+
+    @property
+    def tags(self) -> List[str]:
+        """Tags of all values in this cell."""
+        return [tag for value in self.values.values() for tag in value.tags or []]
+
+
+class MatrixVariant(NamedTuple):
+    """A build variant generated from a matrix along with the tasks it references."""
+
+    build_variant: BuildVariant
+    tasks: List[EvgTask]
+
+
+TaskFactory = Callable[[MatrixCell], EvgTask]
+
+
+def _last_run_on(values: Iterable[AxisValue]) -> Optional[List[str]]:
+    """Get the distros of the last of the given values that specifies any."""
+    run_on = None
+    for value in values:
+        if value.run_on is not None:
+            run_on = value.run_on
+    return run_on
+
+
+def _compile_rules(rules: Optional[Sequence[MatrixRule]]) -> List[Dict[str, FrozenSet[str]]]:
+    """Convert rules into sets of matching value ids by axis."""
+    return [
+        {
+            axis_id: frozenset([value_ids] if isinstance(value_ids, str) else value_ids)
+            for axis_id, value_ids in rule.items()
+        }
+        for rule in rules or []
+    ]
+
+
+def _matches(rule: Dict[str, FrozenSet[str]], values: Dict[str, AxisValue]) -> bool:
+    """Determine if the given values match every axis of the given rule."""
+    return all(axis_id in values and values[axis_id].id in ids for axis_id, ids in rule.items())
+
+
+class EvgMatrix:
+    """
+    Expand the cartesian product of a set of axes into build variants and tasks.
+
+    Each combination of values from the variant axes becomes a build variant, and each combination
+    of values from the task axes becomes a task on that variant. Cells are produced lazily, so the
+    cost of expansion is linear in the number of generated cells.
+    """
+
+    def __init__(
+        self,
+        variant_axes: Sequence[MatrixAxis],
+        task_axes: Sequence[MatrixAxis],
+        task_factory: TaskFactory,
+        variant_name: str,
+        variant_display_name: Optional[str] = None,
+        display_task_name: Optional[str] = None,
+        exclude: Optional[Sequence[MatrixRule]] = None,
+        include: Optional[Sequence[MatrixRule]] = None,
+    ) -> None:
+        """
+        Create a new matrix.
+
+        :param variant_axes: Axes that make up the build variants.
+        :param task_axes: Axes that make up the tasks on each build variant.
+        :param task_factory: Create the task for a cell, the task name should be unique per cell.
+        :param variant_name: Template of build variant names, e.g. "{os}-{storage_engine}".
+        :param variant_display_name: Template of build variant display names.
+        :param display_task_name: Template of display task names to group tasks under.
+        :param exclude: Rules matching cells that should not be generated.
+        :param include: Rules matching cells that should be generated, all cells if not given.
+        """
+        self.variant_axes = variant_axes
+        self.task_axes = task_axes
+        self.task_factory = task_factory
+        self.variant_name = variant_name
+        self.variant_display_name = variant_display_name
+        self.display_task_name = display_task_name
+        self._exclude = _compile_rules(exclude)
+        self._include = _compile_rules(include)
+
+    def _is_selected(self, values: Dict[str, AxisValue]) -> bool:
+        """Determine if the cell with the given values should be generated."""
+        if any(_matches(rule, values) for rule in self._exclude):
+            return False
+        return not self._include or any(_matches(rule, values) for rule in self._include)
+
+    def _variant_cells(self) -> Iterator[MatrixCell]:
+        """Iterate over the combinations of variant axis values."""
+        axis_ids = [axis.id for axis in self.variant_axes]
+        for combination in product(*(axis.values for axis in self.variant_axes)):
+            yield MatrixCell(dict(zip(axis_ids, combination)))
+
+    def _task_cells(
+        self, variant_cell: MatrixCell
+    ) -> Iterator[Tuple[MatrixCell, Tuple[AxisValue, ...]]]:
+        """Iterate over the selected cells of the given variant and their task axis values."""
+        axis_ids = [axis.id for axis in self.task_axes]
+        for combination in product(*(axis.values for axis in self.task_axes)):
+            values = dict(variant_cell.values)
+            values.update(zip(axis_ids, combination))
+            if self._is_selected(values):
+                yield MatrixCell(values), combination
+
+    def cells(self) -> Iterator[MatrixCell]:
+        """Iterate over all selected cells of the matrix."""
+        for variant_cell in self._variant_cells():
+            for cell, _ in self._task_cells(variant_cell):
+                yield cell
+
+    def generate(self) -> Iterator[MatrixVariant]:
+        """
+        Lazily generate the build variants of the matrix.
+
+        Build variants without any selected cells are skipped.
+
+        :return: Iterator of generated build variants and their tasks.
+        """
+        for variant_cell in self._variant_cells():
+            tasks: List[EvgTask] = []
+            task_refs: List[EvgTaskRef] = []
+            display_tasks: Dict[str, List[str]] = {}
+
+            for cell, task_values in self._task_cells(variant_cell):
+                task = self.task_factory(cell)
+                tasks.append(task)
+
+                # Only the task axes select distros for a task, variant axes apply to the variant.
+                fields: Dict[str, Any] = {"name": task.name}
+                distros = _last_run_on(task_values)
+                if distros is not None:
+                    fields["distros"] = distros
+                # Values are validated by the axis models and shared with the reference as is.
+                task_refs.append(EvgTaskRef.model_construct(**fields))
+
+                if self.display_task_name is not None:
+                    display_name = cell.format(self.display_task_name)
+                    display_tasks.setdefault(display_name, []).append(task.name)
+
+            if not tasks:
+                continue
+
+            variant_fields: Dict[str, Any] = {
+                "name": variant_cell.format(self.variant_name),
+                "tasks": task_refs,
+            }
+            if self.variant_display_name is not None:
+                variant_fields["display_name"] = variant_cell.format_display(
+                    self.variant_display_name
+                )
+            run_on = variant_cell.run_on
+            if run_on is not None:
+                variant_fields["run_on"] = run_on
+            expansions = variant_cell.expansions
+            if expansions:
+                variant_fields["expansions"] = expansions
+            tags = variant_cell.tags
+            if tags:
+                variant_fields["tags"] = tags
+            if display_tasks:
+                variant_fields["display_tasks"] = [
+                    DisplayTask.model_construct(name=name, execution_tasks=execution_tasks)
+                    for name, execution_tasks in display_tasks.items()
+                ]
+
+            yield MatrixVariant(BuildVariant.model_construct(**variant_fields), tasks)
+
+    def to_project(self) -> EvgProject:
+        """Expand the whole matrix into a project."""
+        build_variants = []
+        tasks = []
+        for matrix_variant in self.generate():
+            build_variants.append(matrix_variant.build_variant)
+            tasks.extend(matrix_variant.tasks)
+        return EvgProject(buildvariants=build_variants, tasks=tasks)
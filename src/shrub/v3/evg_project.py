@@ -2,17 +2,22 @@
 from __future__ import annotations
 
 import re
-from typing import List, Optional, Dict, Union
+from typing import TYPE_CHECKING, Iterable, List, Optional, Dict, Set, Union
 
-import yaml
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
+from shrub.compressed_io import load_file
 from shrub.v3.evg_build_variant import BuildVariant
-from shrub.v3.evg_command import EvgCommandType, EvgCommand
+from shrub.v3.evg_command import EvgCommandType, EvgCommand, FunctionCall
 from shrub.v3.evg_task import EvgTask
 from shrub.v3.evg_task_group import EvgTaskGroup
 
+if TYPE_CHECKING:
+    from shrub.v3.evg_project_stats import ProjectStats
+
 REPO_NAME_REGEX = re.compile(r"[/|:](?P<repo_name>[\w\-.]+?)(\.git|/)?$")
+# Task references matching every task.
+WILDCARD = "*"
 
 
 class EvgParameter(BaseModel):
@@ -55,6 +60,23 @@ class EvgModule(BaseModel):
 FunctionDefinition = Union[EvgCommand, List[EvgCommand]]
 
 
+class EvgReferenceError(BaseModel):
+    """
+    A reference to an entity that is not defined.
+
+    * location: Where the reference is made, e.g. "buildvariants[linux-64].tasks".
+    * kind: Kind of entity referenced, e.g. "task" or "function".
+    * name: Name of the entity referenced.
+    """
+
+    location: str
+    kind: str
+    name: str
+
+    def __str__(self) -> str:
+        return f"{self.location}: undefined {self.kind} '{self.name}'"
+
+
 class EvgProject(BaseModel):
     """
     Configuration for an evergreen project.
@@ -90,8 +112,126 @@ class EvgProject(BaseModel):
     ignore: Optional[List[str]] = None
     parameters: Optional[List[EvgParameter]] = None
 
+    model_config = ConfigDict(use_enum_values=True)
+
+    def validate_references(
+        self,
+        known_tasks: Optional[Iterable[str]] = None,
+        known_functions: Optional[Iterable[str]] = None,
+    ) -> List[EvgReferenceError]:
+        """
+        Find references to tasks, task groups, functions and tags that are not defined.
+
+        Name indexes are built once and every reference is checked in a single pass, so all
+        errors are reported together.
+
+        :param known_tasks: Names of tasks defined outside of this project, e.g. in the project
+            running generate.tasks.
+        :param known_functions: Names of functions defined outside of this project.
+        :return: List of undefined references.
+        """
+        external_tasks = set(known_tasks or [])
+        tasks = {task.name for task in self.tasks or []}
+        tasks.update(external_tasks)
+        task_groups = {group.name: group for group in self.task_groups or []}
+        functions = set(self.functions or {})
+        functions.update(known_functions or [])
+        project_tasks = {task.name for task in self.tasks or []}
+        tagged_tasks: Dict[str, Set[str]] = {}
+        for task in self.tasks or []:
+            for tag in task.tags or []:
+                tagged_tasks.setdefault(tag, set()).add(task.name)
+        errors: List[EvgReferenceError] = []
+
+        def check_commands(location: str, commands: Optional[List[EvgCommand]]) -> None:
+            for command in commands or []:
+                if isinstance(command, FunctionCall) and command.func not in functions:
+                    errors.append(
+                        EvgReferenceError(location=location, kind="function", name=command.func)
+                    )
+
+        def check_task(location: str, name: str) -> None:
+            if name != WILDCARD and name not in tasks:
+                errors.append(EvgReferenceError(location=location, kind="task", name=name))
+
+        def resolve_selector(location: str, selector: str) -> Set[str]:
+            # Selectors are made of criteria like ".tag", "!.tag" or "name" that must all match,
+            # the same way as `select_tasks` but using the tag index.
+            selected = set(project_tasks)
+            for criterion in selector.split():
+                negated = criterion.startswith("!")
+                criterion = criterion.lstrip("!")
+                if criterion.startswith("."):
+                    tag = criterion[1:]
+                    if tag not in tagged_tasks:
+                        errors.append(EvgReferenceError(location=location, kind="tag", name=tag))
+                    matching = tagged_tasks.get(tag, set())
+                else:
+                    matching = {criterion} & project_tasks
+                selected = selected - matching if negated else selected & matching
+            return selected
+
+        for key in ("pre", "post", "timeout"):
+            check_commands(key, getattr(self, key))
+
+        for task in self.tasks or []:
+            location = f"tasks[{task.name}]"
+            check_commands(f"{location}.commands", task.commands)
+            for dependency in task.depends_on or []:
+                check_task(f"{location}.depends_on", dependency.name)
+
+        for group in task_groups.values():
+            location = f"task_groups[{group.name}]"
+            for name in group.tasks:
+                check_task(f"{location}.tasks", name)
+            for key in ("setup_group", "setup_task", "teardown_task", "teardown_group", "timeout"):
+                check_commands(f"{location}.{key}", getattr(group, key))
+
+        for variant in self.buildvariants or []:
+            location = f"buildvariants[{variant.name}]"
+            variant_tasks: Set[str] = set()
+            for ref in variant.tasks:
+                if ref.name.startswith((".", "!")):
+                    variant_tasks.update(resolve_selector(f"{location}.tasks", ref.name))
+                elif ref.name in task_groups:
+                    variant_tasks.add(ref.name)
+                    variant_tasks.update(task_groups[ref.name].tasks)
+                else:
+                    check_task(f"{location}.tasks", ref.name)
+                    variant_tasks.add(ref.name)
+                for dependency in ref.depends_on or []:
+                    check_task(f"{location}.tasks[{ref.name}].depends_on", dependency.name)
+            for display_task in variant.display_tasks or []:
+                display_location = f"{location}.display_tasks[{display_task.name}]"
+                for name in display_task.execution_tasks:
+                    # Tasks defined elsewhere may already be part of the variant.
+                    if name not in variant_tasks and name not in external_tasks:
+                        errors.append(
+                            EvgReferenceError(
+                                location=display_location, kind="variant task", name=name
+                            )
+                        )
+
+        return errors
+
+    def stats(self, top: int = 10) -> ProjectStats:
+        """
+        Compute statistics of this project, attributing the bytes of its yaml to its parts.
+
+        :param top: Number of entries to report in lists of the largest entities.
+        :return: Statistics of project.
+        """
+        # The statistics depend on the yaml rendering, which depends on this module.
+        from shrub.v3.evg_project_stats import project_stats
+
+        return project_stats(self, top)
+
     @classmethod
     def from_file(cls, file_location: str) -> EvgProject:
-        """Read and parse the evergreen configuration of the given file."""
-        with open(file_location) as contents:
-            return cls(**yaml.safe_load(contents))
+        """
+        Read and parse the evergreen configuration of the given file.
+
+        Files ending in `.gz` or `.zst` are decompressed while they are read. JSON files are
+        parsed with the json module, other files with the libyaml bindings when available.
+        """
+        return cls(**load_file(file_location))
@@ -0,0 +1,266 @@
+"""Statistics of an evergreen project and attribution of its yaml size."""
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple
+
+from pydantic import BaseModel
+
+from shrub.v3.evg_command import FunctionCall
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.shrub_service import (
+    DUMP_KWARGS,
+    PARALLEL_SECTIONS,
+    SharedCommandRenderer,
+    dump_yaml_fragment,
+    end_document,
+    render_section_items,
+)
+
+# Number of entries reported in lists of the largest or most duplicated entities.
+DEFAULT_TOP_COUNT = 10
+# Command type reported for calls to functions.
+FUNCTION_CALL = "func"
+
+
+class Distribution(BaseModel):
+    """
+    Distribution of a set of values.
+
+    * count: Number of values.
+    * total: Sum of values.
+    * mean: Mean of values.
+    * median: Median of values.
+    * p90: 90th percentile of values.
+    * max: Largest value.
+    """
+
+    count: int = 0
+    total: int = 0
+    mean: float = 0.0
+    median: int = 0
+    p90: int = 0
+    max: int = 0
+
+    @classmethod
+    def of(cls, values: Iterable[int]) -> "Distribution":
+        """
+        Get the distribution of the given values.
+
+        :param values: Values to describe.
+        :return: Distribution of values.
+        """
+        ordered = sorted(values)
+        if not ordered:
+            return cls()
+        return cls(
+            count=len(ordered),
+            total=sum(ordered),
+            mean=sum(ordered) / len(ordered),
+            median=ordered[(len(ordered) - 1) // 2],
+            p90=ordered[(len(ordered) - 1) * 9 // 10],
+            max=ordered[-1],
+        )
+
+
+class EntitySize(BaseModel):
+    """
+    Size of an entity of a project.
+
+    * name: Name of entity.
+    * size: Bytes of yaml generated for entity.
+    """
+
+    name: str
+    size: int
+
+
+class DuplicatedCommand(BaseModel):
+    """
+    A command body repeated across tasks.
+
+    * command: Type of command, the function name for function calls.
+    * count: Number of times the command is used.
+    * size: Bytes of yaml generated for a single use of the command.
+    * total_size: Bytes of yaml generated for all uses of the command.
+    """
+
+    command: str
+    count: int
+    size: int
+    total_size: int
+
+
+class ExpansionSize(BaseModel):
+    """
+    Size of an expansion across a project.
+
+    * name: Name of expansion.
+    * count: Number of build variants and function calls setting the expansion.
+    * total_size: Bytes of the names and values of all settings of the expansion.
+    """
+
+    name: str
+    count: int
+    total_size: int
+
+
+class ProjectStats(BaseModel):
+    """
+    Statistics of a project, with the bytes of yaml generated for each part of it.
+
+    * counts: Number of entities of each section, and of task commands.
+    * commands_per_task: Distribution of the number of commands of tasks.
+    * total_size: Bytes of yaml generated for the project.
+    * section_sizes: Bytes of yaml generated for each section.
+    * task_sizes: Distribution of bytes generated for tasks.
+    * variant_sizes: Distribution of bytes generated for build variants.
+    * function_sizes: Distribution of bytes generated for functions.
+    * command_type_sizes: Bytes generated for task commands of each type, largest first.
+    * largest_tasks: Tasks generating the most bytes.
+    * largest_variants: Build variants generating the most bytes.
+    * largest_functions: Functions generating the most bytes.
+    * duplicated_commands: Task commands whose repetition generates the most bytes.
+    * largest_expansions: Expansions with the largest total size.
+    """
+
+    counts: Dict[str, int]
+    commands_per_task: Distribution
+    total_size: int
+    section_sizes: Dict[str, int]
+    task_sizes: Distribution
+    variant_sizes: Distribution
+    function_sizes: Distribution
+    command_type_sizes: Dict[str, int]
+    largest_tasks: List[EntitySize]
+    largest_variants: List[EntitySize]
+    largest_functions: List[EntitySize]
+    duplicated_commands: List[DuplicatedCommand]
+    largest_expansions: List[ExpansionSize]
+
+
+def _size(text: str) -> int:
+    """Get the size of the given text in bytes."""
+    return len(text.encode())
+
+
+def _largest(sizes: Dict[str, int], top: int) -> List[EntitySize]:
+    """Get the largest of the given entity sizes."""
+    largest = sorted(sizes.items(), key=lambda item: -item[1])[:top]
+    return [EntitySize(name=name, size=size) for name, size in largest]
+
+
+def _command_type(command: Any) -> str:
+    """Get the type of the given command."""
+    if isinstance(command, FunctionCall):
+        return FUNCTION_CALL
+    return command.command
+
+
+def _command_name(command: Any) -> str:
+    """Get the type of the given command, or the name of the function it calls."""
+    if isinstance(command, FunctionCall):
+        return command.func
+    return command.command
+
+
+def _add_expansions(expansions: Dict[str, Tuple[int, int]], values: Dict[str, Any]) -> None:
+    """Add the number of settings and size of the given expansion values."""
+    for name, value in values.items():
+        settings, total = expansions.get(name, (0, 0))
+        expansions[name] = (settings + 1, total + _size(name) + _size(str(value)))
+
+
+def project_stats(project: EvgProject, top: int = DEFAULT_TOP_COUNT) -> ProjectStats:
+    """
+    Compute the statistics of the given project.
+
+    Every build variant, task, function and other section is rendered once, on its own. Items of
+    a section render the same on their own as within the whole project, so their sizes add up to
+    the size of the generated yaml. The commands of tasks are rendered separately from the rest of
+    each task, and commands shared between tasks are only rendered once.
+
+    :param project: Project to compute statistics of.
+    :param top: Number of entries to report in lists of the largest entities.
+    :return: Statistics of project.
+    """
+    project_obj = project.model_dump(exclude={"tasks": {"__all__": {"commands"}}}, **DUMP_KWARGS)
+    tasks = project.tasks or []
+    all_commands = [command for task in tasks for command in task.commands or []]
+    renderer = SharedCommandRenderer({id(command) for command in all_commands})
+
+    section_sizes: Dict[str, int] = {}
+    entity_sizes: Dict[str, Dict[str, int]] = {key: {} for key in PARALLEL_SECTIONS}
+    command_type_sizes: Counter = Counter()
+    command_counts: Counter = Counter()
+    command_names: Dict[str, str] = {}
+    expansions: Dict[str, Tuple[int, int]] = {}
+    tail = ""
+
+    for key, value in project_obj.items():
+        if key not in PARALLEL_SECTIONS or not value:
+            text = dump_yaml_fragment({key: value})
+            section_sizes[key] = _size(text)
+            tail = (tail + text)[-2:]
+            continue
+
+        sizes = entity_sizes[key]
+        if key == "tasks":
+            for task, task_obj in zip(tasks, value):
+                text = renderer.render_task(task, task_obj)
+                sizes[task.name] = _size(text)
+                for command in task.commands or []:
+                    command_text = renderer.render_command(command)
+                    command_type_sizes[_command_type(command)] += _size(command_text)
+                    command_counts[command_text] += 1
+                    command_names[command_text] = _command_name(command)
+                    if isinstance(command, FunctionCall) and command.vars:
+                        _add_expansions(expansions, command.vars)
+        elif key == "functions":
+            for name, definition in value.items():
+                text = render_section_items({name: definition})
+                sizes[name] = _size(text)
+        else:
+            for item in value:
+                text = render_section_items([item])
+                sizes[item["name"]] = _size(text)
+        section_sizes[key] = _size(f"{key}:\n") + sum(sizes.values())
+        tail = (tail + text)[-2:]
+
+    for variant in project.buildvariants or []:
+        _add_expansions(expansions, variant.expansions or {})
+
+    duplicated = [
+        DuplicatedCommand(
+            command=command_names[text],
+            count=count,
+            size=_size(text),
+            total_size=_size(text) * count,
+        )
+        for text, count in command_counts.items()
+        if count > 1
+    ]
+    duplicated.sort(key=lambda command: -command.total_size)
+    largest_expansions = sorted(expansions.items(), key=lambda item: -item[1][1])[:top]
+
+    counts = {key: len(project_obj.get(key) or []) for key in sorted(PARALLEL_SECTIONS)}
+    counts["commands"] = len(all_commands)
+    total_size = sum(section_sizes.values())
+    if total_size:
+        total_size += _size(end_document(tail)[len(tail) :])
+    return ProjectStats(
+        counts=counts,
+        commands_per_task=Distribution.of(len(task.commands or []) for task in tasks),
+        total_size=total_size,
+        section_sizes=section_sizes,
+        task_sizes=Distribution.of(entity_sizes["tasks"].values()),
+        variant_sizes=Distribution.of(entity_sizes["buildvariants"].values()),
+        function_sizes=Distribution.of(entity_sizes["functions"].values()),
+        command_type_sizes=dict(command_type_sizes.most_common()),
+        largest_tasks=_largest(entity_sizes["tasks"], top),
+        largest_variants=_largest(entity_sizes["buildvariants"], top),
+        largest_functions=_largest(entity_sizes["functions"], top),
+        duplicated_commands=duplicated[:top],
+        largest_expansions=[
+            ExpansionSize(name=name, count=count, total_size=size)
+            for name, (count, size) in largest_expansions
+        ],
+    )
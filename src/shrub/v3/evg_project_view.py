@@ -0,0 +1,428 @@
+"""Read-only, index-backed view of an evergreen project file."""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+from bisect import bisect_left
+from functools import lru_cache
+from types import TracebackType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+import yaml
+from pydantic import BaseModel, TypeAdapter
+
+from shrub.v3.evg_build_variant import BuildVariant
+from shrub.v3.evg_project import FunctionDefinition
+from shrub.v3.evg_task import EvgTask
+from shrub.v3.evg_task_group import EvgTaskGroup
+
+# Prefer the libyaml bindings when they are available.
+_SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Sections that hold a list of named entities.
+NAMED_LIST_SECTIONS = ("buildvariants", "tasks", "task_groups")
+# Sections that hold a mapping of named entities.
+NAMED_MAP_SECTIONS = ("functions",)
+
+DEFAULT_CACHE_SIZE = 128
+
+# Span of an entity in the mapped file: (start byte, end byte, start column).
+Span = Tuple[int, int, int]
+# Use of an alias in the mapped file: (start byte, name of anchor).
+AliasUse = Tuple[int, str]
+
+
+class ProjectIndex(BaseModel):
+    """
+    Byte offsets of the entities in a project file.
+
+    * sections: Span of each top-level section by key.
+    * entities: Span of each named entity by section and name.
+    * anchors: Spans of the nodes defining each yaml anchor by name, in file order. An anchor
+      can be defined more than once, aliases refer to the last definition before them.
+    * aliases: Every use of a yaml alias, in file order.
+    """
+
+    sections: Dict[str, Span] = {}
+    entities: Dict[str, Dict[str, Span]] = {}
+    anchors: Dict[str, List[Span]] = {}
+    aliases: List[AliasUse] = []
+
+
+class _OffsetTranslator:
+    """Translate the character offsets reported by the yaml parser into byte offsets."""
+
+    def __init__(self, buffer: Any, is_ascii: bool) -> None:
+        """
+        Create a new translator.
+
+        :param buffer: Buffer of utf-8 encoded bytes.
+        :param is_ascii: True if every byte in the buffer is ascii.
+        """
+        self._buffer = buffer
+        self._is_ascii = is_ascii
+        self._char_pos = 0
+        self._byte_pos = 0
+
+    def to_byte(self, char_index: int) -> int:
+        """
+        Get the byte offset of the given character offset.
+
+        Offsets must be requested in non-decreasing order so the total work done is linear in the
+        size of the buffer.
+
+        :param char_index: Character offset to translate.
+        :return: Byte offset of the character.
+        """
+        if self._is_ascii:
+            return char_index
+        delta = char_index - self._char_pos
+        if delta > 0:
+            chunk = self._buffer[self._byte_pos : self._byte_pos + 4 * delta]
+            prefix = chunk.decode("utf-8", errors="ignore")[:delta]
+            self._byte_pos += len(prefix.encode("utf-8"))
+            self._char_pos = char_index
+        return self._byte_pos
+
+
+def _is_ascii(buffer: Any, chunk_size: int = 1 << 20) -> bool:
+    """Determine if the given buffer only contains ascii bytes."""
+    for start in range(0, len(buffer), chunk_size):
+        if not buffer[start : start + chunk_size].isascii():
+            return False
+    return True
+
+
+def build_index(buffer: Any) -> ProjectIndex:
+    """
+    Build an index of the top-level sections and named entities of a project.
+
+    The buffer is scanned once with the yaml event parser, no python objects are constructed for
+    the content of the project. Yaml anchors and the aliases using them are recorded too, so
+    entities can be decoded on their own when they use an anchor defined elsewhere in the file.
+
+    :param buffer: Buffer containing a yaml or json evergreen configuration.
+    :return: Index of the entities in the buffer.
+    """
+    index = ProjectIndex()
+    if len(buffer) == 0:
+        return index
+    translator = _OffsetTranslator(buffer, _is_ascii(buffer))
+    if hasattr(buffer, "seek"):
+        buffer.seek(0)
+
+    depth = 0
+    # Position in the key/value pairs of the mapping at depth 1, 2 and 3.
+    is_key = {1: True, 2: True, 3: True}
+    section: Optional[str] = None
+    # Byte offset and column of the section and entity being scanned.
+    section_start: Optional[Tuple[int, int]] = None
+    entity_start: Optional[Tuple[int, int]] = None
+    entity_name: Optional[str] = None
+    entity_key: Optional[str] = None
+    # Anchors of the collections being scanned: (name, byte offset, column, depth).
+    open_anchors: List[Tuple[str, int, int, int]] = []
+
+    for event in yaml.parse(buffer, Loader=_SafeLoader):
+        is_start = isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent))
+        is_end = isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent))
+        is_leaf = isinstance(event, (yaml.ScalarEvent, yaml.AliasEvent))
+
+        if is_end:
+            depth -= 1
+
+        if is_start or is_leaf:
+            # Start of a node at the current depth.
+            start = (translator.to_byte(event.start_mark.index), event.start_mark.column)
+            if isinstance(event, yaml.AliasEvent):
+                index.aliases.append((start[0], event.anchor))
+            elif event.anchor is not None:
+                open_anchors.append((event.anchor, start[0], start[1], depth))
+            if depth == 1:
+                if is_key[1]:
+                    section = getattr(event, "value", None)
+                else:
+                    section_start = start
+            elif depth == 2 and section in NAMED_LIST_SECTIONS:
+                entity_start = start
+                entity_name = None
+                is_key[3] = True
+            elif depth == 2 and section in NAMED_MAP_SECTIONS:
+                if is_key[2]:
+                    entity_name = getattr(event, "value", None)
+                else:
+                    entity_start = start
+            elif depth == 3 and section in NAMED_LIST_SECTIONS and entity_start is not None:
+                value = event.value if isinstance(event, yaml.ScalarEvent) else None
+                if is_key[3]:
+                    entity_key = value
+                elif entity_key == "name" and entity_name is None:
+                    entity_name = value
+                is_key[3] = not is_key[3]
+
+        if is_end or is_leaf:
+            # End of a node at the current depth.
+            end = translator.to_byte(event.end_mark.index)
+            if open_anchors and open_anchors[-1][3] == depth:
+                anchor, anchor_start, anchor_column, _ = open_anchors.pop()
+                index.anchors.setdefault(anchor, []).append((anchor_start, end, anchor_column))
+            if depth == 1:
+                if not is_key[1] and section is not None and section_start is not None:
+                    index.sections[section] = (section_start[0], end, section_start[1])
+                is_key[1] = not is_key[1]
+            elif depth == 2 and section in NAMED_MAP_SECTIONS:
+                if not is_key[2] and entity_name is not None and entity_start is not None:
+                    _record(index, section, entity_name, entity_start, end)
+                is_key[2] = not is_key[2]
+            elif depth == 2 and section in NAMED_LIST_SECTIONS:
+                if entity_name is not None and entity_start is not None:
+                    _record(index, section, entity_name, entity_start, end)
+                entity_start = None
+
+        if is_start:
+            depth += 1
+            if depth == 2:
+                is_key[2] = True
+
+    for definitions in index.anchors.values():
+        # Nested definitions end, and so are recorded, before the nodes containing them.
+        definitions.sort()
+    return index
+
+
+def _record(index: ProjectIndex, section: str, name: str, start: Tuple[int, int], end: int) -> None:
+    """
+    Record the span of a named entity.
+
+    :param index: Index to record span in.
+    :param section: Section containing entity.
+    :param name: Name of entity.
+    :param start: Byte offset and column of the start of the entity.
+    :param end: Byte offset of the end of the entity.
+    """
+    index.entities.setdefault(section, {})[name] = (start[0], end, start[1])
+
+
+class EvgProjectView:
+    """
+    A read-only view of an evergreen project file.
+
+    The file is memory-mapped and indexed once on open. Tasks, build variants, task groups and
+    functions are only decoded into shrub.v3 models when they are looked up, and a small LRU cache
+    of decoded entities is kept. Because the file is mapped read-only, several processes viewing
+    the same file share its pages through the page cache.
+
+    Models returned by the view are shared with its cache and should not be modified.
+    """
+
+    def __init__(
+        self,
+        file_location: str,
+        index: Optional[ProjectIndex] = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        """
+        Open a view of the given project file.
+
+        :param file_location: Path to yaml or json evergreen configuration.
+        :param index: Previously built index of the file, built on open if not given.
+        :param cache_size: Max number of decoded entities to keep.
+        """
+        self.file_location = file_location
+        self._is_json = file_location.endswith(".json")
+        self._file = open(file_location, "rb")
+        self._buffer: Any = b""
+        if os.fstat(self._file.fileno()).st_size > 0:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index = index if index is not None else build_index(self._buffer)
+        self._decode_entity: Callable[[str, str], Any] = lru_cache(maxsize=cache_size)(
+            self._decode_entity_uncached
+        )
+
+    def __enter__(self) -> EvgProjectView:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the mapping of the project file."""
+        self._decode_entity.cache_clear()  # type: ignore[attr-defined]
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._file.close()
+
+    def names(self, section: str) -> List[str]:
+        """
+        Get the names of entities in the given section.
+
+        :param section: Section to query, e.g. "tasks" or "functions".
+        :return: Names of entities in file order.
+        """
+        return list(self.index.entities.get(section, {}))
+
+    def iter_tasks(self) -> Iterator[EvgTask]:
+        """Iterate over all tasks in the project, decoding them one at a time."""
+        for name in self.names("tasks"):
+            yield self.task(name)
+
+    def task(self, name: str) -> EvgTask:
+        """
+        Get the task with the given name.
+
+        :param name: Name of task.
+        :return: Decoded task.
+        """
+        return self._decode_entity("tasks", name)
+
+    def build_variant(self, name: str) -> BuildVariant:
+        """
+        Get the build variant with the given name.
+
+        :param name: Name of build variant.
+        :return: Decoded build variant.
+        """
+        return self._decode_entity("buildvariants", name)
+
+    def task_group(self, name: str) -> EvgTaskGroup:
+        """
+        Get the task group with the given name.
+
+        :param name: Name of task group.
+        :return: Decoded task group.
+        """
+        return self._decode_entity("task_groups", name)
+
+    def function(self, name: str) -> FunctionDefinition:
+        """
+        Get the definition of the function with the given name.
+
+        :param name: Name of function.
+        :return: Decoded function definition.
+        """
+        return self._decode_entity("functions", name)
+
+    def section(self, key: str) -> Any:
+        """
+        Get the raw content of a top-level section.
+
+        :param key: Key of the section, e.g. "pre" or "modules".
+        :return: Parsed content of the section.
+        """
+        if key not in self.index.sections:
+            raise KeyError(key)
+        return self._load(self.index.sections[key])
+
+    def _text(self, span: Span) -> str:
+        """Get the yaml content of the given span."""
+        start, end, column = span
+        # Re-indent the first line so block content lines up with the lines that follow it.
+        return " " * column + self._buffer[start:end].decode("utf-8")
+
+    def _load(self, span: Span) -> Any:
+        """Parse the content of the given span."""
+        if self._is_json:
+            return json.loads(self._buffer[span[0] : span[1]])
+        if not self._external_anchors(span) and not self._redefines_anchor(span):
+            return yaml.load(self._text(span), Loader=_SafeLoader)
+        loader = _AliasLoader(self._text(span), self._compose_anchors(span, {}))
+        try:
+            return loader.get_single_data()
+        finally:
+            loader.dispose()
+
+    def _definition(self, name: str, offset: int) -> Optional[Span]:
+        """Get the span of the definition of the named anchor an alias at the given offset uses."""
+        definitions = self.index.anchors.get(name, [])
+        position = bisect_left(definitions, (offset,))
+        return definitions[position - 1] if position else None
+
+    def _external_anchors(self, span: Span) -> Dict[str, Span]:
+        """Get the definitions of the anchors used in the given span but defined outside of it."""
+        start, end, _ = span
+        aliases = self.index.aliases
+        external = {}
+        for offset, name in aliases[bisect_left(aliases, (start,)) : bisect_left(aliases, (end,))]:
+            definition = self._definition(name, offset)
+            if definition is None:
+                raise yaml.composer.ComposerError(None, None, f"found undefined alias '{name}'")
+            if not start <= definition[0] < end:
+                # Aliases of the span before a redefinition within it use the same definition.
+                external.setdefault(name, definition)
+        return external
+
+    def _redefines_anchor(self, span: Span) -> bool:
+        """Determine if the given span contains a definition of an anchor defined more than once."""
+        start, end, _ = span
+        return any(
+            start <= definition[0] < end
+            for definitions in self.index.anchors.values()
+            if len(definitions) > 1
+            for definition in definitions
+        )
+
+    def _compose_anchors(self, span: Span, composed: Dict[int, yaml.Node]) -> Dict[str, yaml.Node]:
+        """
+        Compose the nodes of the anchors used in the given span but defined outside of it.
+
+        :param span: Span of content to compose anchors of.
+        :param composed: Nodes of anchor definitions already composed, by start byte.
+        :return: Nodes of the anchors needed by the span, by name.
+        """
+        anchors = {}
+        for name, definition in self._external_anchors(span).items():
+            if definition[0] not in composed:
+                loader = _AliasLoader(
+                    self._text(definition), self._compose_anchors(definition, composed)
+                )
+                try:
+                    composed[definition[0]] = loader.get_single_node()
+                finally:
+                    loader.dispose()
+            anchors[name] = composed[definition[0]]
+        return anchors
+
+    def _decode_entity_uncached(self, section: str, name: str) -> Any:
+        """Decode the named entity of the given section into a model."""
+        span = self.index.entities.get(section, {}).get(name)
+        if span is None:
+            raise KeyError(f"'{name}' not found in {section}")
+        data = self._load(span)
+        if section == "functions":
+            return _FUNCTION_ADAPTER.validate_python(data)
+        return _SECTION_MODELS[section](**data)
+
+
+class _AliasLoader(yaml.SafeLoader):
+    """Yaml loader resolving aliases to anchors composed from another part of the file."""
+
+    def __init__(self, stream: str, anchors: Dict[str, yaml.Node]) -> None:
+        """
+        Create a new loader.
+
+        :param stream: Yaml content to load.
+        :param anchors: Nodes of the anchors defined outside of the content, by name.
+        """
+        super().__init__(stream)
+        self.anchors = dict(anchors)
+
+    def compose_node(self, parent: Optional[yaml.Node], index: Any) -> Optional[yaml.Node]:
+        event = self.peek_event()
+        if not isinstance(event, yaml.AliasEvent) and event.anchor is not None:
+            # Yaml allows redefining an anchor, later aliases refer to the new definition.
+            self.anchors.pop(event.anchor, None)
+        return super().compose_node(parent, index)
+
+
+_SECTION_MODELS: Dict[str, Type[BaseModel]] = {
+    "buildvariants": BuildVariant,
+    "tasks": EvgTask,
+    "task_groups": EvgTaskGroup,
+}
+_FUNCTION_ADAPTER: TypeAdapter = TypeAdapter(FunctionDefinition)
@@ -0,0 +1,91 @@
+"""Historical runtimes of evergreen tasks read from local history files."""
+import csv
+import json
+import os
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+# Columns, or keys, of history records.
+NAME_KEY = "name"
+RUNTIME_KEY = "runtime"
+
+
+class RuntimeHistory:
+    """
+    Estimated runtimes, in seconds, of tasks.
+
+    History files are either JSON or CSV. JSON files contain an object mapping task names to
+    runtimes or a list of `{"name": ..., "runtime": ...}` records. CSV files have a header with
+    `name` and `runtime` columns. When a task has several records, its runtime is the mean of them.
+    """
+
+    def __init__(self, runtimes: Mapping[str, float], default: Optional[float] = None) -> None:
+        """
+        Create a new history.
+
+        :param runtimes: Runtime of each task.
+        :param default: Runtime of tasks without history, the mean runtime if not given.
+        """
+        self.runtimes: Dict[str, float] = dict(runtimes)
+        if default is None:
+            default = sum(self.runtimes.values()) / len(self.runtimes) if self.runtimes else 0.0
+        self.default = default
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable[Tuple[str, float]], default: Optional[float] = None
+    ) -> "RuntimeHistory":
+        """
+        Create a history from runtime records, averaging the records of each task.
+
+        :param records: Pairs of task name and runtime.
+        :param default: Runtime of tasks without history, the mean runtime if not given.
+        :return: History of the given records.
+        """
+        totals: Dict[str, float] = {}
+        counts: Dict[str, int] = {}
+        for name, runtime in records:
+            totals[name] = totals.get(name, 0.0) + runtime
+            counts[name] = counts.get(name, 0) + 1
+        return cls({name: total / counts[name] for name, total in totals.items()}, default)
+
+    @classmethod
+    def from_file(cls, file_location: str, default: Optional[float] = None) -> "RuntimeHistory":
+        """
+        Read a history from a JSON or CSV file.
+
+        :param file_location: Path of history file, read as CSV if it ends in `.csv`.
+        :param default: Runtime of tasks without history, the mean runtime if not given.
+        :return: History read from the file.
+        """
+        with open(file_location, newline="") as history_file:
+            if os.path.splitext(file_location)[1].lower() == ".csv":
+                records = [
+                    (row[NAME_KEY], float(row[RUNTIME_KEY])) for row in csv.DictReader(history_file)
+                ]
+            else:
+                records = list(_json_records(json.load(history_file)))
+        return cls.from_records(records, default)
+
+    def __contains__(self, task_name: str) -> bool:
+        return task_name in self.runtimes
+
+    def __len__(self) -> int:
+        return len(self.runtimes)
+
+    def estimate(self, task_name: str) -> float:
+        """
+        Estimate the runtime of the given task.
+
+        :param task_name: Name of task.
+        :return: Runtime of task in seconds, the default runtime if the task has no history.
+        """
+        return self.runtimes.get(task_name, self.default)
+
+
+def _json_records(data: Any) -> Iterable[Tuple[str, float]]:
+    """Get the runtime records of the given JSON history."""
+    if isinstance(data, dict):
+        return ((name, float(runtime)) for name, runtime in data.items())
+    if isinstance(data, list):
+        return ((record[NAME_KEY], float(record[RUNTIME_KEY])) for record in data)
+    raise ValueError(f"Unsupported runtime history of type '{type(data).__name__}'")
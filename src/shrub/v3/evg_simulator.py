@@ -0,0 +1,281 @@
+"""Discrete-event simulation of evergreen scheduling the tasks of a project."""
+import heapq
+import math
+from collections import deque
+from typing import Deque, Dict, List, Mapping, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_runtime_history import RuntimeHistory
+from shrub.v3.evg_task_graph import TaskGraph
+
+# Distro of tasks without a run_on.
+DEFAULT_DISTRO = "default"
+
+# Kinds of requests for a host, and of events.
+_TASK = 0
+_TASK_GROUP = 1
+_TASK_FINISHED = 0
+_HOST_READY = 1
+
+
+class DistroReport(BaseModel):
+    """
+    Simulated use of the hosts of a distro.
+
+    * hosts: Number of hosts in the pool, None if unlimited.
+    * tasks: Number of tasks run.
+    * busy_time: Total time hosts spent setting up and running tasks.
+    * utilisation: Fraction of the time of the pool spent busy, None if unlimited.
+    * mean_queue_time: Mean time tasks waited for a host after being ready to run.
+    * max_queue_time: Longest time a task waited for a host after being ready to run.
+    """
+
+    hosts: Optional[int]
+    tasks: int
+    busy_time: float
+    utilisation: Optional[float]
+    mean_queue_time: float
+    max_queue_time: float
+
+
+class SimulationReport(BaseModel):
+    """
+    Result of simulating a project.
+
+    * makespan: Time until the last task finished.
+    * tasks: Number of tasks run.
+    * mean_queue_time: Mean time tasks waited for a host after being ready to run.
+    * max_queue_time: Longest time a task waited for a host after being ready to run.
+    * distros: Use of the hosts of each distro.
+    """
+
+    makespan: float
+    tasks: int
+    mean_queue_time: float
+    max_queue_time: float
+    distros: Dict[str, DistroReport]
+
+
+class _TaskGroupState:
+    """State of a task group run on a build variant."""
+
+    __slots__ = ("nodes", "distro", "max_hosts", "share_processes", "next", "hosts", "idle")
+
+    def __init__(self, nodes: List[int], distro: str, max_hosts: int, share_processes: bool):
+        self.nodes = nodes
+        self.distro = distro
+        self.max_hosts = max_hosts
+        self.share_processes = share_processes
+        # Position of the next task to dispatch.
+        self.next = 0
+        # Hosts held by the task group, including requested ones, and those waiting for a task.
+        self.hosts = 0
+        self.idle = 0
+
+
+class Simulator:
+    """
+    Simulate evergreen running the tasks of a project on limited pools of hosts.
+
+    Each distro has a pool of hosts, tasks run on the distro of their build variant task ref, task
+    or build variant. Tasks become ready once all the tasks they depend on finished and wait in
+    their distro's queue for a free host. Standalone tasks release their host once done. A task
+    group holds up to `max_hosts` hosts, which run its tasks in order, waiting for the next task
+    to be ready, and are only released once all tasks of the group are dispatched.
+
+    Every host spends `host_setup_time` before running its first task, and every task spends
+    `task_overhead` setting up and cleaning up, unless it is part of a task group sharing
+    processes.
+    """
+
+    def __init__(
+        self,
+        project: EvgProject,
+        runtimes: Union[RuntimeHistory, Mapping[str, float]],
+        distro_hosts: Optional[Mapping[str, int]] = None,
+        default_hosts: Optional[int] = None,
+        host_setup_time: float = 0.0,
+        task_overhead: float = 0.0,
+    ) -> None:
+        """
+        Create a new simulator.
+
+        :param project: Project to simulate.
+        :param runtimes: Estimated runtime of each task.
+        :param distro_hosts: Number of hosts in the pool of each distro.
+        :param default_hosts: Number of hosts of other distros, unlimited if not given.
+        :param host_setup_time: Time to set up a host before it runs its first task.
+        :param task_overhead: Time to set up and clean up around each task.
+        """
+        self.project = project
+        if not isinstance(runtimes, RuntimeHistory):
+            runtimes = RuntimeHistory(runtimes)
+        self.history = runtimes
+        self.distro_hosts = distro_hosts or {}
+        self.default_hosts = default_hosts
+        self.host_setup_time = host_setup_time
+        self.task_overhead = task_overhead
+
+    def run(self) -> SimulationReport:
+        """
+        Simulate running all tasks of the project.
+
+        :return: Report of the simulation.
+        """
+        graph = TaskGraph.from_project(self.project)
+        n_nodes = len(graph.nodes)
+        runtimes = [self.history.estimate(node.task) for node in graph.nodes]
+        distros = [node.distro or DEFAULT_DISTRO for node in graph.nodes]
+
+        task_group_definitions = {tg.name: tg for tg in self.project.task_groups or []}
+        groups: List[_TaskGroupState] = []
+        node_groups = [-1] * n_nodes
+        for (_, name), nodes in graph.task_group_nodes.items():
+            definition = task_group_definitions[name]
+            for node in nodes:
+                node_groups[node] = len(groups)
+            groups.append(
+                _TaskGroupState(
+                    nodes,
+                    distros[nodes[0]] if nodes else DEFAULT_DISTRO,
+                    definition.max_hosts or 1,
+                    bool(definition.share_processes),
+                )
+            )
+
+        free: Dict[str, float] = {}
+        queues: Dict[str, Deque[Tuple[int, int]]] = {}
+        for distro in set(distros):
+            hosts = self.distro_hosts.get(distro, self.default_hosts)
+            free[distro] = math.inf if hosts is None else hosts
+            queues[distro] = deque()
+
+        remaining = [len(predecessors) for predecessors in graph.predecessors]
+        # Time each task became ready, negative while it is not ready.
+        ready_at = [-1.0] * n_nodes
+        events: List[Tuple[float, int, int, int]] = []
+        sequence = 0
+        busy_time = dict.fromkeys(free, 0.0)
+        queue_times: Dict[str, List[float]] = {distro: [] for distro in free}
+        finished = 0
+        now = 0.0
+
+        def start(node: int, setup: float, overhead: float) -> None:
+            nonlocal sequence
+            distro = distros[node]
+            duration = setup + overhead + runtimes[node]
+            busy_time[distro] += duration
+            queue_times[distro].append(now - ready_at[node])
+            sequence += 1
+            heapq.heappush(events, (now + duration, sequence, _TASK_FINISHED, node))
+
+        def dispatch(distro: str) -> None:
+            nonlocal sequence
+            queue = queues[distro]
+            while queue and free[distro] > 0:
+                free[distro] -= 1
+                kind, ident = queue.popleft()
+                if kind == _TASK:
+                    start(ident, self.host_setup_time, self.task_overhead)
+                else:
+                    busy_time[distro] += self.host_setup_time
+                    sequence += 1
+                    heapq.heappush(
+                        events, (now + self.host_setup_time, sequence, _HOST_READY, ident)
+                    )
+
+        def advance(group_index: int) -> None:
+            group = groups[group_index]
+            nodes = group.nodes
+            overhead = 0.0 if group.share_processes else self.task_overhead
+            while group.idle and group.next < len(nodes) and ready_at[nodes[group.next]] >= 0:
+                group.idle -= 1
+                start(nodes[group.next], 0.0, overhead)
+                group.next += 1
+            if group.next == len(nodes):
+                # Nothing left to dispatch, hosts waiting for a task are released.
+                group.hosts -= group.idle
+                free[group.distro] += group.idle
+                group.idle = 0
+                dispatch(group.distro)
+            elif (
+                ready_at[nodes[group.next]] >= 0
+                and not group.idle
+                and group.hosts < group.max_hosts
+            ):
+                group.hosts += 1
+                queues[group.distro].append((_TASK_GROUP, group_index))
+                dispatch(group.distro)
+
+        def make_ready(node: int) -> None:
+            ready_at[node] = now
+            if node_groups[node] < 0:
+                queues[distros[node]].append((_TASK, node))
+                dispatch(distros[node])
+            else:
+                advance(node_groups[node])
+
+        for node in range(n_nodes):
+            if remaining[node] == 0:
+                make_ready(node)
+
+        while events:
+            now, _, kind, ident = heapq.heappop(events)
+            if kind == _HOST_READY:
+                groups[ident].idle += 1
+                advance(ident)
+                continue
+
+            finished += 1
+            for successor in graph.successors[ident]:
+                remaining[successor] -= 1
+                if remaining[successor] == 0:
+                    make_ready(successor)
+            group_index = node_groups[ident]
+            if group_index < 0:
+                free[distros[ident]] += 1
+                dispatch(distros[ident])
+            else:
+                groups[group_index].idle += 1
+                advance(group_index)
+
+        if finished != n_nodes:
+            stuck = [graph.nodes[node] for node in range(n_nodes) if remaining[node]]
+            raise ValueError(f"{n_nodes - finished} tasks could not be scheduled: {stuck[:10]}")
+
+        makespan = now
+        all_queue_times = [time for times in queue_times.values() for time in times]
+        return SimulationReport(
+            makespan=makespan,
+            tasks=finished,
+            mean_queue_time=_mean(all_queue_times),
+            max_queue_time=max(all_queue_times, default=0.0),
+            distros={
+                distro: self._distro_report(distro, busy_time[distro], times, makespan)
+                for distro, times in sorted(queue_times.items())
+            },
+        )
+
+    def _distro_report(
+        self, distro: str, busy_time: float, queue_times: List[float], makespan: float
+    ) -> DistroReport:
+        """Create the report of the given distro."""
+        hosts = self.distro_hosts.get(distro, self.default_hosts)
+        utilisation = None
+        if hosts is not None and makespan > 0:
+            utilisation = busy_time / (hosts * makespan)
+        return DistroReport(
+            hosts=hosts,
+            tasks=len(queue_times),
+            busy_time=busy_time,
+            utilisation=utilisation,
+            mean_queue_time=_mean(queue_times),
+            max_queue_time=max(queue_times, default=0.0),
+        )
+
+
+def _mean(values: List[float]) -> float:
+    """Get the mean of the given values, 0 if there are none."""
+    return sum(values) / len(values) if values else 0.0
@@ -0,0 +1,148 @@
+"""Splitting of test suites into parallel sub-tasks."""
+import heapq
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from shrub.v3.evg_build_variant import DisplayTask
+from shrub.v3.evg_command import FunctionCall
+from shrub.v3.evg_runtime_history import RuntimeHistory
+from shrub.v3.evg_task import EvgTask
+from shrub.v3.evg_task_template import EvgTaskTemplate
+
+# Number of sub-tasks to split a suite into when there is no history for its tests.
+DEFAULT_FALLBACK_SUB_TASKS = 4
+# Function called with the test files of each sub-task when no template is given.
+DEFAULT_FUNCTION = "run tests"
+
+
+class SuiteSplit(BaseModel):
+    """
+    Sub-tasks running the tests of a suite.
+
+    * tasks: Generated sub-tasks.
+    * display_task: Display task wrapping the sub-tasks.
+    * runtimes: Estimated runtime, in seconds, of each sub-task, None if there was no history.
+    """
+
+    tasks: List[EvgTask]
+    display_task: DisplayTask
+    runtimes: Optional[Dict[str, float]] = None
+
+
+class SuiteSplitter:
+    """
+    Split the tests of a suite into sub-tasks of about the same runtime.
+
+    The number of sub-tasks is chosen so that each takes about the target runtime. Tests are
+    assigned longest first to the sub-task with the lowest runtime so far. When there is no history
+    for any of the tests, they are split into a fixed number of sub-tasks with the same number of
+    tests instead.
+
+    Every sub-task is created from a template, with the test files of the sub-task overlaid on
+    the vars of its parameterized function calls.
+    """
+
+    def __init__(
+        self,
+        target_runtime: float,
+        history: Optional[RuntimeHistory] = None,
+        template: Optional[EvgTaskTemplate] = None,
+        test_files_var: str = "test_files",
+        max_sub_tasks: Optional[int] = None,
+        fallback_sub_tasks: int = DEFAULT_FALLBACK_SUB_TASKS,
+    ) -> None:
+        """
+        Create a new splitter.
+
+        :param target_runtime: Target runtime, in seconds, of each sub-task.
+        :param history: Historical runtimes of tests.
+        :param template: Template of sub-tasks, a call to "run tests" if not given.
+        :param test_files_var: Name of var holding the space separated test files of a sub-task.
+        :param max_sub_tasks: Max number of sub-tasks to split a suite into.
+        :param fallback_sub_tasks: Number of sub-tasks to split a suite into without history.
+        """
+        if target_runtime <= 0:
+            raise ValueError(f"target_runtime must be positive, got {target_runtime}")
+        self.target_runtime = target_runtime
+        self.history = history
+        self.template = template or EvgTaskTemplate(
+            parameterized=[FunctionCall(func=DEFAULT_FUNCTION)]
+        )
+        self.test_files_var = test_files_var
+        self.max_sub_tasks = max_sub_tasks
+        self.fallback_sub_tasks = fallback_sub_tasks
+
+    def _count(self, n_tests: int, count: int) -> int:
+        """Limit the given number of sub-tasks by the max and the number of tests."""
+        if self.max_sub_tasks is not None:
+            count = min(count, self.max_sub_tasks)
+        return min(max(1, count), n_tests)
+
+    def _split_by_runtime(
+        self, test_files: Sequence[str], history: RuntimeHistory
+    ) -> Tuple[List[List[int]], List[float]]:
+        """Split tests into sub-tasks of about the same runtime."""
+        runtimes = [history.estimate(test_file) for test_file in test_files]
+        count = self._count(len(test_files), math.ceil(sum(runtimes) / self.target_runtime))
+
+        bins: List[List[int]] = [[] for _ in range(count)]
+        totals = [0.0] * count
+        # (runtime of sub-task so far, sub-task index) for every sub-task.
+        heap = [(0.0, index) for index in range(count)]
+        for test in sorted(range(len(test_files)), key=lambda i: -runtimes[i]):
+            total, index = heap[0]
+            bins[index].append(test)
+            totals[index] = total + runtimes[test]
+            heapq.heapreplace(heap, (totals[index], index))
+        return bins, totals
+
+    def _split_by_count(self, test_files: Sequence[str]) -> List[List[int]]:
+        """Split tests into sub-tasks with the same number of tests."""
+        count = self._count(len(test_files), self.fallback_sub_tasks)
+        size, extra = divmod(len(test_files), count) if count else (0, 0)
+        bins = []
+        start = 0
+        for index in range(count):
+            end = start + size + (1 if index < extra else 0)
+            bins.append(list(range(start, end)))
+            start = end
+        return bins
+
+    def split(
+        self, suite_name: str, test_files: Sequence[str], vars: Optional[Dict[str, Any]] = None
+    ) -> SuiteSplit:
+        """
+        Split the given tests of a suite into sub-tasks.
+
+        Sub-tasks are named `<suite_name>_<index>` and keep the order of the given test files.
+
+        :param suite_name: Name of suite, also used as the name of the display task.
+        :param test_files: Test files of the suite.
+        :param vars: Additional vars to overlay on the parameterized function calls.
+        :return: Sub-tasks running the tests.
+        """
+        if not test_files:
+            # A display task without execution tasks is not valid in evergreen.
+            raise ValueError(f"Suite {suite_name} has no test files to split")
+        history = self.history
+        runtimes: Optional[Dict[str, float]] = None
+        if history is not None and any(test_file in history for test_file in test_files):
+            bins, totals = self._split_by_runtime(test_files, history)
+            runtimes = {f"{suite_name}_{index}": total for index, total in enumerate(totals)}
+        else:
+            bins = self._split_by_count(test_files)
+
+        tasks = []
+        for index, tests in enumerate(bins):
+            task_vars = dict(vars or {})
+            task_vars[self.test_files_var] = " ".join(test_files[test] for test in sorted(tests))
+            tasks.append(self.template.create_task(f"{suite_name}_{index}", task_vars))
+        return SuiteSplit(
+            tasks=tasks,
+            display_task=DisplayTask(
+                name=suite_name, execution_tasks=[task.name for task in tasks]
+            ),
+            runtimes=runtimes,
+        )
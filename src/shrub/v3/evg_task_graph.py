@@ -0,0 +1,200 @@
+"""Graph of the tasks run by the build variants of an evergreen project."""
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from shrub.v3.evg_build_variant import BuildVariant
+from shrub.v3.evg_project import WILDCARD, EvgProject
+from shrub.v3.evg_task import EvgTask, EvgTaskDependency
+
+
+class TaskNode(NamedTuple):
+    """
+    A task run on a build variant.
+
+    * build_variant: Name of build variant running the task.
+    * task: Name of task.
+    * task_group: Name of task group the task is run as part of.
+    * distro: Distro the task runs on.
+    """
+
+    build_variant: str
+    task: str
+    task_group: Optional[str] = None
+    distro: Optional[str] = None
+
+
+def _first(distros: Optional[Union[str, List[str]]]) -> Optional[str]:
+    """Get the first of the given distros."""
+    if isinstance(distros, str):
+        return distros
+    return distros[0] if distros else None
+
+
+def select_tasks(selector: str, tasks: Iterable[EvgTask]) -> List[str]:
+    """
+    Get the names of tasks matching a tag selector, e.g. ".tag1 !.tag2".
+
+    :param selector: Space separated criteria, matched by tasks matching all of them.
+    :param tasks: Tasks to select from.
+    :return: Names of matching tasks.
+    """
+    criteria = []
+    for criterion in selector.split():
+        negated = criterion.startswith("!")
+        criterion = criterion.lstrip("!")
+        criteria.append((negated, criterion.startswith("."), criterion.lstrip(".")))
+
+    selected = []
+    for task in tasks:
+        tags = task.tags or []
+        if all(
+            negated != (value in tags if is_tag else value == task.name)
+            for negated, is_tag, value in criteria
+        ):
+            selected.append(task.name)
+    return selected
+
+
+class TaskGraph:
+    """
+    Graph of the tasks run by each build variant and the dependencies between them.
+
+    Nodes are identified by their index in `nodes`. Edges point from a task to the tasks
+    depending on it.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty graph."""
+        self.nodes: List[TaskNode] = []
+        self.index: Dict[Tuple[str, str], int] = {}
+        self.successors: List[List[int]] = []
+        self.predecessors: List[List[int]] = []
+        self.variant_nodes: Dict[str, List[int]] = {}
+        self.task_nodes: Dict[str, List[int]] = {}
+        self.task_group_nodes: Dict[Tuple[str, str], List[int]] = {}
+
+    def add_node(self, node: TaskNode) -> int:
+        """
+        Add the given node, unless the build variant already runs the task.
+
+        :param node: Node to add.
+        :return: Index of node.
+        """
+        key = (node.build_variant, node.task)
+        index = self.index.get(key)
+        if index is None:
+            index = len(self.nodes)
+            self.index[key] = index
+            self.nodes.append(node)
+            self.successors.append([])
+            self.predecessors.append([])
+            self.variant_nodes.setdefault(node.build_variant, []).append(index)
+            self.task_nodes.setdefault(node.task, []).append(index)
+        return index
+
+    def add_edge(self, source: int, target: int) -> None:
+        """
+        Add an edge from the given source node to a target node depending on it.
+
+        :param source: Index of node depended on.
+        :param target: Index of depending node.
+        """
+        if source != target:
+            self.successors[source].append(target)
+            self.predecessors[target].append(source)
+
+    def _add_dependency(self, target: int, dependency: EvgTaskDependency) -> None:
+        """Add edges from the nodes matching the given dependency to the target node."""
+        variant = dependency.variant or self.nodes[target].build_variant
+        if dependency.name == WILDCARD:
+            if variant == WILDCARD:
+                sources: Iterable[int] = range(len(self.nodes))
+            else:
+                sources = self.variant_nodes.get(variant, [])
+        elif variant == WILDCARD:
+            sources = self.task_nodes.get(dependency.name, [])
+        else:
+            source = self.index.get((variant, dependency.name))
+            sources = [source] if source is not None else []
+        for source in sources:
+            self.add_edge(source, target)
+
+    @classmethod
+    def from_project(cls, project: EvgProject, serialize_task_groups: bool = False) -> "TaskGraph":
+        """
+        Build the graph of the given project.
+
+        Task groups and tag selectors referenced by build variants are expanded to their tasks.
+        Dependencies on tasks that are not run are ignored.
+
+        :param project: Project to build graph of.
+        :param serialize_task_groups: Add edges so each task of a task group waits for the task
+            `max_hosts` places before it, modelling the hosts of the task group.
+        :return: Graph of project.
+        """
+        graph = cls()
+        tasks = {task.name: task for task in project.tasks or []}
+        task_groups = {task_group.name: task_group for task_group in project.task_groups or []}
+        dependencies: List[Tuple[int, List[EvgTaskDependency]]] = []
+
+        def add(
+            variant: BuildVariant,
+            name: str,
+            group: Optional[str],
+            ref_distros: Optional[List[str]],
+            depends_on: Optional[List[EvgTaskDependency]],
+        ) -> int:
+            task = tasks.get(name)
+            distro = _first(ref_distros) or (
+                _first(task.run_on) if task is not None and group is None else None
+            )
+            node = TaskNode(variant.name, name, group, distro or _first(variant.run_on))
+            index = graph.add_node(node)
+            depends_on = depends_on or (task.depends_on if task is not None else None)
+            if depends_on:
+                dependencies.append((index, depends_on))
+            return index
+
+        for variant in project.buildvariants or []:
+            for ref in variant.tasks:
+                task_group = task_groups.get(ref.name)
+                if task_group is not None:
+                    graph.task_group_nodes[(variant.name, ref.name)] = [
+                        add(variant, name, ref.name, ref.distros, None) for name in task_group.tasks
+                    ]
+                elif ref.name.startswith((".", "!")):
+                    for name in select_tasks(ref.name, tasks.values()):
+                        add(variant, name, None, ref.distros, ref.depends_on)
+                else:
+                    add(variant, ref.name, None, ref.distros, ref.depends_on)
+
+        for index, depends_on in dependencies:
+            for dependency in depends_on:
+                graph._add_dependency(index, dependency)
+        if serialize_task_groups:
+            for (_, group), chain in graph.task_group_nodes.items():
+                max_hosts = task_groups[group].max_hosts or 1
+                for position in range(max_hosts, len(chain)):
+                    graph.add_edge(chain[position - max_hosts], chain[position])
+        return graph
+
+    def topological_order(self) -> List[int]:
+        """
+        Get the nodes ordered so every node comes after the nodes it depends on.
+
+        :return: Indexes of nodes in topological order.
+        """
+        remaining = [len(predecessors) for predecessors in self.predecessors]
+        ready = deque(index for index, count in enumerate(remaining) if count == 0)
+        order = []
+        while ready:
+            index = ready.popleft()
+            order.append(index)
+            for successor in self.successors[index]:
+                remaining[successor] -= 1
+                if remaining[successor] == 0:
+                    ready.append(successor)
+        if len(order) != len(self.nodes):
+            cycle = [self.nodes[index] for index, count in enumerate(remaining) if count]
+            raise ValueError(f"Dependency cycle between tasks: {cycle[:10]}")
+        return order
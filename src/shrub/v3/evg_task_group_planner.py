@@ -0,0 +1,110 @@
+"""Planning of task groups from the historical runtimes of tasks."""
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from shrub.v3.evg_runtime_history import RuntimeHistory
+from shrub.v3.evg_task import EvgTask, EvgTaskRef
+from shrub.v3.evg_task_group import EvgTaskGroup
+
+
+class TaskGroupPlan(BaseModel):
+    """
+    Task groups planned to run a set of tasks.
+
+    * task_groups: Planned task groups.
+    * makespans: Estimated time, in seconds, to run each task group.
+    * makespan: Estimated time, in seconds, to run all task groups in parallel.
+    """
+
+    task_groups: List[EvgTaskGroup]
+    makespans: Dict[str, float]
+    makespan: float
+
+    def task_refs(self, distros: Optional[List[str]] = None) -> List[EvgTaskRef]:
+        """
+        Get references to the planned task groups to add to a build variant.
+
+        :param distros: Distros the task groups should run on.
+        :return: Reference to each task group.
+        """
+        return [task_group.get_task_ref(distros) for task_group in self.task_groups]
+
+
+class TaskGroupPlanner:
+    """
+    Pack tasks into task groups to minimise the time to run them.
+
+    A budget of hosts is split into task groups of at most `max_hosts` hosts. Tasks are assigned
+    longest first to the host expected to be free first (LPT scheduling). Within a task group,
+    tasks are listed longest first, so hosts picking up the next task of their group as they
+    become free follow the plan.
+    """
+
+    def __init__(self, history: RuntimeHistory, host_budget: int, max_hosts: int = 1) -> None:
+        """
+        Create a new planner.
+
+        :param history: Historical runtimes of tasks.
+        :param host_budget: Max number of hosts to run all task groups on.
+        :param max_hosts: Max number of hosts to run a single task group on.
+        """
+        if host_budget < 1 or max_hosts < 1:
+            raise ValueError(
+                f"host_budget and max_hosts must be positive, got {host_budget} and {max_hosts}"
+            )
+        self.history = history
+        self.host_budget = host_budget
+        self.max_hosts = max_hosts
+
+    def _group_sizes(self, n_tasks: int) -> List[int]:
+        """Get the number of hosts of each task group needed to run the given number of tasks."""
+        hosts = min(self.host_budget, n_tasks)
+        sizes = [self.max_hosts] * (hosts // self.max_hosts)
+        if hosts % self.max_hosts:
+            sizes.append(hosts % self.max_hosts)
+        return sizes
+
+    def plan(
+        self, name: str, tasks: Iterable[Union[EvgTask, str]], **group_fields: Any
+    ) -> TaskGroupPlan:
+        """
+        Plan task groups to run the given tasks.
+
+        :param name: Prefix of the names of task groups, which are named `<name>_<index>`.
+        :param tasks: Tasks, or names of tasks, to run.
+        :param group_fields: Additional fields of every task group, e.g. setup commands.
+        :return: Plan of task groups running all tasks.
+        """
+        names = [task if isinstance(task, str) else task.name for task in tasks]
+        runtimes = [(self.history.estimate(task_name), task_name) for task_name in names]
+        # Longest first, ties are broken by name so plans are stable.
+        runtimes.sort(key=lambda item: (-item[0], item[1]))
+
+        sizes = self._group_sizes(len(runtimes))
+        # (time host is free, group index, host index) for every host.
+        hosts: List[Tuple[float, int, int]] = [
+            (0.0, group, host) for group, size in enumerate(sizes) for host in range(size)
+        ]
+        group_tasks: List[List[str]] = [[] for _ in sizes]
+        for runtime, task_name in runtimes:
+            free_at, group, host = hosts[0]
+            group_tasks[group].append(task_name)
+            heapq.heapreplace(hosts, (free_at + runtime, group, host))
+
+        makespans = [0.0] * len(sizes)
+        for free_at, group, _ in hosts:
+            makespans[group] = max(makespans[group], free_at)
+
+        task_groups = [
+            EvgTaskGroup(
+                name=f"{name}_{index}", tasks=group_tasks[index], max_hosts=size, **group_fields
+            )
+            for index, size in enumerate(sizes)
+        ]
+        return TaskGroupPlan(
+            task_groups=task_groups,
+            makespans={tg.name: makespans[index] for index, tg in enumerate(task_groups)},
+            makespan=max(makespans, default=0.0),
+        )
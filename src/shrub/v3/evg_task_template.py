@@ -0,0 +1,87 @@
+"""Evergreen models for templates of near-identical tasks."""
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel
+
+from shrub.v3.evg_command import EvgCommand, FunctionCall
+from shrub.v3.evg_task import EvgTask, EvgTaskDependency
+
+# Fields of the template that describe commands rather than task properties.
+COMMAND_FIELDS = {"prefix", "parameterized", "suffix"}
+
+
+class EvgTaskTemplate(BaseModel):
+    """
+    Template for tasks that only differ in the variables passed to their function calls.
+
+    The commands before and after the parameterized function calls are built once and shared by
+    every task created from the template, so only the overlaid function calls are allocated per
+    task.
+
+    * prefix: Commands to run before the parameterized function calls.
+    * parameterized: Function calls whose vars are overlaid with the vars of each task.
+    * suffix: Commands to run after the parameterized function calls.
+    * depends_on: Other tasks that must be successful for created tasks to run.
+    * run_on: Distros created tasks should be run on.
+    * exec_timeout_secs: Time created tasks can run before being considered timing out.
+    * tags: List of tags to attach to created tasks.
+    * disable: Prevent created tasks from running at all.
+    * patchable: Whether created tasks can run in patch builds.
+    * stepback: Whether created tasks should run stepback.
+    """
+
+    prefix: Optional[List[EvgCommand]] = None
+    parameterized: Optional[List[FunctionCall]] = None
+    suffix: Optional[List[EvgCommand]] = None
+    depends_on: Optional[List[EvgTaskDependency]] = None
+    run_on: Optional[Union[str, List[str]]] = None
+    exec_timeout_secs: Optional[int] = None
+    tags: Optional[List[str]] = None
+    disable: Optional[bool] = None
+    patchable: Optional[bool] = None
+    stepback: Optional[bool] = None
+
+    def create_task(self, name: str, vars: Optional[Dict[str, Any]] = None) -> EvgTask:
+        """
+        Create a task from this template.
+
+        :param name: Name of task.
+        :param vars: Values to overlay on the vars of each parameterized function call.
+        :return: Task sharing the invariant commands and properties of this template.
+        """
+        commands: List[EvgCommand] = []
+        if self.prefix:
+            commands.extend(self.prefix)
+        for function_call in self.parameterized or []:
+            commands.append(self._overlay(function_call, vars))
+        if self.suffix:
+            commands.extend(self.suffix)
+
+        fields: Dict[str, Any] = {
+            field: getattr(self, field)
+            for field in self.model_fields_set - COMMAND_FIELDS
+            if getattr(self, field) is not None
+        }
+        for field, value in fields.items():
+            if isinstance(value, list):
+                # Each task gets its own lists, so changing one task does not change the others.
+                fields[field] = list(value)
+        # All parts of the task were validated by this template, so validation is skipped.
+        return EvgTask.model_construct(name=name, commands=commands, **fields)
+
+    @staticmethod
+    def _overlay(function_call: FunctionCall, vars: Optional[Dict[str, Any]]) -> FunctionCall:
+        """
+        Overlay the given vars on a function call.
+
+        :param function_call: Function call to overlay.
+        :param vars: Vars to overlay.
+        :return: Function call with overlaid vars, or the given call if there is nothing to overlay.
+        """
+        if not vars:
+            return function_call
+        fields: Dict[str, Any] = {
+            field: getattr(function_call, field) for field in function_call.model_fields_set
+        }
+        fields["vars"] = {**(function_call.vars or {}), **vars}
+        return FunctionCall.model_construct(**fields)
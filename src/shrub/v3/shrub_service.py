@@ -1,8 +1,36 @@
 """Service for working with shrub."""
+import json
+import re
+from collections import Counter
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
 
 import yaml
 from pydantic import BaseModel
 
+from shrub.compressed_io import CompressedWriter
+from shrub.json_format import dumps
+from shrub.v3.evg_project import EvgProject
+
+# Arguments used for all conversions of models to python objects.
+DUMP_KWARGS: Dict[str, Any] = dict(exclude_none=True, exclude_unset=True, by_alias=True)
+
+# Match the start of every non-empty line.
+LINE_START = re.compile(r"^(?=.)", re.MULTILINE)
+# Emitted when a document ends with a block scalar that keeps its trailing line breaks.
+DOCUMENT_END = "...\n"
+# Indentation of items of the `tasks` section and of commands in a task.
+TASK_INDENT = "  "
+COMMAND_INDENT = "      "
+# Stands in for the commands of a task while the rest of the task is rendered.
+COMMANDS_PLACEHOLDER = "\n  commands: []\n"
+# Sections of a project that can be rendered in chunks, in parallel.
+PARALLEL_SECTIONS = {"buildvariants", "tasks", "task_groups", "functions"}
+# Number of items of a section rendered together when rendering in parallel.
+DEFAULT_CHUNK_SIZE = 500
+# Min number of characters of content of a structure to emit it once, with an anchor.
+DEFAULT_MIN_ANCHOR_SIZE = 40
+
 
 class ConfigDumper(yaml.SafeDumper):
     # The max number of tags to flow.
@@ -43,6 +71,12 @@ class ConfigDumper(yaml.SafeDumper):
     # Allow for special-casing depending on parent node.
     def represent_special_mapping(self, tag, mapping, flow_style):
         value = []
+        node = yaml.MappingNode(tag, value, flow_style=flow_style)
+
+        # Register the node before its children change `alias_key`, so objects used more than
+        # once are written with an anchor and aliases.
+        if self.alias_key is not None:
+            self.represented_objects[self.alias_key] = node
 
         for item_key, item_value in mapping:
             node_key = self.represent_data(item_key)
@@ -51,29 +85,30 @@ class ConfigDumper(yaml.SafeDumper):
                 # Represent task tags using flow style to reduce line count:
                 #     - name: task-name
                 #       tags: [A, B, C]
-                node_value = self.represent_sequence(
-                    "tag:yaml.org,2002:seq", item_value, flow_style=True
-                )
+                node_value = self.represent_flow_sequence(item_value)
             elif item_key == "depends_on" and len(item_value) == 1:
                 # Represent task depends_on using flow style when only one
                 # dependency is given to reduce line count:
                 #     - name: task-name
                 #       depends_on: [{ name: dependency }]
-                node_value = self.represent_sequence(
-                    "tag:yaml.org,2002:seq", item_value, flow_style=True
-                )
+                node_value = self.represent_flow_sequence(item_value)
             else:
                 # Use default behavior.
                 node_value = self.represent_data(item_value)
 
             value.append((node_key, node_value))
 
-        node = yaml.MappingNode(tag, value, flow_style=flow_style)
+        return node
 
+    # Represent a sequence using flow style, as an alias if it was represented before. The node of
+    # an aliased sequence keeps the style it was first represented with.
+    def represent_flow_sequence(self, sequence):
+        self.alias_key = None if self.ignore_aliases(sequence) else id(sequence)
         if self.alias_key is not None:
-            self.represented_objects[self.alias_key] = node
-
-        return node
+            if self.alias_key in self.represented_objects:
+                return self.represented_objects[self.alias_key]
+            self.object_keeper.append(sequence)
+        return self.represent_sequence("tag:yaml.org,2002:seq", sequence, flow_style=True)
 
     # Represent updates mapping for expansions.update commands using flow
     # style to reduce line count:
@@ -104,30 +139,407 @@ class ConfigDumper(yaml.SafeDumper):
         return super().increase_indent(flow=flow, indentless=indentless)
 
 
+def dump_yaml(obj: Any) -> str:
+    """
+    Dump the given python object to a yaml document, formatted like generated configurations.
+
+    :param obj: Python object to dump.
+    :return: YAML document.
+    """
+    return yaml.dump(obj, Dumper=ConfigDumper, default_flow_style=False, width=float("inf"))
+
+
+def dump_yaml_fragment(obj: Any) -> str:
+    """
+    Dump the given python object to yaml that can be spliced into another document.
+
+    A document assembled from fragments must be terminated with `end_document`.
+
+    :param obj: Python object to dump.
+    :return: YAML fragment.
+    """
+    text = dump_yaml(obj)
+    if text.endswith(DOCUMENT_END):
+        # Only needed to terminate a document ending with a block scalar that keeps its trailing
+        # line breaks, see `end_document`.
+        text = text[: -len(DOCUMENT_END)]
+    return text
+
+
+def end_document(text: str) -> str:
+    """
+    Terminate a document assembled from fragments the same way the emitter would.
+
+    :param text: YAML fragments of the document, joined.
+    :return: YAML document.
+    """
+    if text.endswith("\n\n"):
+        return text + DOCUMENT_END
+    return text
+
+
+def _indent(text: str, indent: str) -> str:
+    """Indent every non-empty line of the given text."""
+    return LINE_START.sub(indent, text)
+
+
+class _StructureSharer:
+    """
+    Replace structurally identical dicts and lists with a single shared object.
+
+    The yaml emitter writes an object used more than once in full the first time, with an anchor,
+    and as an alias to the anchor afterwards. Every structure is identified by its type and the
+    ids of its children, so the whole tree is processed in a single bottom-up pass.
+    """
+
+    def __init__(self, min_size: int) -> None:
+        """
+        Create a new sharer.
+
+        :param min_size: Min number of characters of content of a structure to share it.
+        """
+        self._min_size = min_size
+        self._ids: Dict[Any, int] = {}
+        self._shared: Dict[int, Any] = {}
+
+    def _id(self, key: Any, obj: Any, size: int) -> Tuple[Any, int]:
+        """Get the id of the given structure, and the object to use for it."""
+        structure_id = self._ids.get(key)
+        if structure_id is None:
+            structure_id = len(self._ids)
+            self._ids[key] = structure_id
+            self._shared[structure_id] = obj
+        elif size >= self._min_size:
+            obj = self._shared[structure_id]
+        return obj, structure_id
+
+    def share(self, obj: Any) -> Tuple[Any, int, int]:
+        """
+        Share the identical structures of the given python object.
+
+        :param obj: Python object to share the structures of.
+        :return: Object with identical structures shared, its id and the size of its content.
+        """
+        if isinstance(obj, dict):
+            items = []
+            value_ids = []
+            size = 0
+            for key, value in obj.items():
+                value, value_id, value_size = self.share(value)
+                items.append((key, value))
+                value_ids.append((key, value_id))
+                size += len(str(key)) + value_size
+            return (*self._id((dict, tuple(value_ids)), dict(items), size), size)
+        if isinstance(obj, list):
+            values = []
+            value_ids = []
+            size = 0
+            for value in obj:
+                value, value_id, value_size = self.share(value)
+                values.append(value)
+                value_ids.append(value_id)
+                size += value_size
+            return (*self._id((list, tuple(value_ids)), values, size), size)
+        # Scalars are never aliased, but identify the structures containing them.
+        _, scalar_id = self._id((type(obj), obj), obj, 0)
+        return obj, scalar_id, len(str(obj))
+
+
+def render_commands(commands: List[Any]) -> str:
+    """
+    Render commands as items of the commands list of a task.
+
+    :param commands: Commands to render.
+    :return: YAML fragment of the commands, empty if there are no commands.
+    """
+    if not commands:
+        return ""
+    return _indent(
+        dump_yaml_fragment([cmd.model_dump(**DUMP_KWARGS) for cmd in commands]),
+        COMMAND_INDENT,
+    )
+
+
+class SharedCommandRenderer:
+    """
+    Render the tasks of a project to yaml, reusing the text of commands shared between tasks.
+
+    Tasks created from templates share the same command objects. The yaml for those commands is
+    rendered once and spliced into every task using them. The result is identical to rendering
+    the whole project at once.
+    """
+
+    def __init__(self, shared_commands: Set[int]) -> None:
+        """
+        Create a new renderer.
+
+        :param shared_commands: Ids of command objects used more than once.
+        """
+        self._shared_commands = shared_commands
+        self._rendered: Dict[int, str] = {}
+
+    def render_command(self, command: Any) -> str:
+        """
+        Render the given command as an item of the commands list of a task.
+
+        The text is kept and reused when the same command object is rendered again.
+
+        :param command: Command to render.
+        :return: YAML fragment of the command.
+        """
+        text = self._rendered.get(id(command))
+        if text is None:
+            text = render_commands([command])
+            self._rendered[id(command)] = text
+        return text
+
+    def render_task(self, task: Any, task_obj: Dict[str, Any]) -> str:
+        """
+        Render the given task as an item of the tasks section.
+
+        :param task: Task to render.
+        :param task_obj: Python version of task, without commands.
+        :return: YAML version of the task.
+        """
+        if task.commands is None or "commands" not in task.model_fields_set:
+            return _indent(dump_yaml_fragment([task_obj]), TASK_INDENT)
+
+        # Commands follow the name of the task, render everything else around them.
+        task_obj = {"name": task_obj.pop("name"), "commands": [], **task_obj}
+        text = dump_yaml_fragment([task_obj])
+        if not task.commands:
+            return _indent(text, TASK_INDENT)
+        split = text.index(COMMANDS_PLACEHOLDER) + 1
+        parts = [_indent(text[:split], TASK_INDENT), TASK_INDENT, "  commands:\n"]
+
+        unshared: List[Any] = []
+        for command in task.commands:
+            if id(command) in self._shared_commands:
+                parts.append(render_commands(unshared))
+                parts.append(self.render_command(command))
+                unshared = []
+            else:
+                unshared.append(command)
+        parts.append(render_commands(unshared))
+
+        parts.append(_indent(text[split + len(COMMANDS_PLACEHOLDER) - 1 :], TASK_INDENT))
+        return "".join(parts)
+
+
+def render_section_items(items: Union[List[Any], Dict[str, Any]]) -> str:
+    """
+    Render items of a section of a project, indented to follow the `<section>:` line.
+
+    Items render the same on their own as within the whole project.
+
+    :param items: List of items, or dictionary of items by name, of a section.
+    :return: YAML fragment of the items.
+    """
+    return _indent(dump_yaml_fragment(items), TASK_INDENT)
+
+
+def _chunk(
+    value: Union[List[Any], Dict[str, Any]], chunk_size: int
+) -> List[Union[List[Any], Dict[str, Any]]]:
+    """Split the items of a section into chunks."""
+    if isinstance(value, dict):
+        items = list(value.items())
+        return [dict(items[i : i + chunk_size]) for i in range(0, len(items), chunk_size)]
+    return [value[i : i + chunk_size] for i in range(0, len(value), chunk_size)]
+
+
+def _yaml_chunks(shrub_config: BaseModel, chunk_size: int) -> Iterator[str]:
+    """Generate the yaml of the given configuration one section, or chunk of items, at a time."""
+    obj = shrub_config.model_dump(**DUMP_KWARGS)
+    if not any(key in PARALLEL_SECTIONS and value for key, value in obj.items()):
+        yield dump_yaml(obj)
+        return
+
+    tail = ""
+    for key, value in obj.items():
+        if key in PARALLEL_SECTIONS and value:
+            yield f"{key}:\n"
+            for chunk in _chunk(value, chunk_size):
+                text = render_section_items(chunk)
+                yield text
+        else:
+            text = dump_yaml_fragment({key: value})
+            yield text
+        # Only the end of the document decides how it is terminated.
+        tail = (tail + text)[-2:]
+    yield end_document(tail)[len(tail) :]
+
+
+def _json_chunks(shrub_config: BaseModel) -> Iterator[str]:
+    """Generate the json of the given configuration one section, or item, at a time."""
+    kwargs: Dict[str, Any] = dict(exclude_none=True, exclude_unset=True, by_alias=True)
+    separator = ""
+    yield "{"
+    for key, field in type(shrub_config).model_fields.items():
+        value = getattr(shrub_config, key)
+        if key not in shrub_config.model_fields_set or value is None:
+            continue
+        if isinstance(value, list) and value and all(isinstance(v, BaseModel) for v in value):
+            yield f"{separator}{json.dumps(field.alias or key)}:["
+            for index, item in enumerate(value):
+                yield ("," if index else "") + item.model_dump_json(**kwargs)
+            yield "]"
+        else:
+            yield separator + shrub_config.model_dump_json(include={key}, **kwargs)[1:-1]
+        separator = ","
+    yield "}"
+
+
+def _find_shared_commands(project: EvgProject) -> Set[int]:
+    """Find the ids of command objects used by more than one task command."""
+    counts = Counter(id(cmd) for task in project.tasks or [] for cmd in task.commands or [])
+    return {cmd_id for cmd_id, count in counts.items() if count > 1}
+
+
 class ShrubService:
     """A service for working with shrub."""
 
     @staticmethod
-    def generate_yaml(shrub_config: BaseModel) -> str:
+    def generate_yaml(
+        shrub_config: BaseModel,
+        anchors: bool = False,
+        min_anchor_size: int = DEFAULT_MIN_ANCHOR_SIZE,
+    ) -> str:
         """
         Generate a yaml version of the given configuration.
 
+        Commands shared between tasks of a project, e.g. tasks created from an `EvgTaskTemplate`,
+        are only rendered once.
+
+        With anchors, identical structures like command params, expansions or lists of task
+        references are written once with an `&anchor` and referenced with `*alias` afterwards.
+
         :param shrub_config: Shrub configuration to generate.
+        :param anchors: Write identical structures once, using anchors and aliases.
+        :param min_anchor_size: Min number of characters of content of a structure to write it
+            with an anchor.
         :return: YAML version of given shrub configuration.
         """
-        return yaml.dump(
-            shrub_config.model_dump(exclude_none=True, exclude_unset=True, by_alias=True),
-            Dumper=ConfigDumper,
-            default_flow_style=False,
-            width=float("inf"),
+        if anchors:
+            obj = shrub_config.model_dump(**DUMP_KWARGS)
+            return dump_yaml(_StructureSharer(min_anchor_size).share(obj)[0])
+
+        shared_commands: Set[int] = set()
+        if isinstance(shrub_config, EvgProject) and "tasks" in shrub_config.model_fields_set:
+            shared_commands = _find_shared_commands(shrub_config)
+        if not shared_commands:
+            return dump_yaml(shrub_config.model_dump(**DUMP_KWARGS))
+
+        project = shrub_config.model_dump(
+            exclude={"tasks": {"__all__": {"commands"}}}, **DUMP_KWARGS
         )
+        renderer = SharedCommandRenderer(shared_commands)
+        sections = []
+        # Top-level sections are independent of each other, render them one at a time.
+        for key, value in project.items():
+            if key == "tasks":
+                tasks = zip(shrub_config.tasks, value)
+                sections.append("tasks:\n")
+                sections.extend(renderer.render_task(task, task_obj) for task, task_obj in tasks)
+            else:
+                sections.append(dump_yaml_fragment({key: value}))
+        return end_document("".join(sections))
+
+    @staticmethod
+    def generate_yaml_parallel(
+        shrub_config: BaseModel,
+        executor: Optional[Executor] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> str:
+        """
+        Generate a yaml version of the given configuration, rendering sections in parallel.
+
+        The build variants, tasks, task groups and functions of a project are split into chunks
+        that are rendered separately and concatenated. The output is identical to `generate_yaml`.
+        Starting workers has a cost, so this only pays off for large configurations.
+
+        :param shrub_config: Shrub configuration to generate.
+        :param executor: Executor to render chunks in, a new process pool if not given.
+        :param chunk_size: Number of items of a section to render together.
+        :return: YAML version of given shrub configuration.
+        """
+        obj = shrub_config.model_dump(**DUMP_KWARGS)
+        if not any(key in PARALLEL_SECTIONS and value for key, value in obj.items()):
+            return dump_yaml(obj)
+
+        pool = executor or ProcessPoolExecutor()
+        try:
+            parts: List[Union[str, List[Future]]] = []
+            for key, value in obj.items():
+                if key in PARALLEL_SECTIONS and value:
+                    parts.append(f"{key}:\n")
+                    parts.append(
+                        [
+                            pool.submit(render_section_items, chunk)
+                            for chunk in _chunk(value, chunk_size)
+                        ]
+                    )
+                else:
+                    parts.append(dump_yaml_fragment({key: value}))
+            text = "".join(
+                part if isinstance(part, str) else "".join(f.result() for f in part)
+                for part in parts
+            )
+        finally:
+            if executor is None:
+                pool.shutdown()
+        return end_document(text)
+
+    @staticmethod
+    def write_yaml(
+        shrub_config: BaseModel,
+        file_location: str,
+        compression_level: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        """
+        Write a yaml version of the given configuration to a file.
+
+        The yaml is written one section, or chunk of items, at a time. Files ending in `.gz` or
+        `.zst` are compressed in a background thread while the next chunk is generated.
+
+        :param shrub_config: Shrub configuration to write.
+        :param file_location: Path of file to write.
+        :param compression_level: Level of compression, a fast default if not given.
+        :param chunk_size: Number of items of a section to generate at a time.
+        """
+        with CompressedWriter(file_location, level=compression_level) as writer:
+            for chunk in _yaml_chunks(shrub_config, chunk_size):
+                writer.write(chunk)
+
+    @staticmethod
+    def write_json(
+        shrub_config: BaseModel, file_location: str, compression_level: Optional[int] = None
+    ) -> None:
+        """
+        Write a json version of the given configuration to a file.
+
+        The json is written one section, or item of a list, at a time. Files ending in `.gz` or
+        `.zst` are compressed in a background thread while the next item is generated.
+
+        :param shrub_config: Shrub configuration to write.
+        :param file_location: Path of file to write.
+        :param compression_level: Level of compression, a fast default if not given.
+        """
+        with CompressedWriter(file_location, level=compression_level) as writer:
+            for chunk in _json_chunks(shrub_config):
+                writer.write(chunk)
 
     @staticmethod
-    def generate_json(shrub_config: BaseModel) -> str:
+    def generate_json(shrub_config: BaseModel, sort_keys: bool = False) -> str:
         """
-        Generate a json version of the given configuration.
+        Generate a compact json version of the given configuration.
 
         :param shrub_config: Shrub configuration to generate.
+        :param sort_keys: Sort the keys of objects, so equal configurations give identical json.
         :return: JSON version of given shrub configuration.
         """
+        if sort_keys:
+            obj = shrub_config.model_dump(mode="json", **DUMP_KWARGS)
+            return dumps(obj, compact=True, sort_keys=True)
         return shrub_config.model_dump_json(exclude_none=True, exclude_unset=True, by_alias=True)
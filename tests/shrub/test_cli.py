@@ -0,0 +1,206 @@
+import json
+
+import pytest
+import yaml
+
+import shrub.cli as under_test
+from shrub.v3.evg_build_variant import BuildVariant
+from shrub.v3.evg_command import FunctionCall
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_task import EvgTask, EvgTaskRef
+from shrub.v3.shrub_service import ShrubService
+
+
+def build_project(n_tasks=3, func="do setup"):
+    tasks = [
+        EvgTask(name=f"task_{i}", commands=[FunctionCall(func=func)] * (i + 1))
+        for i in range(n_tasks)
+    ]
+    variant = BuildVariant(
+        name="linux", run_on=["ubuntu"], tasks=[EvgTaskRef(name=t.name) for t in tasks]
+    )
+    return EvgProject(buildvariants=[variant], tasks=tasks, functions={"do setup": []})
+
+
+def write_project(tmp_path, name, project):
+    file_location = tmp_path / name
+    file_location.write_text(ShrubService.generate_yaml(project))
+    return str(file_location)
+
+
+class TestFormatFor:
+    @pytest.mark.parametrize(
+        "file_location,expected",
+        [
+            ("evergreen.yml", "yaml"),
+            ("evergreen.YAML", "yaml"),
+            ("evergreen.json", "json"),
+            ("evergreen.json.gz", "json"),
+            ("evergreen.yml.zst", "yaml"),
+        ],
+    )
+    def test_format_is_detected_from_extension(self, file_location, expected):
+        assert under_test.format_for(file_location) == expected
+
+    def test_explicit_format_is_used(self):
+        assert under_test.format_for("evergreen.txt", "json") == "json"
+
+    def test_unknown_extension_is_an_error(self):
+        with pytest.raises(ValueError):
+            under_test.format_for("evergreen.txt")
+
+
+class TestValidate:
+    def test_valid_project_passes(self, tmp_path, capsys):
+        file_location = write_project(tmp_path, "project.yml", build_project())
+
+        assert under_test.main(["validate", file_location]) == under_test.OK
+        assert capsys.readouterr().out == ""
+
+    def test_undefined_references_are_reported(self, tmp_path, capsys):
+        file_location = write_project(tmp_path, "project.yml", build_project(func="missing"))
+
+        assert under_test.main(["validate", file_location]) == under_test.FAILED
+        out = capsys.readouterr().out
+        assert "tasks[task_0].commands: undefined function 'missing'" in out
+
+    def test_known_functions_are_not_reported(self, tmp_path):
+        file_location = write_project(tmp_path, "project.yml", build_project(func="missing"))
+
+        exit_code = under_test.main(["validate", file_location, "--known-function", "missing"])
+
+        assert exit_code == under_test.OK
+
+    def test_invalid_configuration_is_an_error(self, tmp_path, capsys):
+        file_location = tmp_path / "project.yml"
+        file_location.write_text("tasks:\n  - commands: []\n")
+
+        assert under_test.main(["validate", str(file_location)]) == under_test.ERROR
+        assert "invalid configuration" in capsys.readouterr().err
+
+    def test_missing_file_is_an_error(self, tmp_path, capsys):
+        exit_code = under_test.main(["validate", str(tmp_path / "missing.yml")])
+
+        assert exit_code == under_test.ERROR
+        assert "No such file" in capsys.readouterr().err
+
+
+class TestConvert:
+    @pytest.mark.parametrize("destination", ["out.json", "out.json.gz"])
+    def test_yaml_can_be_converted_to_json(self, tmp_path, destination):
+        project = build_project()
+        source = write_project(tmp_path, "project.yml", project)
+        output = str(tmp_path / destination)
+
+        assert under_test.main(["convert", source, output]) == under_test.OK
+
+        assert EvgProject.from_file(output) == EvgProject.from_file(source)
+
+    def test_json_can_be_converted_to_yaml(self, tmp_path):
+        project = build_project()
+        source = str(tmp_path / "project.json")
+        ShrubService.write_json(project, source)
+        output = tmp_path / "out.yml"
+
+        assert under_test.main(["convert", source, str(output)]) == under_test.OK
+
+        assert output.read_text() == ShrubService.generate_yaml(EvgProject.from_file(source))
+
+    def test_format_can_be_given(self, tmp_path):
+        source = write_project(tmp_path, "project.yml", build_project())
+        output = tmp_path / "out.txt"
+
+        assert under_test.main(["convert", source, str(output), "--format", "json"]) == 0
+
+        assert json.loads(output.read_text()) == yaml.safe_load(open(source))
+
+    def test_complex_project_round_trips(self, tmp_path, sample_files_location):
+        source = str(sample_files_location / "mongo_evergreen.yml")
+        output = str(tmp_path / "mongo_evergreen.yml.gz")
+
+        assert under_test.main(["convert", source, output]) == under_test.OK
+
+        assert EvgProject.from_file(output) == EvgProject.from_file(source)
+
+
+class TestStats:
+    def test_entities_and_sizes_are_reported(self, tmp_path, capsys):
+        project = build_project()
+        file_location = write_project(tmp_path, "project.yml", project)
+
+        assert under_test.main(["stats", file_location, "--top", "2"]) == under_test.OK
+
+        lines = capsys.readouterr().out.splitlines()
+        assert "  tasks: 3" in lines
+        assert "  buildvariants: 1" in lines
+        assert f"total size (bytes): {len(open(file_location).read().encode())}" in lines
+        start = lines.index("largest tasks (bytes):") + 1
+        largest = lines[start : start + 2]
+        assert [line.split(":")[0].strip() for line in largest] == ["task_2", "task_1"]
+
+    def test_duplicated_commands_are_reported(self, tmp_path, capsys):
+        file_location = write_project(tmp_path, "project.yml", build_project())
+
+        under_test.main(["stats", file_location])
+
+        lines = capsys.readouterr().out.splitlines()
+        duplicated = lines[lines.index("most duplicated commands (bytes):") + 1]
+        assert duplicated.startswith("  do setup: ")
+        assert "(6 x " in duplicated
+
+
+class TestDiff:
+    def test_identical_files_have_no_changes(self, tmp_path, capsys):
+        old = write_project(tmp_path, "old.yml", build_project())
+        new = str(tmp_path / "new.json")
+        ShrubService.write_json(build_project(), new)
+
+        assert under_test.main(["diff", old, new]) == under_test.OK
+        assert capsys.readouterr().out == ""
+
+    def test_changes_are_reported(self, tmp_path, capsys):
+        old_project = build_project(n_tasks=3)
+        new_project = build_project(n_tasks=2)
+        new_project.tasks[0] = EvgTask(name="task_0")
+        new_project.tasks.append(EvgTask(name="new_task"))
+        new_project.stepback = True
+        old = write_project(tmp_path, "old.yml", old_project)
+        new = write_project(tmp_path, "new.yml", new_project)
+
+        assert under_test.main(["diff", old, new]) == under_test.FAILED
+
+        assert capsys.readouterr().out.splitlines() == [
+            "~ buildvariants[linux]",
+            "~ tasks[task_0]",
+            "- tasks[task_2]",
+            "+ tasks[new_task]",
+            "+ stepback",
+        ]
+
+
+class TestBench:
+    def test_timings_are_reported(self, tmp_path, capsys):
+        file_location = write_project(tmp_path, "project.yml", build_project())
+
+        assert under_test.main(["bench", file_location, "--repeat", "1"]) == under_test.OK
+
+        lines = capsys.readouterr().out.splitlines()
+        assert [line.split(":")[0] for line in lines] == ["load", "dump yaml", "dump json"]
+
+
+class TestCountArguments:
+    @pytest.mark.parametrize(
+        "args",
+        [
+            ["bench", "project.yml", "--repeat", "0"],
+            ["stats", "project.yml", "--top", "-1"],
+            ["convert", "project.yml", "project.json", "--chunk-size", "0"],
+            ["bench", "project.yml", "--repeat", "many"],
+        ],
+    )
+    def test_counts_must_be_positive(self, args, capsys):
+        with pytest.raises(SystemExit) as exit_info:
+            under_test.main(args)
+
+        assert exit_info.value.code == 2
+        assert "argument" in capsys.readouterr().err
@@ -0,0 +1,109 @@
+"""Unit tests for compressed_io.py."""
+import gzip
+import sys
+
+import pytest
+
+import shrub.compressed_io as under_test
+
+
+class TestCompressionFor:
+    @pytest.mark.parametrize(
+        "file_location,expected",
+        [
+            ("project.json", None),
+            ("project.yml.gz", under_test.GZIP),
+            ("project.json.ZST", under_test.ZSTD),
+        ],
+    )
+    def test_compression_is_detected_from_extension(self, file_location, expected):
+        assert under_test.compression_for(file_location) == expected
+
+
+class TestCompressedWriter:
+    def test_text_is_compressed(self, tmp_path):
+        file_location = str(tmp_path / "out.txt.gz")
+
+        with under_test.CompressedWriter(file_location, level=1) as writer:
+            for i in range(10000):
+                writer.write(f"line {i}\n")
+
+        with gzip.open(file_location, "rt") as f:
+            assert f.read() == "".join(f"line {i}\n" for i in range(10000))
+        with under_test.open_text(file_location) as f:
+            assert f.readline() == "line 0\n"
+
+    def test_uncompressed_files_are_written_as_is(self, tmp_path):
+        file_location = str(tmp_path / "out.txt")
+
+        with under_test.CompressedWriter(file_location) as writer:
+            writer.write("text")
+
+        with under_test.open_text(file_location) as f:
+            assert f.read() == "text"
+
+    def test_zstd_round_trip(self, tmp_path):
+        pytest.importorskip("zstandard")
+        file_location = str(tmp_path / "out.txt.zst")
+
+        with under_test.CompressedWriter(file_location) as writer:
+            writer.write("text")
+
+        with under_test.open_text(file_location) as f:
+            assert f.read() == "text"
+
+    def test_zstd_requires_zstandard(self, tmp_path, monkeypatch):
+        monkeypatch.setitem(sys.modules, "zstandard", None)
+
+        with pytest.raises(ImportError, match="zstandard"):
+            under_test.CompressedWriter(str(tmp_path / "out.txt.zst"))
+
+    def test_unsupported_compression(self, tmp_path):
+        with pytest.raises(ValueError):
+            under_test.CompressedWriter(str(tmp_path / "out.txt"), compression="lz4")
+
+    def test_write_errors_are_raised(self, tmp_path, monkeypatch):
+        class FullDisk:
+            def write(self, data):
+                raise OSError("No space left on device")
+
+            def close(self):
+                pass
+
+        writer = under_test.CompressedWriter(str(tmp_path / "out.txt"))
+        monkeypatch.setattr(writer, "_open", FullDisk)
+
+        with pytest.raises(OSError, match="No space"):
+            with writer:
+                writer.write("text")
+        assert not (tmp_path / "out.txt").exists()
+
+    @pytest.mark.parametrize("file_name", ["out.txt", "out.txt.gz"])
+    def test_partial_output_is_deleted_on_error(self, tmp_path, file_name):
+        file_location = tmp_path / file_name
+
+        with pytest.raises(RuntimeError):
+            with under_test.CompressedWriter(str(file_location)) as writer:
+                writer.write("a" * under_test.CHUNK_SIZE)
+                raise RuntimeError("generation failed")
+
+        assert not file_location.exists()
+
+    def test_abort_without_writing(self, tmp_path):
+        file_location = tmp_path / "out.txt"
+        file_location.write_text("existing")
+        writer = under_test.CompressedWriter(str(file_location))
+
+        writer.abort()
+
+        assert file_location.read_text() == "existing"
+
+
+class TestLoadFile:
+    @pytest.mark.parametrize("name", ["config.yml", "config.yml.gz", "config.json.gz"])
+    def test_configuration_is_parsed(self, tmp_path, name):
+        file_location = str(tmp_path / name)
+        with under_test.CompressedWriter(file_location) as writer:
+            writer.write('{"tasks": [{"name": "compile"}]}')
+
+        assert under_test.load_file(file_location) == {"tasks": [{"name": "compile"}]}
@@ -164,3 +164,30 @@ class TestConfiguration:
 
         with pytest.raises(TypeError):
             c.ignore_files("filename")
+
+    def test_json_is_indented_by_default(self):
+        c = Configuration()
+        c.exec_timeout(20).ignore_file("file1")
+
+        assert (
+            c.to_json()
+            == '{\n    "exec_timeout_secs": 20,\n    "ignore": [\n        "file1"\n    ]\n}'
+        )
+
+    def test_compact_json(self):
+        c = Configuration()
+        c.stepback().exec_timeout(20).ignore_file("fïle1")
+
+        assert (
+            c.to_json(compact=True) == '{"exec_timeout_secs":20,"stepback":true,"ignore":["fïle1"]}'
+        )
+        assert c.to_json(compact=True, sort_keys=True) == (
+            '{"exec_timeout_secs":20,"ignore":["fïle1"],"stepback":true}'
+        )
+
+    def test_json_bytes(self):
+        c = Configuration()
+        c.stepback().ignore_file("fïle1")
+
+        assert c.to_json_bytes() == c.to_json().encode()
+        assert c.to_json_bytes(compact=True) == '{"stepback":true,"ignore":["fïle1"]}'.encode()
@@ -0,0 +1,147 @@
+"""Unit tests for shrub.conversion."""
+import json
+
+import pytest
+
+import shrub.conversion as under_test
+from shrub.command import CommandDefinition, CommandSequence
+from shrub.config import Configuration
+from shrub.task import TaskDependency
+from shrub.v2 import BuildVariant, FunctionCall, ShrubProject, Task, TaskGroup
+from shrub.v2.command import BuiltInCommand, CommandType
+from shrub.v3.evg_command import shell_exec
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_task import EvgTask
+from shrub.v3.shrub_service import ShrubService
+from shrub.variant import DisplayTaskDefinition, TaskSpec
+
+
+def build_shrub_project():
+    setup = FunctionCall("setup", {"flags": "--fast"})
+    compile_task = Task("compile", [setup, BuiltInCommand("shell.exec", {"script": "make"})])
+    test_task = Task(
+        "test", [setup, BuiltInCommand("shell.exec", {"script": "test"}).set_type(CommandType.TEST)]
+    ).dependency("compile")
+    group = TaskGroup(
+        "group", [Task("lint", [])], max_hosts=2, setup_group=[FunctionCall("prepare")]
+    )
+    variant = BuildVariant("linux", batch_time=60, run_on=["ubuntu"], expansions={"a": "b"})
+    variant.add_task(compile_task, distros=["large"]).add_task_group(group)
+    variant.display_task("tests", {test_task})
+    return ShrubProject({variant})
+
+
+def build_configuration():
+    config = Configuration()
+    setup = CommandDefinition().function("setup").vars({"flags": "--fast"})
+    config.task("compile").command(setup).command(
+        CommandDefinition().command("shell.exec").params({"script": "make"}).type("setup")
+    )
+    config.task("test").command(setup).dependency(TaskDependency("compile").variant("linux"))
+    config.task_group("group").tasks(["test"]).max_hosts(2)
+    config.function("setup").add(CommandDefinition().command("shell.exec").param("script", "ls"))
+    variant = config.variant("linux").run_on("ubuntu").expansion("a", "b")
+    variant.task(TaskSpec("compile").distro("large")).task(TaskSpec("group"))
+    variant.display_task(DisplayTaskDefinition("tests").execution_task("test"))
+    config.pre(CommandSequence().add(setup)).stepback()
+    return config
+
+
+def generated_json(project):
+    return json.loads(ShrubService.generate_json(project))
+
+
+class TestShrubProjectToEvgProject:
+    def test_configuration_is_unchanged(self):
+        project = build_shrub_project()
+
+        evg_project = project.to_evg_project()
+
+        expected = json.loads(project.json())
+        # The v2 API names the batch time of build variants differently.
+        expected["buildvariants"][0]["batchtime"] = expected["buildvariants"][0].pop("batch_time")
+        assert generated_json(evg_project) == expected
+
+    def test_commands_are_shared(self):
+        project = build_shrub_project()
+
+        evg_project = project.to_evg_project()
+
+        compile_task, test_task = evg_project.tasks[0], evg_project.tasks[2]
+        assert compile_task.commands[0] is test_task.commands[0]
+        v2_compile = next(t for t in project.all_tasks() if t.name == "compile")
+        assert compile_task.commands[0].vars is v2_compile.commands[0].parameters
+        assert compile_task.commands[1].params is v2_compile.commands[1].params
+
+    def test_unsupported_configuration_is_rejected(self):
+        project = ShrubProject({BuildVariant("linux", activate=False)})
+
+        with pytest.raises(ValueError):
+            project.to_evg_project()
+
+    def test_unknown_commands_are_rejected(self):
+        variant = BuildVariant("linux").add_task(Task("t", [BuiltInCommand("not.a.command", {})]))
+
+        with pytest.raises(ValueError):
+            ShrubProject({variant}).to_evg_project()
+
+
+class TestEvgProjectToShrubProject:
+    def test_round_trip(self):
+        project = build_shrub_project()
+
+        converted = ShrubProject.from_evg_project(project.to_evg_project())
+
+        assert converted.json() == project.json()
+
+    def test_unsupported_configuration_is_rejected(self):
+        evg_project = EvgProject(tasks=[EvgTask(name="t", tags=["fast"])])
+
+        with pytest.raises(ValueError):
+            ShrubProject.from_evg_project(evg_project)
+
+
+class TestConfigurationToEvgProject:
+    def test_configuration_is_unchanged(self):
+        config = build_configuration()
+
+        evg_project = config.to_evg_project()
+
+        assert generated_json(evg_project) == config.to_map()
+
+    def test_commands_are_shared(self):
+        config = build_configuration()
+
+        evg_project = config.to_evg_project()
+
+        assert evg_project.tasks[0].commands[0] is evg_project.pre[0]
+        assert evg_project.pre[0].vars is config._pre._cmd_seq[0]._vars
+
+    def test_unsupported_configuration_is_rejected(self):
+        config = Configuration()
+        config.task("compile").priority(10)
+
+        with pytest.raises(ValueError):
+            config.to_evg_project()
+
+
+class TestEvgProjectToConfiguration:
+    def test_round_trip(self):
+        config = build_configuration()
+
+        converted = Configuration.from_evg_project(config.to_evg_project())
+
+        assert converted.to_map() == config.to_map()
+
+    def test_single_command_functions_become_sequences(self):
+        evg_project = EvgProject(functions={"setup": shell_exec(script="ls")})
+
+        config = Configuration.from_evg_project(evg_project)
+
+        assert config.to_map() == {
+            "functions": {"setup": [{"command": "shell.exec", "params": {"script": "ls"}}]}
+        }
+
+    def test_unsupported_configuration_is_rejected(self):
+        with pytest.raises(ValueError):
+            under_test.evg_project_to_configuration(EvgProject(oom_tracker=True))
@@ -0,0 +1,52 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+# Modules that are slow to import and should only be imported once they are used.
+DEFERRED_MODULES = ["croniter", "orjson", "yaml", "zstandard"]
+# Deferred modules a package needs at module level.
+REQUIRED_MODULES = {"shrub.v3.shrub_service": ["yaml"]}
+# Budget for the cumulative import time of each package, in microseconds. The budgets are loose
+# enough for slow CI hosts, while catching a heavy dependency being imported at module level.
+IMPORT_BUDGETS = {
+    "shrub.config": 500_000,
+    "shrub.v2": 500_000,
+    "shrub.v3": 500_000,
+    "shrub.v3.evg_project": 500_000,
+    "shrub.v3.shrub_service": 500_000,
+}
+RUNS = 3
+
+
+def run_python(*args):
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, check=True)
+
+
+def import_time(module):
+    """Get the cumulative import time of the given module reported by `-X importtime`."""
+    result = run_python("-X", "importtime", "-c", f"import {module}")
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise AssertionError(f"No import time reported for {module}")
+
+
+@pytest.mark.parametrize("module", IMPORT_BUDGETS)
+def test_heavy_modules_are_not_imported(module):
+    deferred = [m for m in DEFERRED_MODULES if m not in REQUIRED_MODULES.get(module, [])]
+    result = run_python(
+        "-c",
+        f"import json, sys, {module}; "
+        f"print(json.dumps([m for m in {deferred!r} if m in sys.modules]))",
+    )
+
+    assert json.loads(result.stdout) == []
+
+
+@pytest.mark.parametrize("module, budget", IMPORT_BUDGETS.items())
+def test_import_time_is_within_budget(module, budget):
+    # The fastest of a few runs is the least affected by other load on the host.
+    assert min(import_time(module) for _ in range(RUNS)) < budget
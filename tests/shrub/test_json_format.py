@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+import shrub.json_format as under_test
+
+OBJ = {"b": [1, {"d": "välue", "c": None}], "a": True}
+
+
+@pytest.fixture(params=under_test.available_backends())
+def backend(request):
+    previous = under_test.get_backend()
+    under_test.set_backend(request.param)
+    yield request.param
+    under_test.set_backend(previous)
+
+
+class TestDumps:
+    def test_json_is_indented_by_default(self):
+        assert under_test.dumps(OBJ) == json.dumps(OBJ, indent=4)
+
+    def test_compact_json_has_no_whitespace(self, backend):
+        assert under_test.dumps(OBJ, compact=True) == ('{"b":[1,{"d":"välue","c":null}],"a":true}')
+
+    @pytest.mark.parametrize("compact", [True, False])
+    def test_keys_can_be_sorted(self, backend, compact):
+        out = under_test.dumps(OBJ, compact=compact, sort_keys=True)
+
+        assert json.loads(out) == OBJ
+        assert out.index('"a"') < out.index('"b"')
+        assert out.index('"c"') < out.index('"d"')
+
+
+class TestDumpb:
+    @pytest.mark.parametrize("compact", [True, False])
+    def test_bytes_are_encoded_string(self, backend, compact):
+        out = under_test.dumpb(OBJ, compact=compact, sort_keys=True)
+
+        assert out == under_test.dumps(OBJ, compact=compact, sort_keys=True).encode()
+
+
+class TestBackends:
+    def test_stdlib_is_always_available(self):
+        assert under_test.STDLIB in under_test.available_backends()
+
+    def test_stdlib_is_used_by_default(self):
+        previous = under_test.get_backend()
+        try:
+            under_test.set_backend()
+
+            assert under_test.get_backend() == under_test.STDLIB
+        finally:
+            under_test.set_backend(previous)
+
+    @pytest.mark.parametrize(
+        "obj",
+        [
+            OBJ,
+            {"ünïcode": "line\u2028separator", "nested": [[{"a": [None, False, -1]}]]},
+            {2: "int key", 1: "other int key"},
+            {"big": 2**64, "negative": -(2**63) - 1},
+        ],
+    )
+    @pytest.mark.parametrize("sort_keys", [True, False])
+    def test_backends_give_same_json(self, backend, obj, sort_keys):
+        expected = json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys, ensure_ascii=False)
+
+        assert under_test.dumps(obj, compact=True, sort_keys=sort_keys) == expected
+
+    def test_unknown_backend_is_rejected(self):
+        with pytest.raises(ValueError):
+            under_test.set_backend("not a backend")
+
+    def test_registered_backend_is_used(self):
+        previous = under_test.get_backend()
+        under_test.register_backend("custom", lambda obj, sort_keys: b"custom")
+        try:
+            under_test.set_backend("custom")
+
+            assert under_test.dumps(OBJ, compact=True) == "custom"
+            assert under_test.dumps(OBJ) == json.dumps(OBJ, indent=4)
+        finally:
+            under_test.set_backend(previous)
+            del under_test._BACKENDS["custom"]
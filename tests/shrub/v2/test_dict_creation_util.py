@@ -35,3 +35,10 @@ class TestAddExistingFromDict:
         )
 
         assert obj == {"item 1": "an item", "item 4": "another item"}
+
+
+class TestExistingItems:
+    def test_missing_and_empty_values_are_filtered(self):
+        items = under_test.existing_items(("a", 1), ("b", None), ("c", {}), ("d", False))
+
+        assert list(items) == [("a", 1), ("d", False)]
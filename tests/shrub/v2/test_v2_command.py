@@ -184,3 +184,24 @@ class TestSubprocessExec:
 
         assert d["command"] == "subprocess.exec"
         assert d["params"]["command"] == "command"
+
+
+class TestCommandFromDict:
+    def test_function_call(self):
+        command = under_test.command_from_dict({"func": "run tests", "vars": {"a": "b"}})
+
+        assert isinstance(command, under_test.FunctionCall)
+        assert command.as_dict() == {"func": "run tests", "vars": {"a": "b"}}
+
+    def test_built_in_command(self):
+        obj = {"command": "shell.exec", "params": {"script": "ls"}, "type": "setup"}
+
+        command = under_test.command_from_dict(obj)
+
+        assert isinstance(command, under_test.BuiltInCommand)
+        assert command.command_type == under_test.CommandType.SETUP
+        assert command.as_dict() == obj
+
+    def test_unsupported_keys_are_rejected(self):
+        with pytest.raises(ValueError):
+            under_test.command_from_dict({"command": "shell.exec", "timeout_secs": 10})
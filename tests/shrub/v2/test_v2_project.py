@@ -0,0 +1,158 @@
+"""Unit tests for shrub.v2.project."""
+import json
+
+import pytest
+import yaml
+
+from shrub.v2 import BuildVariant, FunctionCall, Task, TaskGroup
+
+import shrub.json_format as json_format
+import shrub.v2.project as under_test
+from shrub.compressed_io import open_text
+
+
+def build_project():
+    project = under_test.ShrubProject.empty()
+    for name in ["variant c", "variant a", "variant b"]:
+        variant = BuildVariant(name)
+        variant.add_task(Task(f"task of {name}", [FunctionCall("run tests")]))
+        variant.add_task_group(
+            TaskGroup(f"group of {name}", [Task(f"grouped {name}", [])], max_hosts=2),
+            distros=["ubuntu"],
+        )
+        project.add_build_variant(variant)
+    return project
+
+
+class TestShrubProject:
+    def test_build_variants_are_ordered_by_name(self):
+        d = build_project().as_dict()
+
+        assert [bv["name"] for bv in d["buildvariants"]] == ["variant a", "variant b", "variant c"]
+
+    def test_json_is_indented_by_default(self):
+        project = build_project()
+
+        assert project.json() == json.dumps(project.as_dict(), indent=4)
+
+    def test_compact_json(self):
+        project = build_project()
+
+        out = project.json(compact=True)
+
+        assert out == json.dumps(project.as_dict(), separators=(",", ":"))
+
+    def test_json_bytes(self):
+        project = build_project()
+
+        assert project.json_bytes() == project.json().encode()
+        assert project.json_bytes(compact=True) == project.json(compact=True).encode()
+
+    def test_json_bytes_are_encoded_by_json_backend(self):
+        encoded = []
+
+        def encode(obj, sort_keys):
+            encoded.append(obj)
+            return json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys).encode()
+
+        previous = json_format.get_backend()
+        json_format.register_backend("recording", encode)
+        try:
+            json_format.set_backend("recording")
+            project = build_project()
+
+            out = project.json_bytes(compact=True)
+        finally:
+            json_format.set_backend(previous)
+            del json_format._BACKENDS["recording"]
+
+        assert out == project.json(compact=True).encode()
+        assert [task["name"] for task in encoded if "commands" in task] == [
+            "grouped variant a",
+            "grouped variant b",
+            "grouped variant c",
+            "task of variant a",
+            "task of variant b",
+            "task of variant c",
+        ]
+
+    def test_compact_json_is_identical_across_runs(self):
+        assert build_project().json(compact=True, sort_keys=True) == build_project().json(
+            compact=True, sort_keys=True
+        )
+
+    def test_sorted_keys(self):
+        out = build_project().json(compact=True, sort_keys=True)
+
+        assert out.startswith('{"buildvariants":[{"name":"variant a","tasks":')
+
+    def test_json_is_streamed(self):
+        project = build_project()
+
+        pieces = list(project.iter_json(compact=True))
+
+        assert len(pieces) > 1
+        assert "".join(pieces) == json.dumps(project.as_dict(), separators=(",", ":"))
+
+    def test_yaml_is_streamed(self):
+        project = build_project()
+
+        pieces = list(project.iter_yaml(chunk_size=1))
+
+        assert "".join(pieces) == project.yaml()
+        assert yaml.safe_load(project.yaml()) == project.as_dict()
+
+    def test_write_json(self, tmp_path):
+        project = build_project()
+        file_location = str(tmp_path / "project.json.gz")
+
+        project.write_json(file_location, compact=True)
+
+        with open_text(file_location) as f:
+            assert f.read() == project.json(compact=True)
+
+    def test_write_yaml(self, tmp_path):
+        project = build_project()
+        file_location = tmp_path / "project.yml"
+
+        project.write_yaml(str(file_location))
+
+        assert file_location.read_text() == project.yaml()
+
+
+class TestFromDict:
+    def test_generated_project_is_reconstructed(self):
+        project = build_project()
+
+        loaded = under_test.ShrubProject.from_dict(project.as_dict())
+
+        assert loaded.json() == project.json()
+        assert {bv.name for bv in loaded.build_variants} == {"variant a", "variant b", "variant c"}
+
+    def test_loaded_project_can_be_modified(self):
+        loaded = under_test.ShrubProject.from_dict(build_project().as_dict())
+
+        loaded.add_build_variant(BuildVariant("variant d").add_task(Task("new task", [])))
+
+        assert "new task" in {task["name"] for task in loaded.as_dict()["tasks"]}
+
+    def test_unsupported_sections_are_rejected(self):
+        with pytest.raises(ValueError):
+            under_test.ShrubProject.from_dict({"functions": {}})
+
+    def test_tasks_not_run_by_a_variant_are_rejected(self):
+        with pytest.raises(ValueError):
+            under_test.ShrubProject.from_dict({"tasks": [{"name": "orphan", "commands": []}]})
+
+    @pytest.mark.parametrize("name", ["project.yml", "project.json.gz"])
+    def test_from_file(self, tmp_path, name):
+        project = build_project()
+        file_location = tmp_path / name
+        if name.startswith("project.json"):
+            project.write_json(str(file_location))
+        else:
+            project.write_yaml(str(file_location))
+
+        loaded = under_test.ShrubProject.from_file(file_location)
+
+        assert loaded.json() == project.json()
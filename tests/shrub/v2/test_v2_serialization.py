@@ -0,0 +1,71 @@
+"""Unit tests for shrub.v2.serialization."""
+import json
+
+import pytest
+import yaml
+
+import shrub.v2.serialization as under_test
+
+
+class Config:
+    def __init__(self, name, children=None, values=None):
+        self.name = name
+        self.children = children or []
+        self.values = values
+
+    def iter_items(self):
+        yield "name", self.name
+        yield "children", iter(self.children)
+        if self.values is not None:
+            yield "values", (value for value in self.values)
+
+
+def build_config():
+    shared = {"key": "välue"}
+    return Config(
+        "root",
+        [Config("b", values=[shared, shared, 1.5]), Config("a", [Config("leaf")]), Config("c")],
+        values=[],
+    )
+
+
+class TestMaterialize:
+    def test_configuration_objects_are_built(self):
+        assert under_test.materialize(Config("a", [Config("b", values=[1])])) == {
+            "name": "a",
+            "children": [{"name": "b", "children": [], "values": [1]}],
+        }
+
+    def test_plain_values_are_unchanged(self):
+        value = {"a": [1, 2]}
+
+        assert under_test.materialize(value) is value
+
+
+class TestIterJson:
+    @pytest.mark.parametrize("compact", [True, False])
+    @pytest.mark.parametrize("sort_keys", [True, False])
+    def test_json_matches_materialized_json(self, compact, sort_keys):
+        expected = under_test.dumps(
+            under_test.materialize(build_config()), compact=compact, sort_keys=sort_keys
+        )
+
+        out = "".join(under_test.iter_json(build_config(), compact=compact, sort_keys=sort_keys))
+
+        assert out == expected
+        assert json.loads(out) == under_test.materialize(build_config())
+
+    def test_json_is_generated_in_pieces(self):
+        pieces = list(under_test.iter_json(build_config()))
+
+        assert len(pieces) > 3
+
+
+class TestIterYaml:
+    @pytest.mark.parametrize("chunk_size", [1, 2, 100])
+    def test_yaml_matches_materialized_yaml(self, chunk_size):
+        expected = yaml.dump(under_test.materialize(build_config()))
+
+        out = "".join(under_test.iter_yaml(build_config(), chunk_size=chunk_size))
+
+        assert out == expected
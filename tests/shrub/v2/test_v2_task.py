@@ -1,4 +1,5 @@
 """Unit tests for shrub.v2.task."""
+import pytest
 
 import shrub.v2.task as under_test
 
@@ -72,3 +73,27 @@ class TestTaskSpec:
         assert spec["name"] == "task_name"
         assert spec["activate"] is False
         assert "my distro" in spec["distros"]
+
+
+class TestFromDict:
+    def test_task_round_trip(self):
+        obj = {
+            "name": "task",
+            "commands": [{"func": "setup"}, {"command": "shell.exec", "params": {"script": "ls"}}],
+            "depends_on": [{"name": "compile", "variant": "linux"}],
+        }
+
+        assert under_test.Task.from_dict(obj).as_dict() == obj
+
+    def test_task_group_round_trip(self):
+        tasks = {"a": under_test.Task("a", []), "b": under_test.Task("b", [])}
+        obj = {"name": "group", "tasks": ["a", "b"], "max_hosts": 2, "setup_task": [{"func": "f"}]}
+
+        group = under_test.TaskGroup.from_dict(obj, tasks)
+
+        assert group.tasks == [tasks["a"], tasks["b"]]
+        assert group.as_dict() == obj
+
+    def test_task_group_with_undefined_task(self):
+        with pytest.raises(ValueError):
+            under_test.TaskGroup.from_dict({"name": "group", "tasks": ["missing"]}, {})
@@ -80,6 +80,22 @@ class TestBuildVariant:
         assert d["display_tasks"][0]["name"] == "display"
         assert len(d["display_tasks"][0]["execution_tasks"]) == n_tasks
 
+    def test_display_task_of(self):
+        bv = under_test.BuildVariant("build variant")
+        bv.display_task("display", {Task("task 1", [])}, {TaskGroup("task group", [])})
+
+        assert bv.display_task_of("task 1") == "display"
+        assert bv.display_task_of("task group") == "display"
+        assert bv.display_task_of("task 2") is None
+
+    def test_display_task_execution_tasks_are_sorted(self):
+        bv = under_test.BuildVariant("build variant")
+        bv.display_task("display", {Task(f"task {i}", []) for i in range(5)})
+
+        d = bv.as_dict()
+
+        assert d["display_tasks"][0]["execution_tasks"] == [f"task {i}" for i in range(5)]
+
     def test_display_task_with_different_task_types(self):
         bv = under_test.BuildVariant("build variant")
 
@@ -142,3 +158,29 @@ class TestBuildVariant:
         d = bv.as_dict()
 
         assert d["activate"] is False
+
+
+class TestBuildVariantFromDict:
+    def test_round_trip(self):
+        task = Task("task", [])
+        group = TaskGroup("group", [Task("grouped", [])])
+        obj = {
+            "name": "variant",
+            "tasks": [
+                {"name": "task", "distros": ["ubuntu"], "activate": False},
+                {"name": "group"},
+                {"name": "existing"},
+            ],
+            "display_tasks": [{"name": "display", "execution_tasks": ["existing", "task"]}],
+            "expansions": {"a": "b"},
+            "run_on": ["rhel"],
+            "batch_time": 60,
+        }
+
+        bv = under_test.BuildVariant.from_dict(obj, {"task": task}, {"group": group})
+
+        assert bv.tasks == {task}
+        assert bv.task_groups == {group}
+        assert [t.name for t in bv.existing_tasks] == ["existing"]
+        assert bv.display_task_of("existing") == "display"
+        assert bv.as_dict() == obj
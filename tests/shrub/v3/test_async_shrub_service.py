@@ -0,0 +1,142 @@
+"""Unit tests for async_shrub_service.py."""
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import shrub.v3.async_shrub_service as under_test
+from shrub.v3.evg_build_variant import BuildVariant
+from shrub.v3.evg_command import FunctionCall
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_task import EvgTask
+from shrub.v3.evg_task_group import EvgTaskGroup
+from shrub.v3.shrub_service import ShrubService
+
+
+async def read_test_list(index, delay):
+    await asyncio.sleep(delay)
+    return [f"test_{index}_{i}.js" for i in range(2)]
+
+
+async def build_task(index, delay=0):
+    tests = await read_test_list(index, delay)
+    return EvgTask(
+        name=f"task_{index}", commands=[FunctionCall(func="run", vars={"tests": " ".join(tests)})]
+    )
+
+
+async def build_tasks(indexes):
+    return [await build_task(index) for index in indexes]
+
+
+async def build_variant():
+    return BuildVariant(name="linux", tasks=[])
+
+
+async def build_task_group():
+    return EvgTaskGroup(name="group", tasks=["task_0"])
+
+
+class TestAsyncProjectBuilder:
+    def test_project_keeps_order_factories_were_added_in(self):
+        async def build():
+            builder = under_test.AsyncProjectBuilder(concurrency=2)
+            # Earlier factories finish last.
+            for index in range(4):
+                builder.add_tasks(build_task(index, delay=0.01 * (4 - index)))
+            builder.add_tasks(build_tasks([4, 5]))
+            builder.add_build_variant(build_variant())
+            builder.add_task_group(build_task_group())
+            return await builder.build(stepback=True)
+
+        project = asyncio.run(build())
+
+        assert [task.name for task in project.tasks] == [f"task_{i}" for i in range(6)]
+        assert project.buildvariants[0].name == "linux"
+        assert project.task_groups[0].name == "group"
+        assert project.stepback is True
+
+    def test_empty_builder_builds_empty_project(self):
+        async def build():
+            return await under_test.AsyncProjectBuilder().build()
+
+        assert ShrubService.generate_json(asyncio.run(build())) == "{}"
+
+    def test_failing_factory_cancels_remaining_factories(self):
+        cancelled = []
+
+        async def slow_task():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def failing_task():
+            raise ValueError("no tests found")
+
+        async def build():
+            builder = under_test.AsyncProjectBuilder()
+            builder.add_tasks(slow_task())
+            builder.add_tasks(failing_task())
+            with pytest.raises(ValueError, match="no tests found"):
+                await builder.build()
+
+        asyncio.run(build())
+
+        assert cancelled == [True]
+
+
+class ChunkWriter:
+    def __init__(self):
+        self.chunks = []
+
+    async def write(self, data):
+        self.chunks.append(data)
+
+
+class TestAsyncShrubService:
+    def test_generated_output_matches_shrub_service(self):
+        project = EvgProject(tasks=[EvgTask(name="task")])
+
+        async def generate():
+            service = under_test.AsyncShrubService()
+            return await service.generate_yaml(project), await service.generate_json(project)
+
+        assert asyncio.run(generate()) == (
+            ShrubService.generate_yaml(project),
+            ShrubService.generate_json(project),
+        )
+
+    def test_output_is_written_in_chunks(self):
+        project = EvgProject(tasks=[EvgTask(name=f"task_{i}") for i in range(5)])
+
+        async def write():
+            service = under_test.AsyncShrubService()
+            yaml_writer, json_writer = ChunkWriter(), ChunkWriter()
+            await service.write_yaml(project, yaml_writer, chunk_size=2)
+            await service.write_json(project, json_writer)
+            return yaml_writer.chunks, json_writer.chunks
+
+        yaml_chunks, json_chunks = asyncio.run(write())
+
+        assert len(yaml_chunks) > 1
+        assert "".join(yaml_chunks) == ShrubService.generate_yaml(project)
+        assert len(json_chunks) > 1
+        assert json.loads("".join(json_chunks)) == json.loads(ShrubService.generate_json(project))
+
+    def test_output_can_be_written_from_a_process_pool(self, tmp_path):
+        project = EvgProject(tasks=[EvgTask(name="task")])
+        file_location = str(tmp_path / "project.json")
+
+        async def write():
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                service = under_test.AsyncShrubService(executor)
+                async with under_test.AsyncFileWriter(file_location) as writer:
+                    await service.write_json(project, writer)
+
+        asyncio.run(write())
+
+        with open(file_location) as f:
+            assert json.load(f) == {"tasks": [{"name": "task"}]}
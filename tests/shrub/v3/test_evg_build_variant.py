@@ -0,0 +1,46 @@
+"""Unit tests for evg_build_variant.py."""
+import pytest
+from pydantic import ValidationError
+
+import shrub.v3.evg_build_variant as under_test
+from shrub.v3.evg_task import EvgTask
+from shrub.v3.shrub_service import ShrubService
+
+
+class TestFromTasks:
+    def test_variant_matches_one_built_from_task_refs(self):
+        tasks = [EvgTask(name=f"task_{i}") for i in range(5)]
+        display_tasks = [under_test.DisplayTask(name="all", execution_tasks=["task_0"])]
+
+        variant = under_test.BuildVariant.from_tasks(
+            "variant", tasks, distros=["ubuntu2204"], display_tasks=display_tasks, stepback=True
+        )
+        expected = under_test.BuildVariant(
+            name="variant",
+            tasks=[task.get_task_ref(["ubuntu2204"]) for task in tasks],
+            display_tasks=display_tasks,
+            stepback=True,
+        )
+
+        assert ShrubService.generate_json(variant) == ShrubService.generate_json(expected)
+        assert ShrubService.generate_yaml(variant) == ShrubService.generate_yaml(expected)
+
+    def test_task_refs_have_distros(self):
+        variant = under_test.BuildVariant.from_tasks(
+            "variant", [EvgTask(name="task_0"), "task_1"], distros=["ubuntu2204"]
+        )
+
+        assert [ref.name for ref in variant.tasks] == ["task_0", "task_1"]
+        assert [ref.distros for ref in variant.tasks] == [["ubuntu2204"], ["ubuntu2204"]]
+        assert [ref.model_fields_set for ref in variant.tasks] == [{"name", "distros"}] * 2
+
+    def test_task_refs_without_distros(self):
+        variant = under_test.BuildVariant.from_tasks("variant", ["task_0"])
+
+        assert ShrubService.generate_json(variant) == (
+            '{"name":"variant","tasks":[{"name":"task_0"}]}'
+        )
+
+    def test_invalid_distros_are_rejected(self):
+        with pytest.raises(ValidationError):
+            under_test.BuildVariant.from_tasks("variant", ["task_0"], distros="ubuntu2204")
@@ -0,0 +1,89 @@
+"""Unit tests for evg_critical_path.py."""
+import pytest
+
+import shrub.v3.evg_critical_path as under_test
+from shrub.v3.evg_build_variant import BuildVariant
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_runtime_history import RuntimeHistory
+from shrub.v3.evg_task import EvgTask, EvgTaskDependency
+from shrub.v3.evg_task_group import EvgTaskGroup
+
+
+def depends_on(*names):
+    return [EvgTaskDependency(name=name) for name in names]
+
+
+@pytest.fixture
+def project():
+    return EvgProject(
+        tasks=[
+            EvgTask(name="compile"),
+            EvgTask(name="unit", depends_on=depends_on("compile")),
+            EvgTask(name="jstests", depends_on=depends_on("compile")),
+            EvgTask(name="lint"),
+            EvgTask(name="package", depends_on=depends_on("unit", "jstests")),
+        ],
+        buildvariants=[
+            BuildVariant.from_tasks("linux", ["compile", "unit", "jstests", "lint", "package"])
+        ],
+    )
+
+
+RUNTIMES = {"compile": 30, "unit": 10, "jstests": 40, "lint": 5, "package": 2}
+
+
+class TestCriticalPathAnalyzer:
+    def test_critical_path_of_dependencies(self, project):
+        report = under_test.CriticalPathAnalyzer(project, RUNTIMES).analyze(bottleneck_count=2)
+
+        assert [task.task for task in report.critical_path] == ["compile", "jstests", "package"]
+        assert report.critical_path_time == 72
+        assert report.makespan == 72
+        assert [task.start for task in report.critical_path] == [0, 30, 70]
+        assert all(task.slack == 0 for task in report.critical_path)
+        assert [task.task for task in report.bottlenecks] == ["jstests", "compile"]
+
+    def test_variant_hosts_bound_makespan(self, project):
+        analyzer = under_test.CriticalPathAnalyzer(project, RUNTIMES, variant_hosts={"linux": 1})
+
+        report = analyzer.analyze()
+
+        assert report.variant_bounds == {"linux": 87}
+        assert report.makespan == 87
+
+    @pytest.mark.parametrize("hosts", [0, -1])
+    def test_invalid_variant_hosts(self, project, hosts):
+        with pytest.raises(ValueError, match="linux"):
+            under_test.CriticalPathAnalyzer(project, RUNTIMES, variant_hosts={"linux": hosts})
+
+    def test_tasks_of_task_group_wait_for_hosts(self):
+        project = EvgProject(
+            tasks=[EvgTask(name=name) for name in ["a", "b", "c"]],
+            task_groups=[EvgTaskGroup(name="group", tasks=["a", "b", "c"], max_hosts=2)],
+            buildvariants=[BuildVariant.from_tasks("linux", ["group"])],
+        )
+
+        report = under_test.CriticalPathAnalyzer(project, RuntimeHistory({}, default=10)).analyze()
+
+        assert [task.task for task in report.critical_path] == ["a", "c"]
+        assert report.makespan == 20
+
+    def test_empty_project(self):
+        report = under_test.CriticalPathAnalyzer(EvgProject(), RUNTIMES).analyze()
+
+        assert report.critical_path == []
+        assert report.makespan == 0
+
+    def test_analysis_is_linear(self):
+        n_tasks = 20000
+        project = EvgProject(
+            tasks=[
+                EvgTask(name=f"task_{i}", depends_on=depends_on(f"task_{i // 2}") if i else None)
+                for i in range(n_tasks)
+            ],
+            buildvariants=[BuildVariant.from_tasks("linux", [f"task_{i}" for i in range(n_tasks)])],
+        )
+
+        report = under_test.CriticalPathAnalyzer(project, RuntimeHistory({}, default=1)).analyze()
+
+        assert report.critical_path_time == 16
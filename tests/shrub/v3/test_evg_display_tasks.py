@@ -0,0 +1,87 @@
+"""Unit tests for evg_display_tasks.py."""
+import pytest
+
+import shrub.v3.evg_display_tasks as under_test
+from shrub.v3.evg_build_variant import BuildVariant, DisplayTask
+from shrub.v3.evg_task import EvgTask
+
+
+def build_tasks():
+    return [
+        EvgTask(name="jstests_0"),
+        EvgTask(name="unittests", tags=["unit"]),
+        EvgTask(name="jstests_1"),
+        EvgTask(name="lint"),
+        EvgTask(name="jstests_2", tags=["unit"]),
+    ]
+
+
+class TestDisplayTaskGrouper:
+    def test_tasks_are_grouped_by_first_matching_rule(self):
+        grouper = under_test.DisplayTaskGrouper(
+            [
+                under_test.DisplayTaskRule(name="jstests", pattern="^jstests_"),
+                under_test.DisplayTaskRule(name="unit", tag="unit"),
+            ]
+        )
+
+        grouper.add_tasks(build_tasks())
+
+        assert grouper.display_tasks == [
+            DisplayTask(name="jstests", execution_tasks=["jstests_0", "jstests_1", "jstests_2"]),
+            DisplayTask(name="unit", execution_tasks=["unittests"]),
+        ]
+        assert grouper.display_task_of("jstests_2") == "jstests"
+        assert grouper.display_task_of("lint") is None
+        assert "unittests" in grouper
+        assert "lint" not in grouper
+
+    def test_display_tasks_are_split_by_max_size(self):
+        grouper = under_test.DisplayTaskGrouper(
+            [under_test.DisplayTaskRule(name="all")], max_size=2
+        )
+
+        grouper.add_tasks(build_tasks())
+        grouper.add_task(EvgTask(name="lint"))
+
+        assert [(dt.name, dt.execution_tasks) for dt in grouper.display_tasks] == [
+            ("all_0", ["jstests_0", "unittests"]),
+            ("all_1", ["jstests_1", "lint"]),
+            ("all_2", ["jstests_2"]),
+        ]
+        assert grouper.display_task_of("lint") == "all_1"
+
+    def test_invalid_max_size(self):
+        with pytest.raises(ValueError):
+            under_test.DisplayTaskGrouper([], max_size=0)
+
+    def test_apply_only_groups_tasks_of_variant(self):
+        existing = DisplayTask(name="existing", execution_tasks=["lint", "jstests_1"])
+        variant = BuildVariant.from_tasks(
+            "variant", ["jstests_0", "jstests_1", "jstests_2", "lint"], display_tasks=[existing]
+        )
+        grouper = under_test.DisplayTaskGrouper(
+            [under_test.DisplayTaskRule(name="jstests", pattern="^jstests_")]
+        )
+
+        grouper.apply(variant, build_tasks())
+
+        assert variant.display_tasks == [
+            existing,
+            DisplayTask(name="jstests", execution_tasks=["jstests_0", "jstests_2"]),
+        ]
+
+    def test_grouper_can_be_applied_to_several_variants(self):
+        grouper = under_test.DisplayTaskGrouper(
+            [under_test.DisplayTaskRule(name="jstests", pattern="^jstests_")]
+        )
+        grouper.add_task(EvgTask(name="jstests_2"))
+        first = BuildVariant.from_tasks("first", ["jstests_0"])
+        second = BuildVariant.from_tasks("second", ["jstests_1", "lint"])
+
+        grouper.apply(first, build_tasks())
+        grouper.apply(second, build_tasks())
+
+        assert first.display_tasks == [DisplayTask(name="jstests", execution_tasks=["jstests_0"])]
+        assert second.display_tasks == [DisplayTask(name="jstests", execution_tasks=["jstests_1"])]
+        assert grouper.display_tasks == [DisplayTask(name="jstests", execution_tasks=["jstests_2"])]
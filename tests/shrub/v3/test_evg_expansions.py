@@ -0,0 +1,134 @@
+"""Unit tests for evg_expansions.py."""
+import pytest
+
+import shrub.v3.evg_expansions as under_test
+from shrub.v3.evg_build_variant import BuildVariant
+from shrub.v3.evg_command import (
+    FunctionCall,
+    KeyValueParam,
+    expansions_update,
+    s3_put,
+    shell_exec,
+)
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_task import EvgTask, EvgTaskRef
+from shrub.v3.evg_task_group import EvgTaskGroup
+
+
+class TestFindExpansions:
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("no expansions", set()),
+            ("${a} and ${ b }", {"a", "b"}),
+            ("${a|default} ${b|} ${c|*d}", set()),
+            ("${a|${b}} ${c|${d|${e}}}", set()),
+            ("${a} | } ${unclosed", {"a"}),
+            (["${a}", {"key": "${b}"}, KeyValueParam(key="k", value="${c}")], {"a", "b", "c"}),
+        ],
+    )
+    def test_required_expansions_are_found(self, value, expected):
+        used = set()
+
+        under_test.find_expansions(value, used)
+
+        assert used == expected
+
+
+@pytest.fixture
+def project():
+    return EvgProject(
+        functions={
+            "run tests": [shell_exec("run ${suite} --dir=${workdir} ${resmoke_args|}")],
+            "upload": s3_put(
+                aws_key="${aws_key}",
+                aws_secret="${aws_secret}",
+                local_file="${local_file}",
+                remote_file="${revision}/${typo_expansion}",
+                bucket="bucket",
+                permissions="public-read",
+                content_type="text/plain",
+            ),
+        },
+        tasks=[
+            EvgTask(
+                name="test",
+                commands=[
+                    expansions_update(updates=[KeyValueParam(key="local_file", value="x")]),
+                    FunctionCall(func="run tests", vars={"suite": "${suite_name}"}),
+                    FunctionCall(func="upload"),
+                ],
+            ),
+            EvgTask(name="grouped"),
+        ],
+        task_groups=[
+            EvgTaskGroup(name="group", tasks=["grouped"], setup_group=[shell_exec("${setup}")])
+        ],
+        pre=[shell_exec("${pre_expansion}")],
+        buildvariants=[
+            BuildVariant(
+                name="linux",
+                tasks=[EvgTaskRef(name="test"), EvgTaskRef(name="group")],
+                expansions={"suite_name": "core", "aws_key": "key", "setup": "${from_project}"},
+            )
+        ],
+    )
+
+
+class TestExpansionAnalyzer:
+    def test_task_usage_includes_called_functions(self, project):
+        report = under_test.ExpansionAnalyzer(project).analyze()
+
+        assert report.task_usage["test"] == {
+            "suite_name",
+            "workdir",
+            "aws_key",
+            "aws_secret",
+            "local_file",
+            "revision",
+            "typo_expansion",
+        }
+        assert report.task_usage["grouped"] == {"setup"}
+        assert report.project_usage["pre"] == {"pre_expansion"}
+        assert report.variant_definitions["linux"] == {"suite_name", "aws_key", "setup"}
+        assert report.updated == {"local_file"}
+
+    def test_undefined_expansions_are_reported(self, project):
+        report = under_test.ExpansionAnalyzer(project).analyze()
+
+        assert [str(undefined) for undefined in report.undefined] == [
+            "linux: 'from_project' used by expansions is not defined",
+            "linux: 'pre_expansion' used by pre is not defined",
+            "linux: 'aws_secret' used by test is not defined",
+            "linux: 'typo_expansion' used by test is not defined",
+        ]
+
+    def test_known_expansions_are_not_reported(self, project):
+        known = ["from_project", "pre_expansion", "aws_secret"]
+
+        report = under_test.ExpansionAnalyzer(project, known=known).analyze()
+
+        assert [undefined.name for undefined in report.undefined] == ["typo_expansion"]
+
+    def test_updates_only_define_expansions_on_variants_running_them(self):
+        project = EvgProject(
+            tasks=[
+                EvgTask(
+                    name="fetch",
+                    commands=[expansions_update(updates=[KeyValueParam(key="url", value="x")])],
+                    tags=["all"],
+                ),
+                EvgTask(name="use", commands=[shell_exec("curl ${url}")], tags=["all"]),
+            ],
+            buildvariants=[
+                BuildVariant(name="tagged", tasks=[EvgTaskRef(name=".all")]),
+                BuildVariant(name="use only", tasks=[EvgTaskRef(name="use")]),
+            ],
+        )
+
+        report = under_test.ExpansionAnalyzer(project).analyze()
+
+        assert report.variant_updates == {"tagged": {"url"}, "use only": set()}
+        assert [str(undefined) for undefined in report.undefined] == [
+            "use only: 'url' used by use is not defined",
+        ]
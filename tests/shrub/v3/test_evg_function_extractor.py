@@ -0,0 +1,172 @@
+"""Unit tests for evg_function_extractor.py."""
+import pytest
+
+import shrub.v3.evg_function_extractor as under_test
+from shrub.v3.evg_command import (
+    FunctionCall,
+    archive_targz_extract,
+    git_get_project,
+    s3_get,
+    shell_exec,
+)
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_task import EvgTask
+from shrub.v3.shrub_service import ShrubService
+
+
+def setup_commands():
+    return [
+        git_get_project(directory="src"),
+        s3_get(
+            aws_key="key",
+            aws_secret="secret",
+            remote_file="binaries.tgz",
+            bucket="bucket",
+            local_file="binaries.tgz",
+        ),
+        archive_targz_extract(path="binaries.tgz", destination="bin"),
+    ]
+
+
+def build_project(n_tasks=5, **kwargs):
+    tasks = [
+        EvgTask(
+            name=f"task_{i}",
+            commands=[*setup_commands(), FunctionCall(func="run tests", vars={"index": i})],
+        )
+        for i in range(n_tasks)
+    ]
+    return EvgProject(tasks=tasks, **kwargs)
+
+
+def yaml_size(project):
+    return len(ShrubService.generate_yaml(project).encode())
+
+
+def expanded_commands(project, task):
+    """Get the commands of a task with calls to extracted functions expanded."""
+    commands = []
+    for command in task.commands:
+        if isinstance(command, FunctionCall) and command.func.startswith("extracted_"):
+            commands.extend(project.functions[command.func])
+        else:
+            commands.append(command)
+    return commands
+
+
+class TestFunctionExtractor:
+    def test_repeated_sequence_is_extracted(self):
+        project = build_project()
+
+        result = under_test.FunctionExtractor().extract(project)
+
+        assert len(result.functions) == 1
+        function = result.functions[0]
+        assert function.length == 3
+        assert function.uses == 5
+        for task in result.project.tasks:
+            assert task.commands[0] == FunctionCall(func=function.name)
+            assert task.commands[1].func == "run tests"
+        assert result.project.functions[function.name] == setup_commands()
+
+    def test_tasks_run_the_same_commands(self):
+        project = build_project()
+
+        result = under_test.FunctionExtractor().extract(project)
+
+        for before, after in zip(project.tasks, result.project.tasks):
+            assert expanded_commands(result.project, after) == before.commands
+
+    def test_bytes_saved_match_generated_yaml(self):
+        project = build_project()
+
+        result = under_test.FunctionExtractor().extract(project)
+
+        assert result.bytes_saved > 0
+        assert result.bytes_saved == yaml_size(project) - yaml_size(result.project)
+
+    def test_bytes_saved_with_existing_functions(self):
+        project = build_project(functions={"run tests": [shell_exec(script="make test")]})
+
+        result = under_test.FunctionExtractor().extract(project)
+
+        assert "run tests" in result.project.functions
+        assert result.bytes_saved == yaml_size(project) - yaml_size(result.project)
+
+    def test_project_is_not_modified(self):
+        project = build_project()
+        before = ShrubService.generate_yaml(project)
+
+        under_test.FunctionExtractor().extract(project)
+
+        assert ShrubService.generate_yaml(project) == before
+        assert project.functions is None
+
+    def test_function_calls_are_not_extracted(self):
+        tasks = [
+            EvgTask(name=f"task_{i}", commands=[FunctionCall(func="a"), FunctionCall(func="b")])
+            for i in range(5)
+        ]
+
+        result = under_test.FunctionExtractor().extract(EvgProject(tasks=tasks))
+
+        assert result.functions == []
+        assert result.bytes_saved == 0
+        assert result.project.tasks == tasks
+
+    def test_sequences_used_once_are_not_extracted(self):
+        result = under_test.FunctionExtractor().extract(build_project(n_tasks=1))
+
+        assert result.functions == []
+
+    def test_min_uses_is_respected(self):
+        result = under_test.FunctionExtractor(min_uses=6).extract(build_project(n_tasks=5))
+
+        assert result.functions == []
+
+    def test_max_length_limits_sequences(self):
+        result = under_test.FunctionExtractor(max_length=2).extract(build_project())
+
+        assert [function.length for function in result.functions] == [2]
+
+    def test_overlapping_uses_are_not_counted(self):
+        command = shell_exec(script="echo hello")
+        tasks = [EvgTask(name="task", commands=[command] * 3)]
+
+        result = under_test.FunctionExtractor(max_length=2).extract(EvgProject(tasks=tasks))
+
+        # "echo, echo" appears twice, but only once without overlapping.
+        assert result.functions == []
+
+    def test_repeats_within_a_task_are_extracted(self):
+        pair = [shell_exec(script="echo hello"), shell_exec(script="echo world")]
+        tasks = [EvgTask(name="task", commands=pair * 6)]
+        project = EvgProject(tasks=tasks)
+
+        result = under_test.FunctionExtractor().extract(project)
+
+        assert sum(function.uses * function.length for function in result.functions) == 12
+        assert expanded_commands(result.project, result.project.tasks[0]) == pair * 6
+        assert result.bytes_saved == yaml_size(project) - yaml_size(result.project)
+
+    def test_function_names_are_stable(self):
+        first = under_test.FunctionExtractor().extract(build_project())
+        second = under_test.FunctionExtractor().extract(build_project())
+
+        assert [f.name for f in first.functions] == [f.name for f in second.functions]
+        assert first.functions[0].name.startswith(under_test.DEFAULT_PREFIX)
+
+    @pytest.mark.parametrize("min_length,max_length", [(0, 2), (3, 2)])
+    def test_invalid_lengths_are_rejected(self, min_length, max_length):
+        with pytest.raises(ValueError):
+            under_test.FunctionExtractor(min_length=min_length, max_length=max_length)
+
+    def test_complex_project(self, sample_files_location):
+        project = EvgProject.from_file(sample_files_location / "mongo_evergreen.yml")
+
+        result = under_test.FunctionExtractor().extract(project)
+
+        assert result.bytes_saved == yaml_size(project) - yaml_size(result.project)
+        assert result.project.validate_references() == []
+        for before, after in zip(project.tasks, result.project.tasks):
+            assert expanded_commands(result.project, after) == (before.commands or [])
@@ -0,0 +1,114 @@
+"""Unit tests for evg_incremental.py."""
+import pytest
+
+import shrub.v3.evg_incremental as under_test
+from shrub.v3.evg_build_variant import BuildVariant
+from shrub.v3.evg_command import FunctionCall, shell_exec
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_task import EvgTask
+from shrub.v3.evg_task_group import EvgTaskGroup
+from shrub.v3.shrub_service import ShrubService
+
+
+class Generator:
+    """Generator of a project from the test files of suites, counting the steps called."""
+
+    def __init__(self, suites):
+        self.suites = suites
+        self.calls = []
+
+    def task(self, name):
+        self.calls.append(name)
+        return EvgTask(
+            name=name,
+            commands=[FunctionCall(func="run tests", vars={"tests": " ".join(self.suites[name])})],
+        )
+
+    def project(self):
+        return EvgProject(
+            functions={"run tests": [shell_exec(script="run ${tests}")]},
+            tasks=[self.task(name) for name in self.suites],
+            task_groups=[EvgTaskGroup(name="group", tasks=list(self.suites))],
+            buildvariants=[BuildVariant.from_tasks("linux", ["group"])],
+            pre=[FunctionCall(func="setup")],
+            stepback=True,
+        )
+
+    def build(self, previous=None, generator_version=None):
+        builder = under_test.IncrementalBuilder(previous, generator_version)
+        builder.add_function("run tests", None, lambda: [shell_exec(script="run ${tests}")])
+        for name, tests in self.suites.items():
+            builder.add_task(name, tests, lambda name=name: self.task(name))
+        builder.add_task_group(
+            "group", list(self.suites), lambda: EvgTaskGroup(name="group", tasks=list(self.suites))
+        )
+        builder.add_build_variant(
+            "linux", None, lambda: BuildVariant.from_tasks("linux", ["group"])
+        )
+        builder.set_section("pre", [FunctionCall(func="setup")])
+        builder.set_section("stepback", True)
+        return builder.build()
+
+
+@pytest.fixture
+def generator():
+    return Generator({"core": ["a.js", "b.js"], "sharding": ["c.js"], "auth": ["d.js"]})
+
+
+class TestHashInputs:
+    def test_equal_inputs_have_equal_hashes(self):
+        assert under_test.hash_inputs({"b": {1, 2}, "a": EvgTask(name="t")}) == (
+            under_test.hash_inputs({"a": EvgTask(name="t"), "b": {2, 1}})
+        )
+        assert under_test.hash_inputs(["a.js"]) != under_test.hash_inputs(["b.js"])
+
+
+class TestIncrementalBuilder:
+    def test_output_matches_shrub_service(self, generator):
+        result = generator.build()
+
+        assert result.text == ShrubService.generate_yaml(generator.project())
+        assert result.changed == result.regenerated
+        assert len(result.regenerated) == 6
+
+    def test_only_changed_entities_are_regenerated(self, generator, tmp_path):
+        state_file = str(tmp_path / "state.json")
+        generator.build().state.save(state_file)
+        generator.calls = []
+        generator.suites["sharding"] = ["c.js", "e.js"]
+        del generator.suites["auth"]
+
+        result = generator.build(under_test.IncrementalState.load(state_file))
+
+        assert generator.calls == ["sharding"]
+        assert result.regenerated == ["tasks[sharding]", "task_groups[group]"]
+        assert result.changed == ["tasks[sharding]", "task_groups[group]"]
+        assert result.removed == ["tasks[auth]"]
+        assert result.text == ShrubService.generate_yaml(generator.project())
+
+    def test_unchanged_output_is_not_reported_as_changed(self, generator):
+        previous = generator.build().state
+        previous.entities["tasks"]["core"].input_hash = "stale"
+
+        result = generator.build(previous)
+
+        assert result.regenerated == ["tasks[core]"]
+        assert result.changed == []
+
+    def test_state_of_other_generator_version_is_not_reused(self, generator):
+        previous = generator.build(generator_version="1").state
+        generator.calls = []
+
+        result = generator.build(previous, generator_version="2")
+
+        assert len(generator.calls) == 3
+        assert result.state.generator_version == "2"
+
+    def test_entity_sections_cannot_be_set(self):
+        with pytest.raises(ValueError):
+            under_test.IncrementalBuilder().set_section("tasks", [])
+
+    def test_empty_project(self):
+        result = under_test.IncrementalBuilder().build()
+
+        assert result.text == ShrubService.generate_yaml(EvgProject())
@@ -0,0 +1,128 @@
+"""Unit tests for evg_matrix.py."""
+import pytest
+
+import shrub.v3.evg_matrix as under_test
+from shrub.v3.evg_command import FunctionCall
+from shrub.v3.evg_task import EvgTask
+from shrub.v3.shrub_service import ShrubService
+
+
+def build_task(cell):
+    return EvgTask(
+        name=cell.format("{suite}_{os}_{engine}"),
+        commands=[FunctionCall(func="run tests", vars={"suite": cell["suite"].id})],
+    )
+
+
+@pytest.fixture
+def os_axis():
+    return under_test.MatrixAxis(
+        id="os",
+        values=[
+            under_test.AxisValue(id="linux", display_name="Linux", run_on=["ubuntu2204"]),
+            under_test.AxisValue(
+                id="windows", display_name="Windows", run_on=["windows-vsCurrent"]
+            ),
+        ],
+    )
+
+
+@pytest.fixture
+def engine_axis():
+    return under_test.MatrixAxis(
+        id="engine",
+        values=[
+            under_test.AxisValue(id="wt", expansions={"storage_engine": "wiredTiger"}),
+            under_test.AxisValue(id="inmem", expansions={"storage_engine": "inMemory"}),
+        ],
+    )
+
+
+@pytest.fixture
+def suite_axis():
+    return under_test.MatrixAxis(
+        id="suite",
+        values=[
+            under_test.AxisValue(id="core"),
+            under_test.AxisValue(id="sharding", run_on=["ubuntu2204-large"]),
+        ],
+    )
+
+
+class TestEvgMatrix:
+    def test_all_cells_are_generated(self, os_axis, engine_axis, suite_axis):
+        matrix = under_test.EvgMatrix(
+            [os_axis, engine_axis], [suite_axis], build_task, variant_name="{os}-{engine}"
+        )
+
+        variants = list(matrix.generate())
+
+        assert [v.build_variant.name for v in variants] == [
+            "linux-wt",
+            "linux-inmem",
+            "windows-wt",
+            "windows-inmem",
+        ]
+        assert len(list(matrix.cells())) == 8
+        assert [t.name for t in variants[0].tasks] == ["core_linux_wt", "sharding_linux_wt"]
+
+    def test_excluded_cells_are_skipped(self, os_axis, engine_axis, suite_axis):
+        matrix = under_test.EvgMatrix(
+            [os_axis, engine_axis],
+            [suite_axis],
+            build_task,
+            variant_name="{os}-{engine}",
+            exclude=[{"os": "windows", "engine": "inmem"}, {"suite": "sharding", "os": "windows"}],
+        )
+
+        variants = {v.build_variant.name: v for v in matrix.generate()}
+
+        assert "windows-inmem" not in variants
+        assert [t.name for t in variants["windows-wt"].tasks] == ["core_windows_wt"]
+
+    def test_include_rules_restrict_cells(self, os_axis, engine_axis, suite_axis):
+        matrix = under_test.EvgMatrix(
+            [os_axis, engine_axis],
+            [suite_axis],
+            build_task,
+            variant_name="{os}-{engine}",
+            include=[{"engine": "wt", "suite": ["core", "sharding"]}],
+        )
+
+        assert [v.build_variant.name for v in matrix.generate()] == ["linux-wt", "windows-wt"]
+
+    def test_axis_values_are_applied_to_variants(self, os_axis, engine_axis, suite_axis):
+        matrix = under_test.EvgMatrix(
+            [os_axis, engine_axis],
+            [suite_axis],
+            build_task,
+            variant_name="{os}-{engine}",
+            variant_display_name="{os} ({engine})",
+            display_task_name="tests_{engine}",
+        )
+
+        variant = next(matrix.generate()).build_variant
+
+        assert variant.display_name == "Linux (wt)"
+        assert variant.run_on is os_axis.values[0].run_on
+        assert variant.expansions == {"storage_engine": "wiredTiger"}
+        assert variant.tasks[0].distros is None
+        assert variant.tasks[1].distros is suite_axis.values[1].run_on
+        assert variant.display_tasks[0].name == "tests_wt"
+        assert variant.display_tasks[0].execution_tasks == ["core_linux_wt", "sharding_linux_wt"]
+
+    def test_project_can_be_serialized(self, os_axis, suite_axis):
+        matrix = under_test.EvgMatrix(
+            [os_axis],
+            [suite_axis],
+            lambda cell: EvgTask(name=cell.format("{suite}_{os}")),
+            variant_name="{os}",
+            display_task_name="all",
+        )
+
+        project = matrix.to_project()
+        out = ShrubService.generate_yaml(project)
+
+        assert len(project.tasks) == 4
+        assert "- name: sharding_linux\n        distros:\n          - ubuntu2204-large" in out
+        assert "display_tasks:\n      - name: all" in out
@@ -2,6 +2,10 @@
 import pytest
 
 import shrub.v3.evg_project as under_test
+from shrub.v3.evg_build_variant import BuildVariant, DisplayTask
+from shrub.v3.evg_command import FunctionCall
+from shrub.v3.evg_task import EvgTask, EvgTaskDependency, EvgTaskRef
+from shrub.v3.evg_task_group import EvgTaskGroup
 
 
 class TestGetRepositoryName:
@@ -19,3 +23,136 @@ class TestGetRepositoryName:
         )
 
         assert module.get_repository_name() == repo_name
+
+
+def build_project(**kwargs):
+    tasks = [
+        EvgTask(
+            name="compile",
+            commands=[FunctionCall(func="do setup")],
+            tags=["build"],
+        ),
+        EvgTask(
+            name="test",
+            commands=[FunctionCall(func="run tests")],
+            depends_on=[EvgTaskDependency(name="compile")],
+        ),
+    ]
+    args = dict(
+        buildvariants=[
+            BuildVariant(
+                name="linux",
+                tasks=[EvgTaskRef(name="compile"), EvgTaskRef(name="group")],
+                display_tasks=[DisplayTask(name="all", execution_tasks=["compile", "test"])],
+            )
+        ],
+        tasks=tasks,
+        task_groups=[EvgTaskGroup(name="group", tasks=["test"])],
+        functions={"do setup": [], "run tests": FunctionCall(func="do setup")},
+    )
+    args.update(kwargs)
+    return under_test.EvgProject(**args)
+
+
+class TestValidateReferences:
+    def test_valid_project_has_no_errors(self):
+        assert build_project().validate_references() == []
+
+    def test_undefined_references_are_all_reported(self):
+        project = build_project(
+            buildvariants=[
+                BuildVariant(
+                    name="linux",
+                    tasks=[EvgTaskRef(name="missing"), EvgTaskRef(name=".build !.nope")],
+                    display_tasks=[DisplayTask(name="all", execution_tasks=["test"])],
+                )
+            ],
+            task_groups=[EvgTaskGroup(name="group", tasks=["not a task"])],
+            pre=[FunctionCall(func="no func")],
+        )
+        project.tasks[1].depends_on.append(EvgTaskDependency(name="*"))
+        project.tasks[1].depends_on.append(EvgTaskDependency(name="lint"))
+
+        errors = project.validate_references()
+
+        assert [str(e) for e in errors] == [
+            "pre: undefined function 'no func'",
+            "tasks[test].depends_on: undefined task 'lint'",
+            "task_groups[group].tasks: undefined task 'not a task'",
+            "buildvariants[linux].tasks: undefined task 'missing'",
+            "buildvariants[linux].tasks: undefined tag 'nope'",
+            "buildvariants[linux].display_tasks[all]: undefined variant task 'test'",
+        ]
+
+    def test_tasks_selected_by_tag_can_be_displayed(self):
+        project = build_project(
+            buildvariants=[
+                BuildVariant(
+                    name="linux",
+                    tasks=[EvgTaskRef(name=".build")],
+                    display_tasks=[DisplayTask(name="all", execution_tasks=["compile"])],
+                )
+            ],
+            task_groups=None,
+        )
+
+        assert project.validate_references() == []
+
+    def test_negated_tag_selectors_exclude_tagged_tasks(self):
+        project = build_project(
+            buildvariants=[
+                BuildVariant(
+                    name="linux",
+                    tasks=[EvgTaskRef(name="!.build")],
+                    display_tasks=[DisplayTask(name="all", execution_tasks=["test", "compile"])],
+                )
+            ],
+            task_groups=None,
+        )
+
+        errors = project.validate_references()
+
+        assert [str(e) for e in errors] == [
+            "buildvariants[linux].display_tasks[all]: undefined variant task 'compile'",
+        ]
+
+    def test_known_entities_are_not_reported(self):
+        project = build_project(
+            buildvariants=[
+                BuildVariant(
+                    name="linux",
+                    tasks=[EvgTaskRef(name="existing")],
+                    display_tasks=[DisplayTask(name="all", execution_tasks=["other existing"])],
+                )
+            ],
+            functions={},
+        )
+
+        errors = project.validate_references(
+            known_tasks=["existing", "other existing"], known_functions=["do setup", "run tests"]
+        )
+
+        assert errors == []
+
+    def test_complex_project_is_valid(self, sample_files_location):
+        project = under_test.EvgProject.from_file(sample_files_location / "mongo_evergreen.yml")
+
+        assert project.validate_references() == []
+
+
+class TestFromFile:
+    def test_json_files_can_be_read(self, tmp_path):
+        project = build_project()
+        file_location = tmp_path / "project.json"
+        file_location.write_text(project.model_dump_json(exclude_none=True, exclude_unset=True))
+
+        assert under_test.EvgProject.from_file(file_location) == project
+
+    def test_command_type_is_kept_as_value(self, tmp_path):
+        file_location = tmp_path / "project.yml"
+        file_location.write_text("command_type: system\n")
+
+        project = under_test.EvgProject.from_file(file_location)
+
+        assert project.command_type == "system"
+        assert project.model_dump(exclude_none=True) == {"command_type": "system"}
@@ -0,0 +1,122 @@
+"""Unit tests for evg_project_stats.py."""
+import shrub.v3.evg_project_stats as under_test
+from shrub.v3.evg_build_variant import BuildVariant
+from shrub.v3.evg_command import FunctionCall, shell_exec
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_task import EvgTask, EvgTaskRef
+from shrub.v3.evg_task_group import EvgTaskGroup
+from shrub.v3.shrub_service import ShrubService
+
+
+def build_project():
+    setup = FunctionCall(func="do setup", vars={"flags": "--fast"})
+    tasks = [
+        EvgTask(
+            name=f"task_{i}",
+            commands=[setup, shell_exec(script="echo hello"), *[FunctionCall(func="run")] * i],
+        )
+        for i in range(4)
+    ]
+    variants = [
+        BuildVariant(
+            name=name,
+            run_on=["ubuntu"],
+            expansions={"flags": "--opt" * size},
+            tasks=[EvgTaskRef(name=t.name) for t in tasks[:size]],
+        )
+        for name, size in [("small", 1), ("large", 4)]
+    ]
+    return EvgProject(
+        buildvariants=variants,
+        tasks=tasks,
+        task_groups=[EvgTaskGroup(name="group", tasks=["task_0"])],
+        functions={"do setup": [shell_exec(script="setup")], "run": FunctionCall(func="other")},
+        stepback=True,
+    )
+
+
+class TestDistribution:
+    def test_empty_distribution(self):
+        assert under_test.Distribution.of([]) == under_test.Distribution()
+
+    def test_distribution_of_values(self):
+        distribution = under_test.Distribution.of([5, 1, 3, 2, 4, 10, 6, 7, 9, 8])
+
+        assert distribution.count == 10
+        assert distribution.total == 55
+        assert distribution.mean == 5.5
+        assert distribution.median == 5
+        assert distribution.p90 == 9
+        assert distribution.max == 10
+
+
+class TestProjectStats:
+    def test_sizes_add_up_to_generated_yaml(self):
+        project = build_project()
+
+        stats = project.stats()
+
+        assert stats.total_size == len(ShrubService.generate_yaml(project).encode())
+        assert stats.total_size == sum(stats.section_sizes.values())
+        assert stats.task_sizes.total == stats.section_sizes["tasks"] - len("tasks:\n")
+        assert stats.variant_sizes.total == stats.section_sizes["buildvariants"] - len(
+            "buildvariants:\n"
+        )
+        assert stats.function_sizes.total == stats.section_sizes["functions"] - len("functions:\n")
+
+    def test_entities_are_counted(self):
+        stats = build_project().stats()
+
+        assert stats.counts == {
+            "buildvariants": 2,
+            "functions": 2,
+            "task_groups": 1,
+            "tasks": 4,
+            "commands": 14,
+        }
+        assert stats.commands_per_task.max == 5
+        assert stats.commands_per_task.total == 14
+
+    def test_largest_entities_are_reported(self):
+        stats = build_project().stats(top=2)
+
+        assert [task.name for task in stats.largest_tasks] == ["task_3", "task_2"]
+        assert [variant.name for variant in stats.largest_variants] == ["large", "small"]
+        assert len(stats.largest_functions) == 2
+
+    def test_duplicated_commands_are_reported(self):
+        stats = build_project().stats()
+
+        counts = {command.command: command.count for command in stats.duplicated_commands}
+        assert counts == {"do setup": 4, "shell.exec": 4, "run": 6}
+        sizes = [command.total_size for command in stats.duplicated_commands]
+        assert sizes == sorted(sizes, reverse=True)
+
+    def test_command_type_sizes_cover_task_commands(self):
+        stats = build_project().stats()
+
+        assert set(stats.command_type_sizes) == {"func", "shell.exec"}
+        # Every task command of the project is repeated.
+        assert sum(stats.command_type_sizes.values()) == sum(
+            command.total_size for command in stats.duplicated_commands
+        )
+
+    def test_expansions_of_variants_and_function_calls_are_reported(self):
+        stats = build_project().stats()
+
+        assert stats.largest_expansions == [
+            under_test.ExpansionSize(
+                name="flags",
+                count=6,
+                total_size=len("flags--opt")
+                + len("flags--opt--opt--opt--opt")
+                + 4 * len("flags--fast"),
+            )
+        ]
+
+    def test_empty_project(self):
+        stats = EvgProject().stats()
+
+        assert stats.total_size == 0
+        assert stats.counts["tasks"] == 0
+        assert stats.largest_tasks == []
@@ -0,0 +1,177 @@
+"""Unit tests for evg_project_view.py."""
+import pytest
+
+import shrub.v3.evg_project_view as under_test
+from shrub.v3.evg_build_variant import BuildVariant
+from shrub.v3.evg_command import FunctionCall, shell_exec
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_task import EvgTask
+from shrub.v3.evg_task_group import EvgTaskGroup
+from shrub.v3.shrub_service import ShrubService
+
+
+@pytest.fixture
+def project():
+    tasks = [
+        EvgTask(
+            name=f"task_{i}",
+            commands=[FunctionCall(func="do setup"), shell_exec(f"echo {i}\necho ünïcode")],
+        )
+        for i in range(5)
+    ]
+    return EvgProject(
+        buildvariants=[BuildVariant(name="bv", tasks=[t.get_task_ref() for t in tasks])],
+        tasks=tasks,
+        task_groups=[EvgTaskGroup(name="tg", tasks=["task_0", "task_1"], max_hosts=2)],
+        functions={"do setup": [shell_exec("echo setup")], "single": FunctionCall(func="x")},
+        stepback=True,
+    )
+
+
+@pytest.fixture(params=["yml", "json"])
+def project_file(request, tmp_path, project):
+    path = tmp_path / f"project.{request.param}"
+    if request.param == "json":
+        path.write_text(ShrubService.generate_json(project), encoding="utf-8")
+    else:
+        path.write_text(ShrubService.generate_yaml(project), encoding="utf-8")
+    return str(path)
+
+
+class TestEvgProjectView:
+    def test_entities_are_indexed(self, project_file):
+        with under_test.EvgProjectView(project_file) as view:
+            assert view.names("tasks") == [f"task_{i}" for i in range(5)]
+            assert view.names("buildvariants") == ["bv"]
+            assert view.names("task_groups") == ["tg"]
+            assert view.names("functions") == ["do setup", "single"]
+            assert view.names("pre") == []
+
+    def test_entities_are_decoded_on_demand(self, project_file, project):
+        with under_test.EvgProjectView(project_file) as view:
+            for task in project.tasks:
+                assert view.task(task.name) == task
+            assert view.build_variant("bv") == project.buildvariants[0]
+            assert view.task_group("tg") == project.task_groups[0]
+            assert view.function("do setup") == project.functions["do setup"]
+            assert view.function("single") == project.functions["single"]
+            assert view.section("stepback") is True
+
+    def test_decoded_entities_are_cached(self, project_file):
+        with under_test.EvgProjectView(project_file, cache_size=2) as view:
+            assert view.task("task_0") is view.task("task_0")
+
+    def test_missing_entities_raise_key_error(self, project_file):
+        with under_test.EvgProjectView(project_file) as view:
+            with pytest.raises(KeyError):
+                view.task("not a task")
+            with pytest.raises(KeyError):
+                view.section("post")
+
+    def test_prebuilt_index_can_be_shared(self, project_file):
+        with under_test.EvgProjectView(project_file) as view:
+            index = view.index
+
+        with under_test.EvgProjectView(project_file, index=index) as view:
+            assert view.task("task_3").name == "task_3"
+
+
+ALIASED_YAML = """
+variables:
+  - &ubuntu ubuntu2204
+  - &setup
+    command: shell.exec
+    params: {script: ls}
+  - &defaults
+    run_on: [*ubuntu]
+    batchtime: 60
+
+functions:
+  setup: *setup
+
+tasks:
+  - name: compile
+    commands:
+      - *setup
+      - &build
+        command: shell.exec
+        params: {script: make}
+  - name: test
+    commands: [*build]
+
+buildvariants:
+  - <<: *defaults
+    name: bv
+    tasks: [{name: compile}, {name: test}]
+"""
+
+
+REDEFINED_YAML = """
+variables:
+  - &cmd {command: shell.exec, params: {script: one}}
+
+tasks:
+  - name: first
+    commands: [*cmd]
+  - name: redefine
+    commands:
+      - *cmd
+      - &cmd {command: shell.exec, params: {script: two}}
+      - *cmd
+  - name: second
+    commands: [*cmd]
+"""
+
+
+@pytest.fixture
+def aliased_file(tmp_path):
+    path = tmp_path / "aliased.yml"
+    path.write_text(ALIASED_YAML, encoding="utf-8")
+    return str(path)
+
+
+class TestReadingAliases:
+    def test_anchors_are_indexed(self, aliased_file):
+        with under_test.EvgProjectView(aliased_file) as view:
+            assert set(view.index.anchors) == {"ubuntu", "setup", "defaults", "build"}
+            assert [name for _, name in view.index.aliases] == [
+                "ubuntu",
+                "setup",
+                "setup",
+                "build",
+                "defaults",
+            ]
+
+    def test_aliases_resolve_to_anchors_defined_elsewhere(self, aliased_file):
+        project = EvgProject.from_file(aliased_file)
+
+        with under_test.EvgProjectView(aliased_file) as view:
+            assert view.task("compile") == project.tasks[0]
+            assert view.task("test") == project.tasks[1]
+            assert view.build_variant("bv") == project.buildvariants[0]
+            assert view.build_variant("bv").run_on == ["ubuntu2204"]
+            assert view.function("setup") == project.functions["setup"]
+
+    def test_aliases_resolve_to_the_preceding_definition(self, tmp_path):
+        path = tmp_path / "redefined.yml"
+        path.write_text(REDEFINED_YAML, encoding="utf-8")
+
+        with under_test.EvgProjectView(str(path)) as view:
+            assert len(view.index.anchors["cmd"]) == 2
+            assert view.task("first").commands[0].params == {"script": "one"}
+            assert view.task("redefine").commands[1].params == {"script": "two"}
+            assert view.task("second").commands[0].params == {"script": "two"}
+
+
+class TestReadingComplexYaml:
+    def test_view_matches_full_load(self, sample_files_location):
+        file_location = str(sample_files_location / "mongo_evergreen.yml")
+        project = EvgProject.from_file(file_location)
+
+        with under_test.EvgProjectView(file_location) as view:
+            assert len(view.names("tasks")) == 367
+            assert view.task(project.tasks[-1].name) == project.tasks[-1]
+            assert view.build_variant("linux-64-duroff") == next(
+                bv for bv in project.buildvariants if bv.name == "linux-64-duroff"
+            )
+            assert len(view.section("pre")) == 2
@@ -0,0 +1,55 @@
+"""Unit tests for evg_runtime_history.py."""
+import json
+
+import pytest
+
+import shrub.v3.evg_runtime_history as under_test
+
+
+class TestRuntimeHistory:
+    def test_json_mapping(self, tmp_path):
+        history_file = tmp_path / "history.json"
+        history_file.write_text(json.dumps({"task_0": 10, "task_1": 30}))
+
+        history = under_test.RuntimeHistory.from_file(str(history_file))
+
+        assert history.estimate("task_0") == 10
+        assert history.estimate("unknown") == 20
+        assert "task_1" in history
+        assert len(history) == 2
+
+    def test_json_records_are_averaged(self, tmp_path):
+        history_file = tmp_path / "history.json"
+        history_file.write_text(
+            json.dumps(
+                [
+                    {"name": "task_0", "runtime": 10},
+                    {"name": "task_0", "runtime": 20},
+                    {"name": "task_1", "runtime": 5.5},
+                ]
+            )
+        )
+
+        history = under_test.RuntimeHistory.from_file(str(history_file), default=60)
+
+        assert history.estimate("task_0") == 15
+        assert history.estimate("task_1") == 5.5
+        assert history.estimate("unknown") == 60
+
+    def test_csv(self, tmp_path):
+        history_file = tmp_path / "history.csv"
+        history_file.write_text("name,runtime,variant\ntask_0,10,linux\ntask_0,14,windows\n")
+
+        history = under_test.RuntimeHistory.from_file(str(history_file))
+
+        assert history.estimate("task_0") == 12
+
+    def test_unsupported_json(self, tmp_path):
+        history_file = tmp_path / "history.json"
+        history_file.write_text("42")
+
+        with pytest.raises(ValueError):
+            under_test.RuntimeHistory.from_file(str(history_file))
+
+    def test_empty_history(self):
+        assert under_test.RuntimeHistory({}).estimate("task") == 0
@@ -0,0 +1,131 @@
+"""Unit tests for evg_simulator.py."""
+import time
+
+import pytest
+
+import shrub.v3.evg_simulator as under_test
+from shrub.v3.evg_build_variant import BuildVariant
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_runtime_history import RuntimeHistory
+from shrub.v3.evg_task import EvgTask, EvgTaskDependency, EvgTaskRef
+from shrub.v3.evg_task_group import EvgTaskGroup
+
+
+def build_project(task_groups=None, refs=None, n_tasks=4):
+    return EvgProject(
+        tasks=[EvgTask(name=f"task_{i}") for i in range(n_tasks)],
+        task_groups=task_groups,
+        buildvariants=[
+            BuildVariant(
+                name="linux",
+                run_on=["ubuntu"],
+                tasks=refs or [EvgTaskRef(name=f"task_{i}") for i in range(n_tasks)],
+            )
+        ],
+    )
+
+
+class TestSimulator:
+    def test_tasks_queue_for_limited_hosts(self):
+        simulator = under_test.Simulator(
+            build_project(), RuntimeHistory({}, default=10), distro_hosts={"ubuntu": 2}
+        )
+
+        report = simulator.run()
+
+        assert report.makespan == 20
+        assert report.tasks == 4
+        assert report.mean_queue_time == 5
+        assert report.max_queue_time == 10
+        distro = report.distros["ubuntu"]
+        assert (distro.hosts, distro.tasks, distro.busy_time) == (2, 4, 40)
+        assert distro.utilisation == 1
+
+    def test_unlimited_hosts(self):
+        report = under_test.Simulator(build_project(), {"task_0": 10, "task_1": 30}).run()
+
+        assert report.makespan == 30
+        assert report.max_queue_time == 0
+        assert report.distros["ubuntu"].utilisation is None
+
+    def test_dependencies_and_distros(self):
+        project = EvgProject(
+            tasks=[
+                EvgTask(name="compile", run_on="large"),
+                EvgTask(name="test", depends_on=[EvgTaskDependency(name="compile")]),
+            ],
+            buildvariants=[BuildVariant.from_tasks("linux", ["compile", "test"])],
+        )
+        simulator = under_test.Simulator(
+            project, RuntimeHistory({}, default=10), default_hosts=1, host_setup_time=2
+        )
+
+        report = simulator.run()
+
+        assert report.makespan == 24
+        assert set(report.distros) == {"large", under_test.DEFAULT_DISTRO}
+
+    def test_task_groups_hold_hosts(self):
+        task_group = EvgTaskGroup(name="group", tasks=["task_0", "task_1", "task_2"], max_hosts=1)
+        project = build_project(
+            task_groups=[task_group], refs=[EvgTaskRef(name="group"), EvgTaskRef(name="task_3")]
+        )
+        simulator = under_test.Simulator(
+            project,
+            RuntimeHistory({}, default=10),
+            distro_hosts={"ubuntu": 2},
+            host_setup_time=5,
+            task_overhead=1,
+        )
+
+        report = simulator.run()
+
+        # The group runs its tasks one after the other on a single host set up once.
+        assert report.makespan == 5 + 3 * 11
+        assert report.distros["ubuntu"].busy_time == 5 + 3 * 11 + 16
+
+    def test_task_groups_sharing_processes_skip_task_overhead(self):
+        task_group = EvgTaskGroup(
+            name="group", tasks=["task_0", "task_1"], max_hosts=2, share_processes=True
+        )
+        project = build_project(task_groups=[task_group], refs=[EvgTaskRef(name="group")])
+        simulator = under_test.Simulator(
+            project, RuntimeHistory({}, default=10), host_setup_time=5, task_overhead=1
+        )
+
+        assert simulator.run().makespan == 15
+
+    def test_unschedulable_tasks_are_reported(self):
+        project = EvgProject(
+            tasks=[
+                EvgTask(name="a", depends_on=[EvgTaskDependency(name="b")]),
+                EvgTask(name="b", depends_on=[EvgTaskDependency(name="a")]),
+            ],
+            buildvariants=[BuildVariant.from_tasks("linux", ["a", "b"])],
+        )
+
+        with pytest.raises(ValueError, match="could not be scheduled"):
+            under_test.Simulator(project, {}).run()
+
+    def test_simulates_many_tasks_quickly(self):
+        n_tasks = 10000
+        tasks = [
+            EvgTask(name=f"task_{i}", depends_on=[EvgTaskDependency(name=f"task_{i // 4}")])
+            for i in range(1, n_tasks)
+        ]
+        project = EvgProject(
+            tasks=[EvgTask(name="task_0"), *tasks],
+            buildvariants=[
+                BuildVariant.from_tasks(
+                    f"variant_{i}", [f"task_{i}" for i in range(n_tasks)], distros=[f"d{i % 2}"]
+                )
+                for i in range(10)
+            ],
+        )
+        simulator = under_test.Simulator(project, {}, default_hosts=100, task_overhead=1)
+
+        start = time.perf_counter()
+        report = simulator.run()
+
+        assert time.perf_counter() - start < 10
+        assert report.tasks == 10 * n_tasks
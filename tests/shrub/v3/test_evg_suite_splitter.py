@@ -0,0 +1,85 @@
+"""Unit tests for evg_suite_splitter.py."""
+import pytest
+
+import shrub.v3.evg_suite_splitter as under_test
+from shrub.v3.evg_command import FunctionCall
+from shrub.v3.evg_runtime_history import RuntimeHistory
+from shrub.v3.evg_task_template import EvgTaskTemplate
+
+
+def files_of(split):
+    return [task.commands[0].vars["test_files"] for task in split.tasks]
+
+
+class TestSuiteSplitter:
+    def test_tests_are_balanced_by_runtime(self):
+        history = RuntimeHistory({"a.js": 60, "b.js": 50, "c.js": 40, "d.js": 30, "e.js": 20})
+        splitter = under_test.SuiteSplitter(target_runtime=100, history=history)
+
+        split = splitter.split("jstests", ["a.js", "b.js", "c.js", "d.js", "e.js"])
+
+        assert [task.name for task in split.tasks] == ["jstests_0", "jstests_1"]
+        assert files_of(split) == ["a.js d.js e.js", "b.js c.js"]
+        assert split.runtimes == {"jstests_0": 110, "jstests_1": 90}
+        assert split.display_task.name == "jstests"
+        assert split.display_task.execution_tasks == ["jstests_0", "jstests_1"]
+
+    def test_tests_without_history_use_mean_runtime(self):
+        history = RuntimeHistory({"a.js": 10, "b.js": 30})
+        splitter = under_test.SuiteSplitter(target_runtime=40, history=history)
+
+        split = splitter.split("jstests", ["a.js", "b.js", "new.js"])
+
+        assert split.runtimes == {"jstests_0": 30, "jstests_1": 30}
+
+    def test_sub_tasks_are_limited(self):
+        history = RuntimeHistory({f"{i}.js": 100 for i in range(10)})
+        splitter = under_test.SuiteSplitter(target_runtime=1, history=history, max_sub_tasks=3)
+
+        split = splitter.split("jstests", [f"{i}.js" for i in range(10)])
+
+        assert len(split.tasks) == 3
+
+    def test_fallback_split_without_history(self):
+        splitter = under_test.SuiteSplitter(target_runtime=100, fallback_sub_tasks=3)
+
+        split = splitter.split("jstests", [f"{i}.js" for i in range(8)])
+
+        assert files_of(split) == ["0.js 1.js 2.js", "3.js 4.js 5.js", "6.js 7.js"]
+        assert split.runtimes is None
+
+    def test_fallback_split_when_no_test_has_history(self):
+        splitter = under_test.SuiteSplitter(
+            target_runtime=100, history=RuntimeHistory({"other.js": 10}), fallback_sub_tasks=5
+        )
+
+        split = splitter.split("jstests", ["a.js", "b.js"])
+
+        assert files_of(split) == ["a.js", "b.js"]
+
+    def test_empty_suite(self):
+        splitter = under_test.SuiteSplitter(target_runtime=100)
+
+        with pytest.raises(ValueError, match="jstests"):
+            splitter.split("jstests", [])
+
+    def test_sub_tasks_are_created_from_template(self):
+        template = EvgTaskTemplate(
+            prefix=[FunctionCall(func="fetch")],
+            parameterized=[FunctionCall(func="resmoke", vars={"suite": "core"})],
+            tags=["jstests"],
+        )
+        splitter = under_test.SuiteSplitter(
+            target_runtime=100, template=template, test_files_var="tests", fallback_sub_tasks=2
+        )
+
+        split = splitter.split("core", ["a.js", "b.js"], vars={"jobs": 4})
+
+        task = split.tasks[1]
+        assert task.commands[0] is template.prefix[0]
+        assert task.commands[1].vars == {"suite": "core", "jobs": 4, "tests": "b.js"}
+        assert task.tags == ["jstests"]
+
+    def test_invalid_target_runtime(self):
+        with pytest.raises(ValueError):
+            under_test.SuiteSplitter(target_runtime=0)
@@ -0,0 +1,102 @@
+"""Unit tests for evg_task_graph.py."""
+import pytest
+
+import shrub.v3.evg_task_graph as under_test
+from shrub.v3.evg_build_variant import BuildVariant
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_task import EvgTask, EvgTaskDependency, EvgTaskRef
+from shrub.v3.evg_task_group import EvgTaskGroup
+
+
+def edges_of(graph):
+    return {
+        (graph.nodes[source].build_variant, graph.nodes[source].task, graph.nodes[target].task)
+        for source, targets in enumerate(graph.successors)
+        for target in targets
+    }
+
+
+@pytest.fixture
+def project():
+    return EvgProject(
+        tasks=[
+            EvgTask(name="compile"),
+            EvgTask(name="unit", tags=["test"], depends_on=[EvgTaskDependency(name="compile")]),
+            EvgTask(name="lint", tags=["test", "fast"]),
+            EvgTask(name="jstests", depends_on=[EvgTaskDependency(name="*")]),
+            EvgTask(name="report", depends_on=[EvgTaskDependency(name="unit", variant="*")]),
+        ],
+        task_groups=[EvgTaskGroup(name="group", tasks=["unit", "jstests"])],
+        buildvariants=[
+            BuildVariant(
+                name="linux",
+                tasks=[EvgTaskRef(name="compile"), EvgTaskRef(name="group")],
+            ),
+            BuildVariant(
+                name="windows",
+                tasks=[
+                    EvgTaskRef(name="compile"),
+                    EvgTaskRef(name=".test !.fast"),
+                    EvgTaskRef(name="report", depends_on=[EvgTaskDependency(name="compile")]),
+                ],
+            ),
+        ],
+    )
+
+
+class TestSelectTasks:
+    def test_tasks_matching_all_criteria_are_selected(self, project):
+        assert under_test.select_tasks(".test", project.tasks) == ["unit", "lint"]
+        assert under_test.select_tasks(".test !.fast", project.tasks) == ["unit"]
+        assert under_test.select_tasks("!.test", project.tasks) == ["compile", "jstests", "report"]
+
+
+class TestTaskGraph:
+    def test_graph_of_project(self, project):
+        graph = under_test.TaskGraph.from_project(project)
+
+        assert graph.nodes == [
+            under_test.TaskNode("linux", "compile"),
+            under_test.TaskNode("linux", "unit", "group"),
+            under_test.TaskNode("linux", "jstests", "group"),
+            under_test.TaskNode("windows", "compile"),
+            under_test.TaskNode("windows", "unit"),
+            under_test.TaskNode("windows", "report"),
+        ]
+        assert edges_of(graph) == {
+            ("linux", "compile", "unit"),
+            ("linux", "compile", "jstests"),
+            ("linux", "unit", "jstests"),
+            ("windows", "compile", "unit"),
+            ("windows", "compile", "report"),
+        }
+
+    def test_task_groups_can_be_serialized(self, project):
+        project.task_groups[0].tasks = ["compile", "lint"]
+        project.buildvariants[0].tasks = [EvgTaskRef(name="group")]
+
+        graph = under_test.TaskGraph.from_project(project, serialize_task_groups=True)
+
+        assert ("linux", "compile", "lint") in edges_of(graph)
+
+    def test_topological_order(self, project):
+        graph = under_test.TaskGraph.from_project(project)
+
+        order = graph.topological_order()
+
+        assert sorted(order) == list(range(len(graph.nodes)))
+        position = {index: place for place, index in enumerate(order)}
+        for source, targets in enumerate(graph.successors):
+            assert all(position[source] < position[target] for target in targets)
+
+    def test_cycles_are_rejected(self):
+        project = EvgProject(
+            tasks=[
+                EvgTask(name="a", depends_on=[EvgTaskDependency(name="b")]),
+                EvgTask(name="b", depends_on=[EvgTaskDependency(name="a")]),
+            ],
+            buildvariants=[BuildVariant.from_tasks("linux", ["a", "b"])],
+        )
+
+        with pytest.raises(ValueError, match="cycle"):
+            under_test.TaskGraph.from_project(project).topological_order()
@@ -0,0 +1,57 @@
+"""Unit tests for evg_task_group_planner.py."""
+import time
+
+import pytest
+
+import shrub.v3.evg_task_group_planner as under_test
+from shrub.v3.evg_command import FunctionCall
+from shrub.v3.evg_runtime_history import RuntimeHistory
+from shrub.v3.evg_task import EvgTask
+
+
+class TestTaskGroupPlanner:
+    def test_tasks_are_packed_longest_first(self):
+        history = RuntimeHistory({"a": 7, "b": 5, "c": 4, "d": 3, "e": 1})
+        planner = under_test.TaskGroupPlanner(history, host_budget=2)
+
+        plan = planner.plan("group", ["e", "d", "c", EvgTask(name="b"), "a"])
+
+        assert [(tg.name, tg.tasks, tg.max_hosts) for tg in plan.task_groups] == [
+            ("group_0", ["a", "d"], 1),
+            ("group_1", ["b", "c", "e"], 1),
+        ]
+        assert plan.makespans == {"group_0": 10, "group_1": 10}
+        assert plan.makespan == 10
+
+    def test_hosts_are_split_by_max_hosts(self):
+        history = RuntimeHistory({f"task_{i}": i for i in range(10)})
+        planner = under_test.TaskGroupPlanner(history, host_budget=5, max_hosts=2)
+
+        plan = planner.plan("group", history.runtimes, setup_group=[FunctionCall(func="setup")])
+
+        assert [tg.max_hosts for tg in plan.task_groups] == [2, 2, 1]
+        assert sorted(t for tg in plan.task_groups for t in tg.tasks) == sorted(history.runtimes)
+        assert all(tg.setup_group == [FunctionCall(func="setup")] for tg in plan.task_groups)
+        assert plan.makespan == 9
+        assert [ref.name for ref in plan.task_refs()] == ["group_0", "group_1", "group_2"]
+
+    def test_hosts_are_not_planned_without_tasks(self):
+        planner = under_test.TaskGroupPlanner(RuntimeHistory({}), host_budget=10, max_hosts=4)
+
+        assert [tg.max_hosts for tg in planner.plan("group", ["a", "b"]).task_groups] == [2]
+        assert planner.plan("group", []).makespan == 0
+
+    def test_invalid_budget(self):
+        with pytest.raises(ValueError):
+            under_test.TaskGroupPlanner(RuntimeHistory({}), host_budget=0)
+
+    def test_plans_thousands_of_tasks_quickly(self):
+        history = RuntimeHistory({f"task_{i}": (i * 7919) % 3600 for i in range(5000)})
+        planner = under_test.TaskGroupPlanner(history, host_budget=200, max_hosts=8)
+
+        start = time.perf_counter()
+        plan = planner.plan("group", history.runtimes)
+
+        assert time.perf_counter() - start < 1
+        assert len(plan.task_groups) == 25
+        assert plan.makespan < sum(history.runtimes.values()) / 200 + 3600
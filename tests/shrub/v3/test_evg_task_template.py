@@ -0,0 +1,76 @@
+"""Unit tests for evg_task_template.py."""
+import pytest
+
+import shrub.v3.evg_task_template as under_test
+from shrub.v3.evg_command import FunctionCall, git_get_project, subprocess_exec
+from shrub.v3.evg_project import EvgProject
+from shrub.v3.evg_task import EvgTask, EvgTaskDependency
+from shrub.v3.shrub_service import ShrubService
+
+
+@pytest.fixture
+def template():
+    return under_test.EvgTaskTemplate(
+        prefix=[git_get_project(directory="src"), FunctionCall(func="do setup")],
+        parameterized=[FunctionCall(func="run tests", vars={"resmoke_args": "--storageEngine=wt"})],
+        suffix=[subprocess_exec("bash", command="a=1\nb=2\n\n")],
+        depends_on=[EvgTaskDependency(name="compile")],
+        tags=["generated"],
+    )
+
+
+class TestEvgTaskTemplate:
+    def test_created_task_matches_task_built_by_hand(self, template):
+        task = template.create_task("suite_0", vars={"suite": "suite_0"})
+
+        expected = EvgTask(
+            name="suite_0",
+            commands=[
+                git_get_project(directory="src"),
+                FunctionCall(func="do setup"),
+                FunctionCall(
+                    func="run tests",
+                    vars={"resmoke_args": "--storageEngine=wt", "suite": "suite_0"},
+                ),
+                subprocess_exec("bash", command="a=1\nb=2\n\n"),
+            ],
+            depends_on=[EvgTaskDependency(name="compile")],
+            tags=["generated"],
+        )
+        assert task == expected
+        assert ShrubService.generate_json(EvgProject(tasks=[task])) == ShrubService.generate_json(
+            EvgProject(tasks=[expected])
+        )
+
+    def test_invariant_commands_are_shared(self, template):
+        task_0 = template.create_task("suite_0", vars={"suite": "suite_0"})
+        task_1 = template.create_task("suite_1", vars={"suite": "suite_1"})
+
+        assert task_0.commands[0] is task_1.commands[0]
+        assert task_0.commands[1] is task_1.commands[1]
+        assert task_0.commands[2] is not task_1.commands[2]
+        assert task_0.commands[3] is task_1.commands[3]
+        assert task_0.commands[2].vars["suite"] == "suite_0"
+        assert task_1.commands[2].vars["suite"] == "suite_1"
+
+    def test_created_tasks_do_not_share_lists(self, template):
+        task_0 = template.create_task("suite_0")
+        task_1 = template.create_task("suite_1")
+
+        task_0.tags.append("suite_0")
+        task_0.depends_on.append(EvgTaskDependency(name="lint"))
+
+        assert task_1.tags == ["generated"]
+        assert task_1.depends_on == [EvgTaskDependency(name="compile")]
+        assert template.tags == ["generated"]
+        assert template.depends_on == [EvgTaskDependency(name="compile")]
+
+    def test_template_vars_are_not_modified(self, template):
+        template.create_task("suite_0", vars={"suite": "suite_0"})
+
+        assert template.parameterized[0].vars == {"resmoke_args": "--storageEngine=wt"}
+
+    def test_function_calls_without_overlay_are_shared(self, template):
+        task = template.create_task("suite_0")
+
+        assert task.commands[2] is template.parameterized[0]
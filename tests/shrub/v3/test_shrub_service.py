@@ -1,15 +1,28 @@
 """Unit tests for shrub_service.py."""
 
 import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import pytest
+import yaml
 
 from pydantic import BaseModel, ConfigDict
 from yaml.representer import RepresenterError
-from shrub.v3.evg_task import EvgTask, EvgTaskDependency
+from shrub.compressed_io import open_text
+from shrub.v3.evg_task import EvgTask, EvgTaskDependency, EvgTaskRef
 from shrub.v3.evg_build_variant import BuildVariant, DisplayTask
 from shrub.v3.evg_command import FunctionCall, shell_exec, subprocess_exec
 from shrub.v3.evg_project import EvgProject
-from shrub.v3.shrub_service import ShrubService
+from shrub.v3.evg_task_template import EvgTaskTemplate
+from shrub.v3.shrub_service import (
+    SharedCommandRenderer,
+    ShrubService,
+    dump_yaml,
+    dump_yaml_fragment,
+    end_document,
+    render_commands,
+    render_section_items,
+)
 
 
 @pytest.fixture
@@ -124,6 +137,173 @@ def test_project_yaml(project):
     assert EXPECTED_YAML3 in out
 
 
+def test_project_yaml_with_shared_commands(project):
+    template = EvgTaskTemplate(
+        prefix=project.tasks[0].commands[:1],
+        parameterized=project.tasks[0].commands[1:2],
+        suffix=project.tasks[0].commands[2:],
+        tags=[],
+        depends_on=[EvgTaskDependency(name="compile")],
+    )
+    tasks = [
+        template.create_task(task.name, vars={"parameter_2": "value 2"}) for task in project.tasks
+    ]
+    shared_project = EvgProject(buildvariants=project.buildvariants, tasks=tasks)
+
+    out = ShrubService.generate_yaml(shared_project)
+
+    assert EXPECTED_YAML1 in out
+    assert out == ShrubService.generate_yaml(EvgProject(**shared_project.model_dump()))
+
+
+def test_project_json_with_sorted_keys(project):
+    out = ShrubService.generate_json(project, sort_keys=True)
+
+    expected = json.loads(ShrubService.generate_json(project))
+    assert out == json.dumps(expected, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def test_project_yaml_with_anchors(project):
+    out = ShrubService.generate_yaml(project, anchors=True)
+
+    assert "&id001" in out
+    assert "*id001" in out
+    assert len(out) < len(ShrubService.generate_yaml(project))
+    assert yaml.safe_load(out) == yaml.safe_load(ShrubService.generate_yaml(project))
+    assert EvgProject(**yaml.safe_load(out)) == project
+
+
+def test_project_yaml_with_anchors_keeps_flow_styles():
+    dependencies = [EvgTaskDependency(name="compile", variant="linux-64-with-long-name")]
+    tasks = [
+        EvgTask(name=f"task_{i}", depends_on=dependencies, tags=["tag0", "tag1"]) for i in range(2)
+    ]
+
+    out = ShrubService.generate_yaml(EvgProject(tasks=tasks), anchors=True, min_anchor_size=1)
+
+    assert "depends_on: &id001 [{ name: compile, variant: linux-64-with-long-name }]" in out
+    assert "depends_on: *id001" in out
+    assert "tags: &id002 [tag0, tag1]" in out
+
+
+def test_project_yaml_with_anchors_keeps_style_of_aliased_sequences():
+    names = ["first-long-name", "second-long-name"]
+    project = EvgProject(
+        buildvariants=[BuildVariant(name="bv", run_on=names, tasks=[EvgTaskRef(name="t")])],
+        tasks=[EvgTask(name="t", tags=names)],
+    )
+
+    out = ShrubService.generate_yaml(project, anchors=True, min_anchor_size=1)
+
+    assert "run_on: &id001\n      - first-long-name\n      - second-long-name\n" in out
+    assert "tags: *id001" in out
+    assert EvgProject(**yaml.safe_load(out)) == project
+
+
+def test_project_yaml_with_anchors_skips_small_structures(project):
+    out = ShrubService.generate_yaml(project, anchors=True, min_anchor_size=10_000)
+
+    assert out == ShrubService.generate_yaml(project)
+
+
+def test_project_yaml_in_parallel(project):
+    project.functions = {
+        "do setup": [shell_exec(script="echo setup\n\n\n")],
+        "run test generator": FunctionCall(func="do setup"),
+    }
+    project.stepback = True
+
+    with ThreadPoolExecutor() as executor:
+        out = ShrubService.generate_yaml_parallel(project, executor, chunk_size=3)
+
+    assert out == ShrubService.generate_yaml(project)
+
+
+def test_yaml_in_parallel_ends_document_like_serial_output():
+    project = EvgProject(tasks=[EvgTask(name="task", commands=[shell_exec(script="a\n\n")])])
+
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        out = ShrubService.generate_yaml_parallel(project, executor)
+
+    assert out == ShrubService.generate_yaml(project)
+    assert out.endswith("\n...\n")
+
+
+def test_documents_can_be_assembled_from_fragments():
+    obj = {
+        "stepback": True,
+        "tasks": [{"name": "a"}, {"name": "b", "commands": [{"command": "x", "params": "c\n\n"}]}],
+    }
+
+    text = "".join(
+        [
+            dump_yaml_fragment({"stepback": True}),
+            "tasks:\n",
+            render_section_items(obj["tasks"][:1]),
+            render_section_items(obj["tasks"][1:]),
+        ]
+    )
+
+    assert end_document(text) == dump_yaml(obj)
+
+
+def test_shared_commands_are_rendered_once():
+    command = shell_exec(script="ls")
+    renderer = SharedCommandRenderer({id(command)})
+
+    text = renderer.render_command(command)
+
+    assert (
+        text
+        == render_commands([command])
+        == "      - command: shell.exec\n        params:\n          script: ls\n"
+    )
+    assert renderer.render_command(command) is text
+    assert render_commands([]) == ""
+
+
+@pytest.mark.parametrize(
+    "config",
+    [EvgProject(), EvgProject(tasks=[]), BuildVariant(name="bv", tasks=[], tags=["a"])],
+)
+def test_yaml_in_parallel_without_sections_to_split(config):
+    assert ShrubService.generate_yaml_parallel(config) == ShrubService.generate_yaml(config)
+
+
+@pytest.mark.parametrize("file_name", ["project.yml", "project.yml.gz"])
+def test_write_yaml(project, tmp_path, file_name):
+    project.stepback = True
+    file_location = str(tmp_path / file_name)
+
+    ShrubService.write_yaml(project, file_location, compression_level=1, chunk_size=3)
+
+    with open_text(file_location) as f:
+        assert f.read() == ShrubService.generate_yaml(project)
+    assert EvgProject.from_file(file_location) == project
+
+
+@pytest.mark.parametrize("file_name", ["project.json", "project.json.gz"])
+def test_write_json(project, tmp_path, file_name):
+    project.stepback = True
+    file_location = str(tmp_path / file_name)
+
+    ShrubService.write_json(project, file_location)
+
+    with open_text(file_location) as f:
+        assert f.read() == ShrubService.generate_json(project)
+
+
+@pytest.mark.parametrize(
+    "config", [EvgProject(), EvgProject(tasks=[]), BuildVariant(name="bv", tasks=[], tags=["a"])]
+)
+def test_write_without_sections_to_split(config, tmp_path):
+    ShrubService.write_yaml(config, str(tmp_path / "out.yml"))
+    ShrubService.write_json(config, str(tmp_path / "out.json"))
+
+    assert (tmp_path / "out.yml").read_text() == ShrubService.generate_yaml(config)
+    assert (tmp_path / "out.json").read_text() == ShrubService.generate_json(config)
+
+
 class CustomClass:
     pass
 